@@ -0,0 +1,316 @@
+# coding: utf-8
+"""
+Micro-benchmarks of hot utility and UI paths
+
+Times the text helpers, the playlist task progress hook and the history table
+refresh over realistic inputs and compares them with the baselines stored in
+hot_path_baselines.json. Baselines are stored in units of a pure Python
+calibration loop timed alongside each benchmark, so a baseline recorded on
+one machine still applies on a faster or slower one.
+
+    python tests/benchmark_hot_paths.py              # compare, exit 1 on a regression
+    python tests/benchmark_hot_paths.py --update     # record new baselines
+    python tests/benchmark_hot_paths.py format_eta --threshold 0.2
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hot_path_baselines.json')
+
+# a benchmark regresses when it is this much slower than its scaled baseline
+THRESHOLD = 0.5
+
+# timings per benchmark, the fastest one counts
+REPEAT = 7
+
+# seconds a single timing takes at least, short benchmarks are run several times per timing
+MIN_TIME = 0.1
+
+
+def calibration():
+    """ fixed pure Python workload, benchmark timings are measured in units of its duration """
+    data = {}
+    for n in range(200000):
+        data[n & 1023] = f"{n % 97:02d}:{n:x}"
+    return sorted(data.values())
+
+
+def timer(run):
+    """ call `run()` once to warm up, returns a function timing it in seconds per call
+
+    Each timing calls `run()` as often as needed to take at least MIN_TIME.
+    """
+    start = time.perf_counter()
+    run()
+    loops = max(1, math.ceil(MIN_TIME / max(time.perf_counter() - start, 1e-9)))
+
+    def time_run():
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        return (time.perf_counter() - start) / loops
+
+    return time_run
+
+
+def measure(run, repeat=REPEAT):
+    """ (seconds, units) per call of `run()`, units are seconds divided by the calibration time
+
+    Like timeit, the garbage collector is off and the fastest timing counts.
+    The calibration is timed in turn with the benchmark, so both see the
+    same machine load and clock speed.
+    """
+    time_run, time_calibration = timer(run), timer(calibration)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        best_run = best_calibration = float('inf')
+        for _ in range(repeat):
+            best_calibration = min(best_calibration, time_calibration())
+            best_run = min(best_run, time_run())
+    finally:
+        if enabled:
+            gc.enable()
+    return best_run, best_run / best_calibration
+
+
+# ---------------------------------------------------------------------------
+# inputs, seeded so every run measures the same data
+
+def long_titles(count=1000):
+    """ video titles as extractors return them: long, mixed scripts, emoji and stray control characters """
+    rng = random.Random(1)
+    words = ['Lofi', 'Beats', 'Live', 'Official', 'Music', 'Video', 'Remix', '4K', 'HDR', 'Full Album',
+             'ローファイ', '音楽', '작업용', 'музыка', 'موسيقى', 'Café', 'naïve', 'Ñandú', 'Straße',
+             '🎧', '🔥', '🌙✨', '👨‍👩‍👧', '​', '﻿', '\x1b[31m', '\x1b[0m', '\u0007', 'é']
+    return [' '.join(rng.choice(words) for _ in range(rng.randint(20, 60))) for _ in range(count)]
+
+
+def speeds(count=10000):
+    rng = random.Random(2)
+    values = [None, 0]
+    values += [rng.uniform(1, 10 ** rng.randint(2, 9)) for _ in range(count - len(values))]
+    return values
+
+
+def etas(count=10000):
+    rng = random.Random(3)
+    values = [None, 0]
+    values += [rng.choice((rng.randint(1, 3599), rng.uniform(3600, 90000))) for _ in range(count - len(values))]
+    return values
+
+
+def video_urls(count=10000):
+    rng = random.Random(4)
+    chars = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-'
+    forms = [
+        'https://www.youtube.com/watch?v={id}',
+        'https://www.youtube.com/watch?v={id}&list=RD{id}&index=13&pp=iAQB',
+        'https://m.youtube.com/watch?feature=share&v={id}&t=42s',
+        'https://youtu.be/{id}?si=AbCdEfGhIjKlMnOp',
+        'https://www.youtube.com/embed/{id}?autoplay=1',
+        'https://www.youtube.com/playlist?list=PL{id}{id}',
+        'https://music.youtube.com/browse/VLPL{id}',
+        'https://example.com/videos/{id}.mp4',
+    ]
+    return [rng.choice(forms).format(id=''.join(rng.choice(chars) for _ in range(11))) for _ in range(count)]
+
+
+def progress_dicts(count=10000):
+    """ yt-dlp progress hook calls of a DASH download, video then audio, with some unknown totals """
+    rng = random.Random(5)
+    files = [('video.f137.mp4', 180 * 1024 * 1024), ('audio.f140.m4a', 12 * 1024 * 1024)]
+    dicts = []
+    per_file = count // len(files)
+    for name, total in files:
+        for n in range(per_file):
+            downloaded = total * (n + 1) // per_file
+            d = {
+                'status': 'downloading',
+                'filename': name,
+                'tmpfilename': name + '.part',
+                'downloaded_bytes': downloaded,
+                'elapsed': n * 0.01,
+                'speed': rng.uniform(1, 20) * 1024 * 1024,
+                'eta': (total - downloaded) / (8 * 1024 * 1024),
+                'fragment_index': n // 50,
+                'fragment_count': per_file // 50,
+                'info_dict': {'id': 'dQw4w9WgXcQ', 'title': 'video'},
+            }
+            if n % 25:
+                d['total_bytes'] = total
+            else:
+                d['total_bytes_estimate'] = total
+            dicts.append(d)
+        dicts.append({'status': 'finished', 'filename': name, 'total_bytes': total, 'downloaded_bytes': total})
+    return dicts
+
+
+def history_entries(count=1000):
+    """ history entries ordered from oldest to newest, every tenth one a playlist """
+    rng = random.Random(6)
+    titles = long_titles(count)
+    entries = []
+    for n in range(count):
+        entry = {'id': n + 1, 'timestamp': f'2024-{n % 12 + 1:02d}-{n % 28 + 1:02d} 10:{n % 60:02d}:00',
+                 'status': rng.choice(('Success', 'Success', 'Success', 'Failed', 'Cancelled')),
+                 'type': 'single', 'title': titles[n][:120], 'path': f'/home/user/Videos/{n}.mp4'}
+        if n % 10 == 0:
+            entry['type'] = 'playlist'
+            entry['items'] = [{'title': titles[(n + i) % count][:80], 'status': 'Success',
+                               'path': f'/home/user/Videos/playlist {n}/{i}.mp4'} for i in range(20)]
+        entries.append(entry)
+    return entries
+
+
+# ---------------------------------------------------------------------------
+# benchmarks, each setup returns the function timed for one run
+
+def bench_clean_unicode_text():
+    from app.common.utils import clean_unicode_text
+    titles = long_titles()
+    return lambda: [clean_unicode_text(title) for title in titles]
+
+
+def bench_format_speed():
+    from app.common.utils import format_speed
+    values = speeds()
+    return lambda: [format_speed(value) for value in values]
+
+
+def bench_format_eta():
+    from app.common.utils import format_eta
+    values = etas()
+    return lambda: [format_eta(value) for value in values]
+
+
+def bench_extract_video_id_from_url():
+    from app.common.utils import extract_video_id_from_url
+    urls = video_urls()
+    return lambda: [extract_video_id_from_url(url) for url in urls]
+
+
+def bench_progress_hook():
+    from app.components.concurrent_playlist_worker import DownloadTask
+    from app.components.progress_aggregator import ProgressAggregator
+
+    aggregator = ProgressAggregator()
+    task = DownloadTask(1, 1, 'https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'video',
+                        {'outtmpl_base': '/tmp'}, 'playlist', ydl_pool=None,
+                        progress_callback=aggregator.update)
+    dicts = progress_dicts()
+
+    def run():
+        task._last_progress = task._last_total_bytes = 0
+        for d in dicts:
+            task.progress_hook(d)
+
+    return run
+
+
+def bench_history_display():
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    from app.view.history_interface import HistoryInterface
+
+    interface = HistoryInterface()
+    interface.resize(1100, 800)
+    interface.show()
+    app.processEvents()
+    entries = history_entries()
+
+    def run():
+        interface.updateHistoryDisplay(entries)
+        app.processEvents()  # relayout and paint the visible rows
+
+    run.keep = interface  # keep the window alive while it is timed
+    return run
+
+
+BENCHMARKS = {
+    'clean_unicode_text': bench_clean_unicode_text,
+    'format_speed': bench_format_speed,
+    'format_eta': bench_format_eta,
+    'extract_video_id_from_url': bench_extract_video_id_from_url,
+    'progress_hook': bench_progress_hook,
+    'history_display': bench_history_display,
+}
+
+
+def run_suite(names=None, repeat=REPEAT):
+    """ {name: (seconds, units)} of the benchmarks in `names`, all by default """
+    return {name: measure(BENCHMARKS[name](), repeat) for name in names or BENCHMARKS}
+
+
+def load_baselines(path=BASELINES):
+    """ {name: units} recorded by --update """
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['units']
+
+
+def save_baselines(baselines, path=BASELINES):
+    data = {'python': platform.python_version(), 'units': baselines}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(results, baselines, threshold=THRESHOLD):
+    """ (name, units, allowed units, regressed) for every result with a baseline """
+    rows = []
+    for name, (_, units) in results.items():
+        if name in baselines:
+            allowed = baselines[name] * (1 + threshold)
+            rows.append((name, units, allowed, units > allowed))
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of hot utility and UI paths")
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help=f"benchmarks to run, all by default ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--update', action='store_true', help="record the timings as the new baselines")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="allowed slowdown over the baseline, 0.5 is 50%%")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="timings per benchmark, the fastest counts")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_suite(args.names, args.repeat)
+
+    if args.update:
+        # benchmarks that weren't run keep their baselines
+        baselines = load_baselines() if args.names and os.path.exists(BASELINES) else {}
+        baselines.update({name: units for name, (_, units) in results.items()})
+        save_baselines(baselines)
+        print(f"{'benchmark':<28}{'ms':>10}{'units':>10}")
+        for name, (seconds, units) in results.items():
+            print(f"{name:<28}{seconds * 1000:10.2f}{units:10.3f}")
+        print(f"Baselines written to {BASELINES}")
+        return 0
+
+    rows = compare(results, load_baselines(), args.threshold)
+    print(f"{'benchmark':<28}{'ms':>10}{'units':>10}{'allowed':>10}")
+    for name, units, allowed, regressed in rows:
+        seconds = results[name][0]
+        print(f"{name:<28}{seconds * 1000:10.2f}{units:10.3f}{allowed:10.3f}{'  REGRESSED' if regressed else ''}")
+    return 1 if any(regressed for *_, regressed in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# coding: utf-8
+"""
+Offline benchmark of the download workers
+
+Serves synthetic media from a local `MediaServer` and runs DownloadWorker,
+PlaylistDownloadWorker and ConcurrentPlaylistWorker end to end at several
+concurrency levels, reporting items/s, MB/s, time to first byte and peak RSS.
+No network access is needed and every run downloads the same bytes, so
+results are comparable between commits.
+
+Each scenario runs in its own process with its own config and download
+folder, so peak RSS belongs to that scenario alone:
+
+    python tests/benchmark_workers.py --items 16 --size 8 --rate 4 --levels 1 2 4 8
+    python tests/benchmark_workers.py --workers concurrent --media dash --json results.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.request import urlopen
+
+PACKAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'youtube_downloader')
+sys.path.insert(0, PACKAGE)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from offline_media import MB, MEDIA_KINDS, MediaServer
+
+WORKERS = ('single', 'playlist', 'concurrent')
+
+# seconds a scenario may run before it counts as hung
+TIMEOUT = 600
+
+
+def peak_rss():
+    """ peak resident set size of this process in bytes, None where unknown """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def fetch_json(url):
+    with urlopen(url, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def downloaded_files(folder):
+    return [os.path.join(root, name) for root, _, names in os.walk(folder) for name in names
+            if not name.endswith(('.part', '.ytdl', '.json'))]
+
+
+def run_scenario(scenario):
+    """ run one scenario in this process and return its metrics """
+    from PySide6.QtCore import QCoreApplication, QTimer
+    from offline_media import register_offline_extractors
+
+    app = QCoreApplication.instance() or QCoreApplication([sys.argv[0]])
+    register_offline_extractors()
+
+    from app.components.download_scheduler import downloadScheduler
+    from app.components.download_worker import DownloadWorker
+    from app.components.playlist_worker import PlaylistDownloadWorker
+    from app.components.concurrent_playlist_worker import ConcurrentPlaylistWorker
+
+    base, worker, media = scenario['base_url'], scenario['worker'], scenario['media']
+    items, level, folder = scenario['items'], scenario['level'], scenario['folder']
+    options = dict(download_path=folder, quality="Best Available", format_type="mp4", is_audio_only=False)
+    downloadScheduler.setMaxConcurrent(max(level, 1) if worker == 'single' else max(level, 8))
+
+    result = {'completed': 0, 'failed': 0}
+    running = []
+
+    def completed(*args):
+        result['completed'] += 1
+
+    def failed(*args):
+        result['failed'] += 1
+
+    if worker == 'single':
+        for n in range(1, items + 1):
+            thread = DownloadWorker(f'{base}/offline/v/v{n}?media={media}', **options)
+            thread.downloadCompleted.connect(completed)
+            thread.downloadFailed.connect(failed)
+            running.append(thread)
+    else:
+        url = f'{base}/offline/pl/{items}?media={media}'
+        if worker == 'playlist':
+            thread = PlaylistDownloadWorker(url, **options)
+        else:
+            thread = ConcurrentPlaylistWorker(url, concurrent_downloads=level, **options)
+        thread.fileCompleted.connect(completed)
+        thread.fileFailed.connect(failed)
+        running.append(thread)
+
+    def check():
+        if all(thread.isFinished() for thread in running) or time.perf_counter() - start > TIMEOUT:
+            app.quit()
+
+    timer = QTimer()
+    timer.setInterval(20)
+    timer.timeout.connect(check)
+
+    fetch_json(f'{base}/stats/reset')
+    wall_start = time.time()
+    start = time.perf_counter()
+    for thread in running:
+        thread.start()
+    timer.start()
+    app.exec()
+    elapsed = time.perf_counter() - start
+
+    timed_out = not all(thread.isFinished() for thread in running)
+    for thread in running:
+        thread.cancel() if timed_out else thread.wait()
+    # deliver the completion signals the workers queued before they finished
+    app.processEvents()
+
+    stats = fetch_json(f'{base}/stats')
+    sizes = [os.path.getsize(path) for path in downloaded_files(folder)]
+    result.update({
+        'seconds': elapsed,
+        'items_per_s': result['completed'] / elapsed,
+        'mb_per_s': stats['bytes'] / MB / elapsed,
+        'ttfb_ms': (stats['first_byte'] - wall_start) * 1000 if stats['first_byte'] else None,
+        'requests': stats['requests'],
+        'peak_rss_mb': peak_rss() / MB if peak_rss() else None,
+        'files_ok': sum(size == scenario['item_size'] for size in sizes),
+        'timed_out': timed_out,
+    })
+    return result
+
+
+def spawn_scenario(scenario):
+    """ run one scenario in a fresh process with its own config folder """
+    with tempfile.TemporaryDirectory(prefix='ytd-bench-') as home:
+        env = dict(os.environ, HOME=home, XDG_DATA_HOME=os.path.join(home, 'data'),
+                   XDG_CONFIG_HOME=os.path.join(home, 'config'), APPDATA=home, LOCALAPPDATA=home,
+                   QT_QPA_PLATFORM='offscreen')
+        scenario = dict(scenario, folder=os.path.join(home, 'downloads'))
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', json.dumps(scenario)],
+            cwd=PACKAGE, env=env, capture_output=True, text=True, timeout=TIMEOUT + 60
+        )
+    if process.returncode != 0:
+        raise RuntimeError(f"{scenario['worker']} scenario failed:\n{process.stderr[-2000:]}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def scenarios(args, base_url, item_size):
+    for worker in args.workers:
+        for media in args.media:
+            # the sequential playlist worker has no concurrency to vary, and only
+            # the concurrent playlist worker has an auto level
+            levels = [1] if worker == 'playlist' else [level for level in args.levels if level or worker == 'concurrent']
+            for level in levels:
+                yield {'base_url': base_url, 'worker': worker, 'media': media, 'level': level,
+                       'items': args.items, 'item_size': item_size}
+
+
+def run_benchmark(args):
+    """ run every scenario of `args` against a fresh media server, returns a list of results """
+    server = MediaServer(item_size=int(args.size * MB), fragment_size=int(args.fragment * MB),
+                         rate=int(args.rate * MB), latency=args.latency).start()
+    results = []
+    try:
+        for scenario in scenarios(args, server.base_url, server.item_size):
+            metrics = spawn_scenario(scenario)
+            results.append({key: scenario[key] for key in ('worker', 'media', 'level', 'items')} | metrics)
+            if not args.quiet:
+                print_row(results[-1])
+    finally:
+        server.stop()
+    return results
+
+
+HEADER = (f"{'worker':<11}{'media':<12}{'level':>6}{'done':>7}{'items/s':>9}{'MB/s':>9}"
+          f"{'TTFB ms':>9}{'RSS MB':>8}{'time s':>8}")
+
+
+def print_row(row):
+    if not hasattr(print_row, 'printed'):
+        print(HEADER)
+        print_row.printed = True
+    level = row['level'] or 'auto'
+    ttfb = f"{row['ttfb_ms']:.0f}" if row['ttfb_ms'] is not None else '-'
+    rss = f"{row['peak_rss_mb']:.0f}" if row['peak_rss_mb'] is not None else '-'
+    done = f"{row['completed']}/{row['items']}"
+    print(f"{row['worker']:<11}{row['media']:<12}{level:>6}{done:>7}{row['items_per_s']:>9.2f}"
+          f"{row['mb_per_s']:>9.2f}{ttfb:>9}{rss:>8}{row['seconds']:>8.2f}", flush=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the download workers")
+    parser.add_argument('--items', type=int, default=8, help="videos per scenario")
+    parser.add_argument('--size', type=float, default=4, help="MB per video")
+    parser.add_argument('--fragment', type=float, default=1, help="MB per DASH fragment")
+    parser.add_argument('--rate', type=float, default=2, help="MB/s per connection, 0 for unlimited")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds before each media response")
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="concurrency levels, 0 is auto for the concurrent playlist worker")
+    parser.add_argument('--workers', nargs='+', choices=WORKERS, default=list(WORKERS))
+    parser.add_argument('--media', nargs='+', choices=MEDIA_KINDS, default=list(MEDIA_KINDS))
+    parser.add_argument('--json', metavar='FILE', help="also write the results to FILE")
+    parser.add_argument('--quiet', action='store_true', help="don't print the table")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        print(json.dumps(run_scenario(json.loads(args.child))), flush=True)
+        # the result is out, skip tearing down the Qt threads and yt-dlp
+        os._exit(0)
+
+    results = run_benchmark(args)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(row['completed'] == row['items'] for row in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+# coding: utf-8
+"""
+Offline media for end-to-end tests and benchmarks
+
+`MediaServer` serves synthetic videos over local HTTP, as progressive files or
+as DASH fragments, with optional per-connection throttling and latency like a
+video CDN. `register_offline_extractors()` makes every YoutubeDL created
+afterwards understand its pages, so the workers run unmodified without
+network access:
+
+    http://127.0.0.1:<port>/offline/v/<id>?media=progressive|dash
+    http://127.0.0.1:<port>/offline/pl/<count>?media=progressive|dash
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+MB = 1024 * 1024
+
+# media bytes repeat this block, so every run downloads identical files
+PATTERN = random.Random(0).randbytes(MB)
+
+CHUNK = 64 * 1024
+
+MEDIA_KINDS = ('progressive', 'dash')
+
+
+def media_bytes(start, length):
+    """ synthetic media bytes at offset `start` of any file """
+    data = bytearray()
+    while length > 0:
+        offset = start % len(PATTERN)
+        piece = PATTERN[offset:offset + length]
+        data += piece
+        start += len(piece)
+        length -= len(piece)
+    return bytes(data)
+
+
+class MediaServer:
+    """ Local HTTP server for synthetic videos and playlists
+
+    Every video is `item_size` bytes. DASH videos are split into fragments of
+    `fragment_size` bytes. `rate` limits each connection in bytes/s (0 is
+    unlimited) and `latency` delays each media response in seconds.
+    """
+
+    def __init__(self, item_size=4 * MB, fragment_size=MB, rate=0, latency=0.0):
+        self.item_size = item_size
+        self.fragment_size = fragment_size
+        self.rate = rate
+        self.latency = latency
+
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._requests = 0
+        self._first_byte = None
+
+        server = self
+        handler = type('Handler', (_MediaHandler,), {'media_server': server})
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self._httpd.server_address[1]}'
+
+    def video_url(self, video_id, media='progressive'):
+        return f'{self.base_url}/offline/v/{video_id}?media={media}'
+
+    def playlist_url(self, count, media='progressive'):
+        return f'{self.base_url}/offline/pl/{count}?media={media}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='MediaServer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self._bytes = 0
+            self._requests = 0
+            self._first_byte = None
+
+    def stats(self):
+        """ media bytes and requests served since the last reset, and the wall time of the first byte """
+        with self._lock:
+            return {'bytes': self._bytes, 'requests': self._requests, 'first_byte': self._first_byte}
+
+    def fragment_count(self):
+        return -(-self.item_size // self.fragment_size)
+
+    def _count(self, sent):
+        with self._lock:
+            if self._first_byte is None:
+                self._first_byte = time.time()
+            self._bytes += sent
+
+    def _count_request(self):
+        with self._lock:
+            self._requests += 1
+
+
+class _MediaHandler(BaseHTTPRequestHandler):
+    """ Serves the API pages, media and stats of a MediaServer """
+
+    media_server = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        media = parse_qs(url.query).get('media', ['progressive'])[0]
+        parts = url.path.strip('/').split('/')
+
+        if parts[:2] == ['api', 'video'] and len(parts) == 3:
+            return self.send_json(self.video_info(parts[2], media))
+        if parts[:2] == ['api', 'playlist'] and len(parts) == 3 and parts[2].isdigit():
+            return self.send_json(self.playlist_info(int(parts[2]), media))
+        if parts == ['stats']:
+            return self.send_json(self.media_server.stats())
+        if parts == ['stats', 'reset']:
+            self.media_server.reset_stats()
+            return self.send_json({})
+        if parts[0] == 'media' and len(parts) == 2:
+            return self.send_media(0, self.media_server.item_size)
+        if parts[0] == 'media' and len(parts) == 4 and parts[2] == 'frag' and parts[3].isdigit():
+            server = self.media_server
+            start = int(parts[3]) * server.fragment_size
+            if start >= server.item_size:
+                return self.send_error(404)
+            return self.send_media(start, min(server.fragment_size, server.item_size - start))
+
+        self.send_error(404)
+
+    def video_info(self, video_id, media):
+        server = self.media_server
+        base = server.base_url
+        fmt = {
+            'format_id': media,
+            'ext': 'mp4',
+            'vcodec': 'avc1.4d401f',
+            'acodec': 'mp4a.40.2',
+            'width': 1280,
+            'height': 720,
+            'filesize': server.item_size,
+        }
+        if media == 'dash':
+            fmt.update({
+                'url': f'{base}/media/{video_id}/manifest.mpd',
+                'protocol': 'http_dash_segments',
+                'fragment_base_url': f'{base}/media/{video_id}/frag/',
+                'fragments': [{'path': str(n)} for n in range(server.fragment_count())],
+            })
+        else:
+            fmt['url'] = f'{base}/media/{video_id}.mp4'
+
+        return {'id': video_id, 'title': f'Offline video {video_id}', 'duration': 60, 'formats': [fmt]}
+
+    def playlist_info(self, count, media):
+        return {
+            'id': f'offline{count}',
+            'title': f'Offline playlist {count}',
+            'entries': [{'id': f'v{n}', 'title': f'Offline video v{n}', 'duration': 60} for n in range(1, count + 1)],
+        }
+
+    def send_json(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_media(self, offset, size):
+        """ send `size` bytes of a file starting at `offset`, honoring a byte range """
+        server = self.media_server
+        server._count_request()
+        if server.latency:
+            time.sleep(server.latency)
+
+        start, end = 0, size - 1
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+
+        began = time.monotonic()
+        sent = 0
+        position = start
+        try:
+            while position <= end:
+                length = min(CHUNK, end - position + 1)
+                # counted first, so stats never lag behind what a client has read
+                server._count(length)
+                self.wfile.write(media_bytes(offset + position, length))
+                position += length
+                sent += length
+
+                # keep the connection at its rate like a throttling CDN
+                if server.rate:
+                    delay = sent / server.rate - (time.monotonic() - began)
+                    if delay > 0:
+                        time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class OfflineVideoIE(InfoExtractor):
+    IE_DESC = False  # not listed in --list-extractors
+    _VALID_URL = r'https?://(?:127\.0\.0\.1|localhost):\d+/offline/v/(?P<id>[^/?#]+)'
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        parsed = urlparse(url)
+        media = parse_qs(parsed.query).get('media', ['progressive'])[0]
+        return self._download_json(
+            f'{parsed.scheme}://{parsed.netloc}/api/video/{video_id}?media={media}', video_id)
+
+
+class OfflinePlaylistIE(InfoExtractor):
+    IE_DESC = False
+    _VALID_URL = r'https?://(?:127\.0\.0\.1|localhost):\d+/offline/pl/(?P<id>\d+)'
+
+    def _real_extract(self, url):
+        count = self._match_id(url)
+        parsed = urlparse(url)
+        media = parse_qs(parsed.query).get('media', ['progressive'])[0]
+        base = f'{parsed.scheme}://{parsed.netloc}'
+        info = self._download_json(f'{base}/api/playlist/{count}?media={media}', count)
+        entries = [
+            self.url_result(f'{base}/offline/v/{entry["id"]}?media={media}', OfflineVideoIE,
+                            entry['id'], entry['title'], duration=entry['duration'])
+            for entry in info['entries']
+        ]
+        return self.playlist_result(entries, info['id'], info['title'])
+
+
+_registered = False
+
+
+def register_offline_extractors():
+    """ let every YoutubeDL created from now on extract offline pages, before its default extractors """
+    global _registered
+    if _registered:
+        return
+    _registered = True
+
+    add_defaults = yt_dlp.YoutubeDL.add_default_info_extractors
+
+    def add_default_info_extractors(self):
+        # instances, yt-dlp only looks up classes in its own extractor list
+        self.add_info_extractor(OfflineVideoIE())
+        self.add_info_extractor(OfflinePlaylistIE())
+        add_defaults(self)
+
+    yt_dlp.YoutubeDL.add_default_info_extractors = add_default_info_extractors
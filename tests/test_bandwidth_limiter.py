@@ -0,0 +1,113 @@
+# coding: utf-8
+"""
+Test the global bandwidth limiter
+"""
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+import app.components.bandwidth_limiter as limiter_module
+from app.components.bandwidth_limiter import BandwidthLimiter
+import yt_dlp
+from yt_dlp.downloader.common import FileDownloader
+
+
+def download(limiter, size, block, received, key):
+    for _ in range(size // block):
+        limiter.consume(block)
+        received[key] += block
+
+
+def test_limit_caps_the_total_of_concurrent_downloads():
+    limit = 400 * 1024
+    limiter = BandwidthLimiter(limit)
+    received = {i: 0 for i in range(3)}
+
+    threads = [threading.Thread(target=download, args=(limiter, 160 * 1024, 8 * 1024, received, i)) for i in range(3)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    # the burst allowance is the only transfer not paid for in time
+    total = sum(received.values())
+    assert total == 3 * 160 * 1024
+    assert elapsed >= (total - limit * BandwidthLimiter.BURST) / limit * 0.9
+
+
+def test_active_downloads_share_evenly():
+    limiter = BandwidthLimiter(400 * 1024)
+    received = {'a': 0, 'b': 0}
+
+    threads = [threading.Thread(target=download, args=(limiter, 400 * 1024, 64 * 1024, received, key))
+               for key in received]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    snapshot = dict(received)
+    limiter.setLimit(0)
+    for thread in threads:
+        thread.join()
+
+    assert abs(snapshot['a'] - snapshot['b']) <= 64 * 1024
+
+
+def test_waiting_download_stops_when_cancelled():
+    limiter = BandwidthLimiter(1024)
+    cancelled = threading.Event()
+    threading.Timer(0.2, cancelled.set).start()
+
+    assert limiter.consume(1024 * 1024, cancelled.is_set) is False
+
+
+def test_slow_down_draws_bytes_read_since_last_call(monkeypatch):
+    consumed = []
+
+    class RecordingLimiter:
+        def consume(self, amount, isCancelled=None):
+            consumed.append(amount)
+            return True
+
+    monkeypatch.setattr(limiter_module, 'bandwidthLimiter', RecordingLimiter())
+    downloader = FileDownloader(yt_dlp.YoutubeDL({'quiet': True}), {})
+
+    downloader.slow_down(100.0, None, 1000)
+    downloader.slow_down(100.0, None, 2500)
+    downloader.slow_down(200.0, None, 700)  # retry restarts the counter
+
+    assert consumed == [1000, 1500, 700]
+
+
+def test_fragment_threads_sharing_a_downloader_are_charged_what_they_read(monkeypatch):
+    consumed = []
+    lock = threading.Lock()
+
+    class RecordingLimiter:
+        def consume(self, amount, isCancelled=None):
+            with lock:
+                consumed.append(amount)
+            return True
+
+    monkeypatch.setattr(limiter_module, 'bandwidthLimiter', RecordingLimiter())
+    downloader = FileDownloader(yt_dlp.YoutubeDL({'quiet': True}), {})
+    turns = [threading.Semaphore(0) for _ in range(4)]
+
+    def fragment(n):
+        # fragment threads take turns, each with its own start time
+        for block in range(1, 6):
+            turns[n].acquire()
+            downloader.slow_down(100.0 + n, None, block * 1000)
+            turns[(n + 1) % len(turns)].release()
+
+    threads = [threading.Thread(target=fragment, args=(n,)) for n in range(len(turns))]
+    for thread in threads:
+        thread.start()
+    turns[0].release()
+    for thread in threads:
+        thread.join()
+
+    assert sum(consumed) == len(turns) * 5000
@@ -0,0 +1,55 @@
+# coding: utf-8
+"""
+Test the offline media server and a short run of the worker benchmark
+"""
+import os
+import sys
+from urllib.request import Request, urlopen
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+import pytest
+import yt_dlp
+
+from offline_media import MediaServer, media_bytes, register_offline_extractors
+from benchmark_workers import parse_args, run_benchmark
+
+
+@pytest.fixture
+def server():
+    server = MediaServer(item_size=300 * 1024, fragment_size=128 * 1024).start()
+    yield server
+    server.stop()
+
+
+def test_media_honors_ranges(server):
+    request = Request(f'{server.base_url}/media/v1.mp4', headers={'Range': 'bytes=1000-1999'})
+    with urlopen(request) as response:
+        assert response.status == 206
+        assert response.read() == media_bytes(1000, 1000)
+
+    with urlopen(f'{server.base_url}/media/v1/frag/2') as response:
+        assert response.read() == media_bytes(2 * 128 * 1024, 300 * 1024 - 2 * 128 * 1024)
+    assert server.stats()['bytes'] == 1000 + 44 * 1024
+
+
+def test_extractors_list_offline_videos_and_playlists(server):
+    register_offline_extractors()
+    with yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': 'in_playlist'}) as ydl:
+        playlist = ydl.extract_info(server.playlist_url(3, 'dash'), download=False)
+        video = ydl.extract_info(playlist['entries'][0]['url'], download=False)
+
+    assert [entry['id'] for entry in playlist['entries']] == ['v1', 'v2', 'v3']
+    assert video['protocol'] == 'http_dash_segments'
+    assert len(video['fragments']) == 3
+
+
+def test_benchmark_downloads_every_item():
+    args = parse_args(['--items', '2', '--size', '0.25', '--fragment', '0.125', '--rate', '0', '--latency', '0',
+                       '--levels', '2', '--workers', 'single', 'concurrent', '--media', 'dash', '--quiet'])
+    results = run_benchmark(args)
+
+    assert [(row['worker'], row['level']) for row in results] == [('single', 2), ('concurrent', 2)]
+    for row in results:
+        assert row['completed'] == row['files_ok'] == 2
+        assert row['mb_per_s'] > 0 and row['ttfb_ms'] > 0
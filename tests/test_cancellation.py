@@ -0,0 +1,96 @@
+# coding: utf-8
+"""
+Test cooperative download cancellation
+"""
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+import pytest
+from yt_dlp.utils import DownloadCancelled
+import yt_dlp.postprocessor.ffmpeg
+
+from app.components.cancellation import CancelToken
+from offline_media import MediaServer, register_offline_extractors
+
+
+def test_progress_hook_raises_after_cancel():
+    token = CancelToken()
+    token.progressHook({'status': 'downloading', 'filename': 'a.mp4'})
+
+    token.cancel()
+    assert token.isCancelled()
+    with pytest.raises(DownloadCancelled):
+        token.progressHook({'status': 'downloading', 'filename': 'a.mp4'})
+    with pytest.raises(DownloadCancelled):
+        token.progressHook({'status': 'finished', 'postprocessor': 'FFmpegExtractAudio'})
+
+
+def test_cleanup_removes_partial_files(tmp_path):
+    target = tmp_path / 'video.mp4'
+    partial = [tmp_path / 'video.mp4.part', tmp_path / 'video.mp4.ytdl', tmp_path / 'video.mp4.part-Frag3']
+    for path in partial:
+        path.write_bytes(b'x')
+    other = tmp_path / 'other.mp4'
+    other.write_bytes(b'x')
+
+    token = CancelToken()
+    token.progressHook({'status': 'downloading', 'filename': str(target), 'tmpfilename': str(partial[0])})
+    token.cancel()
+    token.cleanup()
+
+    assert not any(path.exists() for path in partial)
+    assert other.exists()
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="uses a posix shell")
+def test_cancel_kills_bound_process(tmp_path):
+    output = tmp_path / 'audio.mp3'
+    output.write_bytes(b'x')
+    token = CancelToken()
+
+    def run():
+        with token.bind():
+            yt_dlp.postprocessor.ffmpeg.Popen.run(['sh', '-c', 'sleep 30', str(output)])
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    time.sleep(0.3)
+
+    start = time.time()
+    token.cancel()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert time.time() - start < 5
+    assert not output.exists()
+
+
+def test_cancel_after_the_transfer_suppresses_completion(tmp_path):
+    from PySide6.QtCore import QCoreApplication
+    from app.components.download_worker import DownloadWorker
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    register_offline_extractors()
+    server = MediaServer(item_size=64 * 1024).start()
+    events = []
+    try:
+        worker = DownloadWorker(server.video_url('late'), str(tmp_path), "Best Available", "mp4", False)
+        worker.downloadCompleted.connect(lambda *args: events.append('completed'))
+        worker.downloadFailed.connect(lambda *args: events.append('failed'))
+
+        # the user cancels after yt-dlp returned, before the completion is reported
+        output_path = worker.get_actual_output_path
+        def cancel_then_resolve(*args):
+            worker._token.cancel()
+            return output_path(*args)
+        worker.get_actual_output_path = cancel_then_resolve
+
+        worker.run()
+    finally:
+        server.stop()
+
+    assert events == []
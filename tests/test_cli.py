@@ -0,0 +1,68 @@
+# coding: utf-8
+"""
+Test the headless batch download command
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+import pytest
+
+from app.cli import parseArgs, readUrls, makeJobs
+
+MAIN = os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader', 'main.py')
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def test_urls_come_from_arguments_and_batch_file(tmp_path):
+    batch = tmp_path / 'urls.txt'
+    batch.write_text("# music\nhttps://youtu.be/aaaaaaaaaaa\n\n  https://www.youtube.com/playlist?list=PLx  \n")
+
+    assert readUrls(['https://example.com/v'], str(batch)) == [
+        'https://example.com/v', 'https://youtu.be/aaaaaaaaaaa', 'https://www.youtube.com/playlist?list=PLx']
+
+
+def test_jobs_use_the_worker_options_of_the_gui(tmp_path):
+    args = parseArgs(['-o', str(tmp_path), '-q', '720p', '-x', '--playlist-concurrency', '0'])
+    jobs = makeJobs(args, ['https://www.youtube.com/watch?v=aaaaaaaaaaa&list=PLx',
+                           'https://www.youtube.com/playlist?list=PLx'])
+
+    assert jobs[0] == ('https://www.youtube.com/watch?v=aaaaaaaaaaa', False, {
+        'download_path': str(tmp_path), 'quality': '720p', 'format_type': 'mp3', 'is_audio_only': True})
+    assert jobs[1][1] is True
+    assert jobs[1][2]['concurrent_downloads'] == 0
+
+
+def test_audio_format_requires_audio_only():
+    with pytest.raises(SystemExit):
+        parseArgs(['-f', 'mp3', 'https://example.com/v'])
+
+
+def test_batch_prints_json_events(tmp_path):
+    (tmp_path / 'video.mp4').write_bytes(os.urandom(4096))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=str(tmp_path)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/video.mp4'
+    try:
+        result = subprocess.run(
+            [sys.executable, MAIN, 'download', url, '-o', str(tmp_path / 'out'), '-f', 'mp4', '-q', 'Best Available'],
+            capture_output=True, text=True, timeout=120
+        )
+    finally:
+        server.shutdown()
+
+    events = [json.loads(line) for line in result.stdout.splitlines()]
+    assert result.returncode == 0
+    assert [e['event'] for e in events if e['event'] != 'progress'] == ['started', 'info', 'completed', 'finished']
+    completed = next(e for e in events if e['event'] == 'completed')
+    assert os.path.getsize(completed['path']) == 4096
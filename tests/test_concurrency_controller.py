@@ -0,0 +1,53 @@
+# coding: utf-8
+"""
+Test the adaptive concurrency of playlist downloads
+"""
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from app.components.concurrency_controller import ConcurrencyController
+
+KB = 1024
+
+
+def run_windows(controller, windows, link_speed, stream_speed):
+    """ feed windows of samples from a link that caps the total speed """
+    history = []
+    for _ in range(windows * ConcurrencyController.WINDOW):
+        slots = controller.slots()
+        per_download = min(stream_speed, link_speed / slots)
+        controller.sample([per_download] * slots)
+        history.append(controller.slots())
+    return history
+
+
+def test_adds_slots_while_throughput_rises():
+    controller = ConcurrencyController(maxSlots=6, initialSlots=1)
+    run_windows(controller, 5, link_speed=10000 * KB, stream_speed=500 * KB)
+    assert controller.slots() == 6
+
+
+def test_backs_off_when_throughput_plateaus():
+    controller = ConcurrencyController(maxSlots=8, initialSlots=2)
+    history = run_windows(controller, 6, link_speed=1500 * KB, stream_speed=500 * KB)
+
+    # 3 downloads saturate the link, the fourth was probed and dropped again
+    assert max(history) == 4
+    assert controller.slots() == 3
+
+
+def test_throttling_halves_slots():
+    controller = ConcurrencyController(maxSlots=8, initialSlots=6)
+    assert ConcurrencyController.isThrottlingError('ERROR: unable to download video data: HTTP Error 429: Too Many Requests')
+    assert not ConcurrencyController.isThrottlingError('ERROR: Video unavailable')
+
+    controller.reportThrottled()
+    assert controller.sample([100 * KB] * 6) == 3
+
+
+def test_idle_slots_are_not_measured():
+    controller = ConcurrencyController(maxSlots=8, initialSlots=2)
+    for _ in range(ConcurrencyController.WINDOW * 3):
+        controller.sample([100 * KB], busy=False)
+    assert controller.slots() == 2
@@ -0,0 +1,98 @@
+# coding: utf-8
+"""
+Test bounded task dispatch of the concurrent playlist worker
+"""
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+import app.components.concurrent_playlist_worker as worker_module
+from app.components.concurrent_playlist_worker import ConcurrentPlaylistWorker
+
+
+class RecordingScheduler:
+    """ Scheduler stand-in that records started tasks instead of running them """
+
+    def __init__(self):
+        self.started = []
+
+    def start(self, runnable, priority=0, group=None):
+        self.started.append(runnable)
+
+    def setGroupLimit(self, group, limit):
+        self.limit = limit
+
+    def maxConcurrent(self):
+        return 3
+
+
+def make_worker(tmp_path, monkeypatch, concurrent=2):
+    scheduler = RecordingScheduler()
+    monkeypatch.setattr(worker_module, 'downloadScheduler', scheduler)
+    worker = ConcurrentPlaylistWorker('https://example.com/list', str(tmp_path), '720p', 'webm', False,
+                                      concurrent_downloads=concurrent)
+    worker._download_opts = {'outtmpl_base': str(tmp_path)}
+    worker._playlist_title = 'Playlist'
+    return worker, scheduler
+
+
+def item(index):
+    return {'url': f'https://example.com/v{index}', 'title': f'Video {index}', 'id': f'v{index}',
+            'ie_key': None, 'duration': None}
+
+
+def test_tasks_are_created_only_for_free_slots(tmp_path, monkeypatch):
+    worker, scheduler = make_worker(tmp_path, monkeypatch)
+    for index in (1, 2, 3):
+        worker._enqueue(index, item(index))
+
+    assert [t.index for t in scheduler.started] == [1, 2]
+    assert [index for index, _ in worker._queue] == [3]
+
+    worker._on_task_finished(1)
+    assert [t.index for t in scheduler.started] == [1, 2, 3]
+    assert len(worker._active_tasks) == 2
+
+
+def test_pause_skip_and_reorder(tmp_path, monkeypatch):
+    worker, scheduler = make_worker(tmp_path, monkeypatch)
+    worker.pause()
+    for index in (1, 2, 3):
+        worker._enqueue(index, item(index))
+    assert scheduler.started == []
+
+    worker.skip_item(2)
+    assert worker.move_to_front(3)
+    assert not worker.move_to_front(9)
+
+    worker.resume()
+    assert [t.index for t in scheduler.started] == [3, 1]
+
+    worker._on_task_finished(3)
+    assert [t.index for t in scheduler.started] == [3, 1]
+    assert not worker._queue
+
+
+def test_auto_mode_changes_concurrency_while_running(tmp_path, monkeypatch):
+    worker, scheduler = make_worker(tmp_path, monkeypatch, concurrent=ConcurrentPlaylistWorker.AUTO_CONCURRENCY)
+    assert worker.concurrent_downloads == 2
+    for index in (1, 2, 3, 4):
+        worker._enqueue(index, item(index))
+    assert [t.index for t in scheduler.started] == [1, 2]
+
+    worker.set_concurrency(3)
+    assert [t.index for t in scheduler.started] == [1, 2, 3]
+    assert scheduler.limit == 3
+
+
+def test_items_post_processing_drop_out_of_the_measured_speeds(tmp_path, monkeypatch):
+    worker, scheduler = make_worker(tmp_path, monkeypatch)
+    for index in (1, 2):
+        worker._enqueue(index, item(index))
+        worker.progressAggregator.update(index, 100 if index == 1 else 40, speed=1024 * 1024)
+
+    worker._on_task_postprocessing(1)
+    worker._on_task_finished(1)
+
+    assert list(worker.progressAggregator.snapshot()) == [2]
+    assert 1 in worker._processing_tasks
@@ -0,0 +1,39 @@
+# coding: utf-8
+"""
+Test the write-behind config writer
+"""
+import json
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from app.common.config import Config, ConfigItem
+
+
+def make_config(tmp_path):
+    config = Config()
+    config._file = str(tmp_path / 'config.json')
+    config._config = {}
+    return config
+
+
+def test_set_is_written_behind_and_flushed(tmp_path):
+    config = make_config(tmp_path)
+    item = ConfigItem("Download", "SpeedLimit", 0)
+    config.addItem(item)
+
+    for value in range(200):
+        config.set(item, value)
+    config.flush()
+
+    with open(config._file, encoding='utf-8') as f:
+        assert json.load(f) == {"Download": {"SpeedLimit": 199}}
+    assert os.listdir(tmp_path) == ['config.json']
+
+
+def test_flush_without_changes_does_not_write(tmp_path):
+    config = make_config(tmp_path)
+    config._dirty = False
+    config.flush()
+
+    assert not os.path.exists(config._file)
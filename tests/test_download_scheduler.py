@@ -0,0 +1,112 @@
+# coding: utf-8
+"""
+Test the global download scheduler
+"""
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from app.components.download_scheduler import DownloadScheduler
+
+
+class Job:
+    """ Runnable that records how many jobs run at once """
+
+    def __init__(self, name, log, running, gate):
+        self.name = name
+        self.log = log
+        self.running = running
+        self.gate = gate
+
+    def run(self):
+        with self.running['lock']:
+            self.running['now'] += 1
+            self.running['max'] = max(self.running['max'], self.running['now'])
+            self.log.append(self.name)
+        self.gate.wait(5)
+        with self.running['lock']:
+            self.running['now'] -= 1
+
+
+def make_jobs(names, gate):
+    log = []
+    running = {'lock': threading.Lock(), 'now': 0, 'max': 0}
+    return [Job(name, log, running, gate) for name in names], log, running
+
+
+def test_global_cap_and_group_limit():
+    scheduler = DownloadScheduler(3)
+    gate = threading.Event()
+    playlist = object()
+    jobs, log, running = make_jobs(range(6), gate)
+
+    scheduler.setGroupLimit(playlist, 2)
+    for job in jobs:
+        scheduler.start(job, group=playlist)
+
+    time.sleep(0.2)
+    assert running['now'] == 2
+
+    gate.set()
+    assert scheduler.waitForGroup(playlist, 5)
+    assert running['max'] == 2
+    assert sorted(log) == list(range(6))
+
+
+def test_single_download_gets_next_slot():
+    scheduler = DownloadScheduler(1)
+    gate = threading.Event()
+    playlist = object()
+    jobs, log, running = make_jobs(['p1', 'p2', 'p3'], gate)
+    for job in jobs:
+        scheduler.start(job, DownloadScheduler.PRIORITY_PLAYLIST, group=playlist)
+
+    slots = []
+    waiter = threading.Thread(target=lambda: slots.append(scheduler.acquire(DownloadScheduler.PRIORITY_SINGLE)))
+    waiter.start()
+    time.sleep(0.2)
+    assert log == ['p1'] and not slots
+
+    # the single download takes the slot p1 frees, ahead of p2 and p3
+    gate.set()
+    waiter.join(5)
+    assert slots and slots[0] is not None
+    assert log == ['p1']
+
+    scheduler.release(slots[0])
+    assert scheduler.waitForGroup(playlist, 5)
+    assert log == ['p1', 'p2', 'p3']
+
+
+def test_cancel_while_waiting():
+    scheduler = DownloadScheduler(1)
+    held = scheduler.acquire()
+    cancelled = threading.Event()
+
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(scheduler.acquire(isCancelled=cancelled.is_set)))
+    waiter.start()
+    cancelled.set()
+    waiter.join(5)
+    assert result == [None]
+
+    # the cancelled waiter did not take the slot
+    scheduler.release(held)
+    assert scheduler.acquire(isCancelled=lambda: False) is not None
+
+
+def test_cancel_group_drops_queued_tasks():
+    scheduler = DownloadScheduler(1)
+    gate = threading.Event()
+    playlist = object()
+    jobs, log, running = make_jobs(['a', 'b', 'c'], gate)
+    for job in jobs:
+        scheduler.start(job, group=playlist)
+
+    time.sleep(0.1)
+    assert scheduler.cancelGroup(playlist) == jobs[1:]
+    gate.set()
+    assert scheduler.waitForGroup(playlist, 5)
+    assert log == ['a']
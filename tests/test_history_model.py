@@ -0,0 +1,69 @@
+# coding: utf-8
+"""
+Test the history table model and its search filter
+"""
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from app.view.history_model import HistoryTableModel, HistoryFilterModel
+
+
+def make_entry(entry_id, title, **fields):
+    entry = {'id': entry_id, 'timestamp': '2024-01-01 10:00:00', 'status': 'Success',
+             'type': 'single', 'title': title, 'path': ''}
+    entry.update(fields)
+    return entry
+
+
+def make_models(entries):
+    model = HistoryTableModel()
+    model.setEntries(entries)
+    proxy = HistoryFilterModel()
+    proxy.setSourceModel(model)
+    return model, proxy
+
+
+def titles(proxy):
+    return [proxy.entry(row)['title'] for row in range(proxy.rowCount())]
+
+
+def test_search_matches_every_term():
+    model, proxy = make_models([
+        make_entry(1, 'Lofi Beats', path='/music/lofi.webm'),
+        make_entry(2, 'Cooking Show', status='Failed'),
+        make_entry(3, 'More Lofi', status='Failed'),
+    ])
+
+    proxy.setSearchText('LOFI')
+    assert titles(proxy) == ['More Lofi', 'Lofi Beats']
+
+    proxy.setSearchText('lofi failed')
+    assert titles(proxy) == ['More Lofi']
+
+    proxy.setSearchText('  ')
+    assert proxy.rowCount() == 3
+
+
+def test_search_includes_playlist_items():
+    model, proxy = make_models([
+        make_entry(1, 'Mix', type='playlist', items=[{'title': 'Hidden Track', 'status': 'Success'}]),
+        make_entry(2, 'Other'),
+    ])
+
+    proxy.setSearchText('hidden')
+    assert titles(proxy) == ['Mix']
+
+
+def test_search_follows_model_changes():
+    model, proxy = make_models([make_entry(1, 'alpha'), make_entry(2, 'beta')])
+    proxy.setSearchText('alpha')
+
+    model.insertEntries([make_entry(3, 'alphabet'), make_entry(4, 'gamma')])
+    assert titles(proxy) == ['alphabet', 'alpha']
+
+    model.updateEntry(make_entry(2, 'beta alpha'))
+    assert titles(proxy) == ['alphabet', 'beta alpha', 'alpha']
+
+    model.removeIds([3])
+    assert titles(proxy) == ['beta alpha', 'alpha']
@@ -0,0 +1,83 @@
+# coding: utf-8
+"""
+Test the SQLite history store
+"""
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from app.common.history_store import HistoryStore
+
+
+def make_store(tmp_path):
+    return HistoryStore(str(tmp_path / 'history.db'))
+
+
+def test_append_and_update_single_row(tmp_path):
+    store = make_store(tmp_path)
+    first = store.append({'timestamp': '2024-01-01 10:00:00', 'status': 'Downloading',
+                          'title': 'https://youtu.be/x', 'path': '', 'type': 'single'})
+    second = store.append({'timestamp': '2024-01-01 10:01:00', 'status': 'Downloading',
+                           'title': 'List', 'path': '/tmp', 'type': 'playlist', 'items': []})
+
+    assert store.update(first, title='Video', status='Success', path='/tmp/video.webm')
+    assert not store.update(12345, status='Success')
+
+    entries = store.entries()
+    assert [e['id'] for e in entries] == [first, second]
+    assert entries[0]['status'] == 'Success'
+    assert entries[0]['path'] == '/tmp/video.webm'
+    assert 'items' not in entries[0]
+    assert entries[1]['items'] == []
+
+
+def test_playlist_items_round_trip(tmp_path):
+    store = make_store(tmp_path)
+    entry_id = store.append({'timestamp': '2024-01-01 10:00:00', 'status': 'Downloading',
+                             'title': 'List', 'type': 'playlist', 'items': []})
+    items = [{'status': 'Success', 'title': 'Ünïcode title', 'path': ''}]
+    store.update(entry_id, status='Success (1/1)', items=items)
+
+    assert store.get(entry_id)['items'] == items
+
+
+def test_trim_keeps_newest(tmp_path):
+    store = make_store(tmp_path)
+    ids = [store.append({'timestamp': f'2024-01-01 10:00:{i:02d}', 'status': 'Success', 'title': str(i)})
+           for i in range(5)]
+
+    removed = store.trim(3)
+
+    assert sorted(removed) == ids[:2]
+    assert [e['id'] for e in store.entries()] == ids[2:]
+    assert [e['id'] for e in store.entries(limit=2)] == ids[3:]
+
+
+def test_replace_status(tmp_path):
+    store = make_store(tmp_path)
+    running = store.append({'timestamp': '2024-01-01 10:00:00', 'status': 'Downloading', 'title': 'a'})
+    store.append({'timestamp': '2024-01-01 10:00:01', 'status': 'Success', 'title': 'b'})
+
+    assert store.replaceStatus('Downloading', 'Interrupted') == [running]
+    assert store.get(running)['status'] == 'Interrupted'
+    assert store.replaceStatus('Downloading', 'Interrupted') == []
+
+
+def test_history_changed_reports_diffs(tmp_path):
+    store = make_store(tmp_path)
+    events = []
+    store.historyChanged.connect(lambda *diff: events.append(diff))
+
+    first = store.append({'timestamp': '2024-01-01 10:00:00', 'status': 'Downloading', 'title': 'a'})
+    second = store.append({'timestamp': '2024-01-01 10:00:01', 'status': 'Downloading', 'title': 'b'})
+    store.update(first, status='Success')
+    store.trim(1)
+    store.clear()
+
+    assert events == [
+        ([first], [], []),
+        ([second], [], []),
+        ([], [first], []),
+        ([], [], [first]),
+        ([], [], [second]),
+    ]
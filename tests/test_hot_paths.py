@@ -0,0 +1,40 @@
+# coding: utf-8
+"""
+Test the hot path benchmarks
+
+Timing against the baselines depends on the machine and its load, so it only
+runs when HOT_PATH_BENCHMARKS=1 is set, or through benchmark_hot_paths.py.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from benchmark_hot_paths import BENCHMARKS, compare, load_baselines, progress_dicts, run_suite
+
+
+def test_every_benchmark_has_a_baseline():
+    assert sorted(load_baselines()) == sorted(BENCHMARKS)
+
+
+def test_compare_flags_slowdowns_over_the_threshold():
+    results = {'same': (0.01, 0.2), 'slower': (0.02, 0.29), 'regressed': (0.03, 0.31), 'new': (0.01, 0.1)}
+    rows = compare(results, {'same': 0.2, 'slower': 0.2, 'regressed': 0.2}, threshold=0.5)
+
+    assert [(name, regressed) for name, _, _, regressed in rows] == [
+        ('same', False), ('slower', False), ('regressed', True)]
+    assert rows[0][2] == pytest.approx(0.3)
+
+
+def test_progress_input_covers_both_files_of_a_dash_download():
+    dicts = progress_dicts()
+    assert len(dicts) == 10002
+    assert [d['filename'] for d in dicts if d['status'] == 'finished'] == ['video.f137.mp4', 'audio.f140.m4a']
+
+
+@pytest.mark.skipif(os.environ.get('HOT_PATH_BENCHMARKS') != '1', reason="timing benchmark, set HOT_PATH_BENCHMARKS=1")
+def test_hot_paths_stay_within_their_baselines():
+    rows = compare(run_suite(repeat=5), load_baselines())
+    regressed = [f"{name}: {units:.3f} > {allowed:.3f} units" for name, units, allowed, slower in rows if slower]
+    assert not regressed, "\n".join(regressed)
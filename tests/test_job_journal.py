@@ -0,0 +1,132 @@
+# coding: utf-8
+"""
+Test the crash-safe download job journal
+"""
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from app.common.job_journal import JobJournal
+
+
+def test_jobs_survive_reopen(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    journal = JobJournal(path)
+    options = {'download_path': str(tmp_path), 'quality': '720p', 'end_index': None}
+    job_id = journal.createJob('playlist', 'https://example.com/list', options, history_id=7)
+    journal.updateItem(job_id, 1, state=JobJournal.DONE, video_id='a', file_path='/x/1 - a.webm')
+    journal.updateItem(job_id, 2, state=JobJournal.DOWNLOADING, video_id='b', title='B')
+    journal.updateItem(job_id, 2, partial_path='/x/2 - B.webm.part', state=JobJournal.DOWNLOADING)
+    journal.close()
+
+    journal = JobJournal(path)
+    jobs = journal.unfinishedJobs()
+    assert len(jobs) == 1
+    job = jobs[0]
+    assert (job['kind'], job['url'], job['options'], job['history_id']) == \
+        ('playlist', 'https://example.com/list', options, 7)
+    assert [(i['index'], i['state']) for i in job['items']] == [(1, 'done'), (2, 'downloading')]
+    assert job['items'][1]['title'] == 'B'
+    assert job['items'][1]['partial_path'] == '/x/2 - B.webm.part'
+    assert list(journal.doneItems(job_id)) == [1]
+
+    journal.finishJob(job_id)
+    assert journal.unfinishedJobs() == []
+    journal.updateItem(job_id, 3, state=JobJournal.DONE)
+    assert journal.items(job_id) == []
+
+
+def test_partial_file_hook_and_discard(tmp_path):
+    journal = JobJournal(str(tmp_path / 'jobs.db'))
+    job_id = journal.createJob('single', 'https://example.com/v', {})
+
+    partial = tmp_path / 'video.webm.part'
+    leftovers = [partial, tmp_path / 'video.webm.ytdl', tmp_path / 'video.webm.part-Frag2']
+    for file in leftovers:
+        file.write_bytes(b'x')
+    finished = tmp_path / 'other.webm'
+    finished.write_bytes(b'x')
+
+    hook = journal.partialFileHook(job_id, 1)
+    hook({'status': 'downloading', 'tmpfilename': str(partial), 'filename': str(tmp_path / 'video.webm')})
+    hook({'status': 'finished', 'filename': str(tmp_path / 'video.webm')})
+    assert journal.items(job_id)[0]['partial_path'] == str(partial)
+
+    journal.discardJob(job_id)
+    assert journal.unfinishedJobs() == []
+    assert not any(file.exists() for file in leftovers)
+    assert finished.exists()
+
+
+class AnsweringBox:
+    """ Stands in for the resume dialog and gives a fixed answer """
+
+    answer = False
+    shown = []
+
+    def __init__(self, title, content, parent=None):
+        self.shown.append(content)
+        self.yesButton = self.cancelButton = self
+
+    def setText(self, text):
+        pass
+
+    def exec(self):
+        return self.answer
+
+
+class ResumingInterface:
+
+    def __init__(self):
+        self.resumed = []
+
+    def interface(self):
+        return self
+
+    def resumeJob(self, job):
+        self.resumed.append(job['url'])
+        return True
+
+
+def resume_interrupted(monkeypatch, tmp_path, answer):
+    """ run MainWindow.resumeInterruptedDownloads on a journal with two interrupted single downloads """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtWidgets import QApplication
+    QApplication.instance() or QApplication([])
+    import app.view.main_window as main_window
+
+    journal = JobJournal(str(tmp_path / 'jobs.db'))
+    partials = []
+    for name in ('older', 'newer'):
+        partial = tmp_path / f'{name}.mp4.part'
+        partial.write_bytes(b'x')
+        partials.append(partial)
+        job_id = journal.createJob('single', f'https://example.com/{name}', {})
+        journal.updateItem(job_id, 1, partial_path=str(partial), state=JobJournal.DOWNLOADING)
+
+    AnsweringBox.answer, AnsweringBox.shown = answer, []
+    monkeypatch.setattr(main_window, 'MessageBox', AnsweringBox)
+    monkeypatch.setattr(main_window, 'jobJournal', journal)
+    monkeypatch.setattr(main_window.historyStore, 'replaceStatus', lambda *args: None)
+
+    window = type('Window', (), {'singleDownloadInterface': ResumingInterface(),
+                                 'playlistInterface': ResumingInterface()})()
+    main_window.MainWindow.resumeInterruptedDownloads(window)
+    return journal, partials, window.singleDownloadInterface.resumed
+
+
+def test_jobs_not_offered_keep_their_partial_files(monkeypatch, tmp_path):
+    journal, (older, newer), resumed = resume_interrupted(monkeypatch, tmp_path, answer=False)
+
+    assert 'newer' in AnsweringBox.shown[0] and 'older' not in AnsweringBox.shown[0]
+    assert not newer.exists()
+    assert older.exists()
+    assert [job['url'] for job in journal.unfinishedJobs()] == ['https://example.com/older']
+
+
+def test_resumed_downloads_leave_older_jobs_for_later(monkeypatch, tmp_path):
+    journal, (older, newer), resumed = resume_interrupted(monkeypatch, tmp_path, answer=True)
+
+    assert resumed == ['https://example.com/newer']
+    assert older.exists() and newer.exists()
+    assert len(journal.unfinishedJobs()) == 2
@@ -0,0 +1,48 @@
+# coding: utf-8
+"""
+Test navigation pages that build their interface on first show
+"""
+import os
+import sys
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from PySide6.QtWidgets import QApplication, QLabel, QStackedWidget
+
+from app.view.lazy_interface import LazyInterface
+
+app = QApplication.instance() or QApplication([])
+
+
+def test_interface_is_built_once_when_first_shown():
+    built = []
+
+    def factory(parent):
+        built.append(parent)
+        return QLabel("page", parent)
+
+    stack = QStackedWidget()
+    first = LazyInterface('firstInterface', factory, stack)
+    second = LazyInterface('secondInterface', factory, stack)
+    stack.addWidget(first)
+    stack.addWidget(second)
+    stack.show()
+
+    assert built == [first]
+    assert not second.isBuilt()
+
+    stack.setCurrentWidget(second)
+    stack.setCurrentWidget(first)
+    stack.setCurrentWidget(second)
+    assert built == [first, second]
+    assert second.interface().isVisible()
+    assert second.objectName() == 'secondInterface'
+
+
+def test_interface_can_be_built_before_it_is_shown():
+    page = LazyInterface('hiddenInterface', lambda parent: QLabel("page", parent))
+    label = page.interface()
+
+    assert page.isBuilt()
+    assert page.interface() is label
+    assert label.parent() is page
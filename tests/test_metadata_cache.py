@@ -0,0 +1,122 @@
+# coding: utf-8
+"""
+Test the on-disk metadata cache
+"""
+import os
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from yt_dlp import YoutubeDL
+
+from app.common.metadata_cache import MetadataCache
+
+VIDEO_URL = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+
+class ExtractingYoutubeDL(YoutubeDL):
+    """ YoutubeDL returning a canned result instead of hitting the network """
+
+    def __init__(self, info):
+        super().__init__({'quiet': True})
+        self.info = info
+        self.calls = 0
+
+    def extract_info(self, url, download=True, ie_key=None, extra_info=None, process=True, force_generic_extractor=False):
+        self.calls += 1
+        return dict(self.info)
+
+
+def test_get_put_and_expiry(tmp_path):
+    cache = MetadataCache(str(tmp_path / 'cache.db'))
+    cache.put('a', {'id': 'a'}, 60)
+    cache.put('b', {'id': 'b'}, -1)
+
+    assert cache.get('a') == {'id': 'a'}
+    assert cache.get('b') is None
+    assert cache.get(None) is None
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = MetadataCache(str(tmp_path / 'cache.db'), maxSize=100)
+    cache.put('old', {'data': 'x' * 30}, 60)
+    cache.put('new', {'data': 'y' * 30}, 60)
+    time.sleep(0.01)
+    cache.get('old')
+    cache.put('newest', {'data': 'z' * 30}, 60)
+
+    assert cache.get('new') is None
+    assert cache.get('old') is not None
+    assert cache.get('newest') is not None
+    assert cache.size() <= 100
+
+
+def test_video_keys():
+    assert MetadataCache.videoKey(VIDEO_URL) == 'video:Youtube:dQw4w9WgXcQ'
+    assert MetadataCache.videoKey('https://youtu.be/dQw4w9WgXcQ') == 'video:Youtube:dQw4w9WgXcQ'
+    assert MetadataCache.videoKey(ie_key='Youtube', video_id='abc') == 'video:Youtube:abc'
+    assert MetadataCache.videoKey('https://example.com/file.mp4') is None
+
+
+def test_extract_video_uses_cache_until_streams_expire(tmp_path):
+    cache = MetadataCache(str(tmp_path / 'cache.db'))
+    expire = int(time.time()) + 6 * 60 * 60
+    info = {'id': 'dQw4w9WgXcQ', 'title': 'Video', 'extractor_key': 'Youtube',
+            'formats': [{'format_id': '18', 'url': f'https://cdn.example/v?expire={expire}&sig=1'}]}
+    ydl = ExtractingYoutubeDL(info)
+
+    assert cache.extractVideo(ydl, VIDEO_URL)['title'] == 'Video'
+    assert cache.extractVideo(ydl, VIDEO_URL)['title'] == 'Video'
+    assert ydl.calls == 1
+
+    cache.discardVideo(VIDEO_URL)
+    cache.extractVideo(ydl, VIDEO_URL)
+    assert ydl.calls == 2
+
+    # streams about to expire are not cached
+    expired = dict(info, formats=[{'format_id': '18', 'url': f'https://cdn.example/v?expire={int(time.time())}'}])
+    cache.clear()
+    ydl = ExtractingYoutubeDL(expired)
+    cache.extractVideo(ydl, VIDEO_URL)
+    cache.extractVideo(ydl, VIDEO_URL)
+    assert ydl.calls == 2
+
+
+class PagingYoutubeDL(YoutubeDL):
+    """ YoutubeDL returning a playlist whose entries are listed lazily """
+
+    def __init__(self, count, params=None):
+        super().__init__({'quiet': True, 'extract_flat': 'in_playlist', **(params or {})})
+        self.count = count
+        self.listed = 0
+
+    def extract_info(self, url, download=True, ie_key=None, extra_info=None, process=True, force_generic_extractor=False):
+        def entries():
+            for i in range(1, self.count + 1):
+                self.listed = i
+                yield {'_type': 'url', 'ie_key': 'Youtube', 'id': f'v{i}', 'url': f'v{i}', 'title': f'Video {i}'}
+
+        return {'_type': 'playlist', 'id': 'PL1', 'title': 'Playlist', 'extractor_key': 'YoutubeTab', 'entries': entries()}
+
+
+def test_stream_playlist_yields_before_listing_finishes(tmp_path):
+    cache = MetadataCache(str(tmp_path / 'cache.db'))
+    url = 'https://www.youtube.com/playlist?list=PL1'
+    ydl = PagingYoutubeDL(300)
+
+    info, entries = cache.streamPlaylist(ydl, url)
+    assert info['title'] == 'Playlist'
+    assert next(entries)['id'] == 'v1'
+    assert ydl.listed == 1
+    assert cache.get(cache.playlistKey(url)) is None
+
+    assert len(list(entries)) == 299
+    info, entries = cache.streamPlaylist(PagingYoutubeDL(0), url)
+    assert info['playlist_count'] == 300
+    assert [e['id'] for e in entries][:2] == ['v1', 'v2']
+
+    # ranges are applied while listing
+    ydl = PagingYoutubeDL(300, {'playlist_items': '5:7'})
+    info, entries = cache.streamPlaylist(ydl, url)
+    assert 'playlist_count' not in info
+    assert [e['id'] for e in entries] == ['v5', 'v6', 'v7']
@@ -0,0 +1,90 @@
+# coding: utf-8
+"""
+Test the post-processing stage of playlist downloads
+"""
+import os
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+import yt_dlp
+from yt_dlp.postprocessor.common import PostProcessor
+
+from app.components.postprocessing import PostProcessingPool, deferPostProcessing
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+class RecordingPP(PostProcessor):
+    """ Records the thread it runs on and the file it gets """
+
+    def __init__(self, downloader=None):
+        super().__init__(downloader)
+        self.runs = []
+
+    def run(self, info):
+        self.runs.append((threading.current_thread(), info['filepath'], info['title']))
+        return [], info
+
+
+def test_wait_for_group_waits_only_for_its_jobs():
+    pool = PostProcessingPool(2)
+    release = threading.Event()
+    done = []
+
+    pool.submit(lambda: (release.wait(5), done.append('slow')), group='a')
+    pool.submit(lambda: done.append('fast'), group='b')
+
+    assert pool.waitForGroup('b', timeout=5)
+    assert not pool.waitForGroup('a', timeout=0.1)
+    release.set()
+    assert pool.waitForGroup('a', timeout=5)
+    assert sorted(done) == ['fast', 'slow']
+
+
+def test_submit_blocks_while_queue_is_full():
+    pool = PostProcessingPool(1)
+    release = threading.Event()
+    for _ in range(1 + pool.QUEUED_PER_THREAD):
+        assert pool.submit(lambda: release.wait(5))
+
+    assert not pool.submit(lambda: None, isCancelled=lambda: True)
+    release.set()
+    assert pool.waitForGroup(None, timeout=5)
+
+
+def test_download_returns_before_post_processing(tmp_path):
+    (tmp_path / 'video.mp4').write_bytes(os.urandom(4096))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(QuietHandler, directory=str(tmp_path)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    recorder = RecordingPP()
+    opts = {'quiet': True, 'noprogress': True, 'outtmpl': str(tmp_path / 'out.%(ext)s')}
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            ydl.add_post_processor(recorder)
+            with deferPostProcessing(ydl) as deferred:
+                ydl.process_ie_result({
+                    'id': 'video', 'title': 'Video', 'ext': 'mp4', 'protocol': 'http',
+                    'url': f'http://127.0.0.1:{server.server_address[1]}/video.mp4',
+                }, download=True)
+
+            assert recorder.runs == []
+            assert 'post_process' not in vars(ydl)
+
+            pool = PostProcessingPool(1)
+            pool.submit(lambda: ydl.post_process(*deferred[0]))
+            assert pool.waitForGroup(None, timeout=5)
+    finally:
+        server.shutdown()
+
+    [(thread, filepath, title)] = recorder.runs
+    assert thread is not threading.current_thread()
+    assert filepath == str(tmp_path / 'out.mp4')
+    assert title == 'Video'
@@ -0,0 +1,75 @@
+# coding: utf-8
+"""
+Test batched progress reporting
+"""
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from PySide6.QtCore import QCoreApplication
+
+from app.components.progress_aggregator import ProgressAggregator
+from offline_media import MB, MediaServer, register_offline_extractors
+
+
+def test_samples_are_coalesced_per_tick():
+    aggregator = ProgressAggregator()
+    batches = []
+    aggregator.progressBatch.connect(batches.append)
+
+    def report(index):
+        for progress in range(101):
+            aggregator.update(index, progress, progress * 10, 1000, 2048.0, 100 - progress)
+
+    threads = [threading.Thread(target=report, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    aggregator.flush()
+    assert len(batches) == 1
+    assert sorted(batches[0]) == list(range(10))
+    assert batches[0][3] == {'progress': 100, 'downloaded': 1000, 'total': 1000, 'speed': 2048.0, 'eta': 0}
+
+    # nothing changed, nothing emitted
+    aggregator.update(3, 100, 1000, 1000, 2048.0, 0)
+    aggregator.flush()
+    assert len(batches) == 1
+
+
+def test_discard_drops_pending_sample():
+    aggregator = ProgressAggregator()
+    aggregator.update(1, 50, 500, 1000)
+    aggregator.update(2, 10, 100, 1000)
+    aggregator.discard(1)
+
+    assert list(aggregator.snapshot()) == [2]
+    assert list(aggregator.takeChanges()) == [2]
+    assert aggregator.takeChanges() == {}
+
+    aggregator.update(3, 20, 200, 1000)
+    aggregator.clear()
+    assert aggregator.snapshot() == {}
+    assert aggregator.takeChanges() == {}
+
+
+def test_final_progress_is_delivered_before_completion(tmp_path):
+    from app.components.download_worker import DownloadWorker
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    register_offline_extractors()
+    server = MediaServer(item_size=MB).start()
+    events = []
+    try:
+        worker = DownloadWorker(server.video_url('final'), str(tmp_path), "Best Available", "mp4", False)
+        worker.progressAggregator.progressBatch.connect(
+            lambda samples: events.extend(sample['progress'] for sample in samples.values()))
+        worker.downloadCompleted.connect(lambda *args: events.append('completed'))
+        worker.run()
+    finally:
+        server.stop()
+
+    assert events[-2:] == [100, 'completed']
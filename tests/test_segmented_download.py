@@ -0,0 +1,150 @@
+# coding: utf-8
+"""
+Test segmented multi-connection downloads
+"""
+import os
+import sys
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+import pytest
+import yt_dlp
+from PySide6.QtCore import QCoreApplication
+
+from app.components.bandwidth_limiter import bandwidthLimiter
+from app.components.download_worker import DownloadWorker
+from app.components.segmented_download import SegmentingPP, splitIntoSegments, SEGMENTS_PROTOCOL
+from offline_media import MB, MediaServer, register_offline_extractors
+
+SEGMENT = 64 * 1024
+
+
+class RangeHandler(SimpleHTTPRequestHandler):
+    """ Serves byte ranges like a video CDN """
+
+    ranges = []
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        header = self.headers.get('Range')
+        if not header:
+            return super().do_GET()
+
+        start, end = header.split('=')[1].split('-')
+        start, end = int(start), int(end) if end else len(data) - 1
+        self.ranges.append((start, end))
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(data[start:end + 1])
+
+    def log_message(self, *args):
+        pass
+
+
+class PlainHandler(SimpleHTTPRequestHandler):
+    """ Ignores byte ranges and always sends the whole file """
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def video(tmp_path):
+    data = os.urandom(SEGMENT * 5 + 123)
+    (tmp_path / 'video.mp4').write_bytes(data)
+    return tmp_path, data
+
+
+def serve(handler, directory):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def download(server, tmp_path, size):
+    hooks = []
+    opts = {'quiet': True, 'noprogress': True, 'outtmpl': str(tmp_path / 'out.%(ext)s'),
+            'concurrent_fragment_downloads': 4, 'progress_hooks': [hooks.append]}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        ydl.add_post_processor(SegmentingPP(ydl, SEGMENT), when='before_dl')
+        ydl.process_ie_result({
+            'id': 'video', 'title': 'video', 'ext': 'mp4', 'protocol': 'http', 'filesize': size,
+            'url': f'http://127.0.0.1:{server.server_address[1]}/video.mp4',
+        }, download=True)
+    return (tmp_path / 'out.mp4').read_bytes(), hooks
+
+
+def test_large_file_downloads_in_ordered_segments(video):
+    tmp_path, data = video
+    server = serve(RangeHandler, tmp_path)
+    RangeHandler.ranges = []
+    try:
+        result, hooks = download(server, tmp_path, len(data))
+    finally:
+        server.shutdown()
+
+    assert result == data
+    assert len(RangeHandler.ranges) == 6
+    assert any(h.get('fragment_count') == 6 for h in hooks)
+
+
+def test_server_ignoring_ranges_falls_back_to_one_connection(video):
+    tmp_path, data = video
+    server = serve(PlainHandler, tmp_path)
+    try:
+        result, _ = download(server, tmp_path, len(data))
+    finally:
+        server.shutdown()
+
+    assert result == data
+
+
+def test_small_and_fragmented_formats_are_left_alone():
+    small = {'protocol': 'https', 'url': 'https://example.com/a', 'filesize': SEGMENT}
+    dash = {'protocol': 'http_dash_segments', 'fragments': [{'url': 'x'}], 'filesize': 10 ** 9}
+    unknown = {'protocol': 'https', 'url': 'https://example.com/b'}
+
+    assert not any(splitIntoSegments(fmt, SEGMENT) for fmt in (small, dash, unknown))
+    assert small['protocol'] == 'https'
+
+    large = {'protocol': 'https', 'url': 'https://example.com/c', 'filesize': SEGMENT * 2 + 1}
+    assert splitIntoSegments(large, SEGMENT)
+    assert large['protocol'] == SEGMENTS_PROTOCOL
+    assert [f['byte_range'] for f in large['fragments']] == [
+        {'start': 0, 'end': SEGMENT}, {'start': SEGMENT, 'end': SEGMENT * 2}, {'start': SEGMENT * 2, 'end': SEGMENT * 2 + 1}]
+
+
+def test_speed_limit_holds_with_several_connections(tmp_path):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    register_offline_extractors()
+    limit = 2 * MB
+    server = MediaServer(item_size=4 * MB, fragment_size=MB // 2).start()
+    previous = bandwidthLimiter.limit()
+    bandwidthLimiter.setLimit(limit)
+    try:
+        worker = DownloadWorker(server.video_url('limited', 'dash'), str(tmp_path), "Best Available", "mp4", False)
+        worker.connections = 4
+        completed = []
+        worker.downloadCompleted.connect(lambda *args: completed.append(args))
+
+        worker.run()
+        # the transfer, without extracting the page beforehand
+        elapsed = time.time() - server.stats()['first_byte']
+    finally:
+        bandwidthLimiter.setLimit(previous)
+        server.stop()
+
+    assert completed and os.path.getsize(completed[0][1]) == 4 * MB
+
+    # the burst allowance is the only transfer not paid for in time
+    rate = (4 * MB - limit * bandwidthLimiter.BURST) / elapsed
+    assert 0.85 * limit <= rate <= 1.1 * limit
@@ -0,0 +1,48 @@
+# coding: utf-8
+"""
+Test the startup import budget and timing report
+"""
+import logging
+import os
+import subprocess
+import sys
+import time
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from app.common.startup_timer import StartupTimer
+
+PACKAGE = os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader')
+
+
+def test_window_modules_dont_import_the_download_engine():
+    code = ("import sys, app.view.main_window; "
+            "print(sorted(m for m in ('yt_dlp', 'app.components.download_worker') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=PACKAGE, capture_output=True, text=True, timeout=120,
+                            env=dict(os.environ, QT_QPA_PLATFORM='offscreen'))
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == '[]'
+
+
+def test_report_lists_phases_in_order(caplog):
+    timer = StartupTimer()
+    timer.mark("import Qt")
+    time.sleep(0.01)
+    timer.mark("create window")
+
+    phases = timer.phases()
+    assert [phase for phase, _ in phases] == ["import Qt", "create window"]
+    assert phases[1][1] >= 0.01
+    assert abs(timer.total() - sum(seconds for _, seconds in phases)) < 1e-9
+
+    logger = logging.getLogger('YouTubeDownloader')
+    logger.propagate, propagate = True, logger.propagate
+    try:
+        with caplog.at_level(logging.INFO, logger='YouTubeDownloader.Startup'):
+            timer.report()
+    finally:
+        logger.propagate = propagate
+
+    lines = caplog.records[-1].getMessage().splitlines()
+    assert lines[0].startswith("Startup took")
+    assert [line.split()[0] for line in lines[1:]] == ["import", "create"]
@@ -0,0 +1,49 @@
+# coding: utf-8
+"""
+Test reuse of YoutubeDL instances across playlist items
+"""
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'youtube_downloader'))
+
+from app.components.ydl_pool import YoutubeDLPool
+
+
+def test_instance_is_reused_with_new_template_and_hooks():
+    pool = YoutubeDLPool({'quiet': True})
+    first_calls, second_calls = [], []
+
+    with pool.use('/tmp/1 - %(title)s.%(ext)s', [first_calls.append]) as first:
+        first._progress_hooks[0]({'status': 'downloading'})
+        first._download_retcode = 1
+
+    with pool.use('/tmp/2 - %(title)s.%(ext)s', [second_calls.append]) as second:
+        assert second is first
+        assert second.params['outtmpl']['default'] == '/tmp/2 - %(title)s.%(ext)s'
+        assert second._download_retcode == 0
+        second._progress_hooks[0]({'status': 'finished'})
+
+    assert first_calls == [{'status': 'downloading'}]
+    assert second_calls == [{'status': 'finished'}]
+    pool.close()
+
+
+def test_concurrent_users_get_separate_instances():
+    pool = YoutubeDLPool({'quiet': True})
+    barrier = threading.Barrier(2)
+    instances = []
+
+    def download():
+        with pool.use('%(title)s.%(ext)s') as ydl:
+            instances.append(ydl)
+            barrier.wait(5)
+
+    threads = [threading.Thread(target=download) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert instances[0] is not instances[1]
+    pool.close()
@@ -24,19 +24,35 @@ a = Analysis(
         'scipy',
         'PIL',
         'app',
+        'app.cli',
         'app.common',
         'app.common.config',
         'app.common.logger',
         'app.common.utils',
+        'app.common.history_store',
+        'app.common.metadata_cache',
+        'app.common.job_journal',
+        'app.common.startup_timer',
         'app.components',
+        'app.components.download_scheduler',
+        'app.components.cancellation',
+        'app.components.bandwidth_limiter',
+        'app.components.concurrency_controller',
+        'app.components.segmented_download',
+        'app.components.progress_aggregator',
+        'app.components.ydl_pool',
+        'app.components.postprocessing',
+        'app.components.preload',
         'app.components.download_worker',
         'app.components.playlist_worker',
         'app.components.concurrent_playlist_worker',
         'app.view',
         'app.view.main_window',
+        'app.view.lazy_interface',
         'app.view.single_download_interface',
         'app.view.playlist_interface',
         'app.view.history_interface',
+        'app.view.history_model',
         'app.view.settings_interface',
         'app.view.about_interface',
         'app.resource',
@@ -0,0 +1,280 @@
+# coding: utf-8
+"""
+Headless batch downloads
+
+`python main.py download URL...` runs single videos and playlists through the
+same workers, download scheduler and configuration as the GUI, without a
+display or any widget. Progress is printed to stdout as one JSON object per
+line, logs go to stderr.
+"""
+import argparse
+import json
+import signal
+import sys
+import time
+from collections import deque
+
+from PySide6.QtCore import QCoreApplication, QObject, QTimer, Signal
+
+from app.common.config import cfg
+from app.common.logger import setup_logger, get_logger
+from app.common.utils import extract_video_id_from_url, is_playlist_only_url
+from app.components.download_scheduler import downloadScheduler
+from app.components.bandwidth_limiter import bandwidthLimiter, MB
+from app.components.download_worker import DownloadWorker
+from app.components.concurrent_playlist_worker import ConcurrentPlaylistWorker
+
+logger = get_logger('Cli')
+
+QUALITIES = ["Best Available", "1080p", "720p", "480p", "360p"]
+VIDEO_FORMATS = ["webm", "mp4", "mkv"]
+AUDIO_FORMATS = ["mp3", "m4a", "opus", "ogg", "wav"]
+
+# exit code after Ctrl+C, like a shell reports SIGINT
+INTERRUPTED = 130
+
+
+def report(event, **fields):
+    """ print one progress event as a JSON line """
+    print(json.dumps({'event': event, **fields}, ensure_ascii=False), flush=True)
+
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(
+        prog='youtube_downloader download',
+        description="Download videos and playlists without the GUI, progress is printed as JSON lines."
+    )
+    parser.add_argument('urls', nargs='*', metavar='URL', help="video or playlist URLs")
+    parser.add_argument('-a', '--batch-file', metavar='FILE',
+                        help="file with one URL per line, '-' reads stdin, lines starting with # are ignored")
+    parser.add_argument('-o', '--output', default=cfg.get(cfg.downloadFolder), help="download folder")
+    parser.add_argument('-q', '--quality', choices=QUALITIES, default=cfg.get(cfg.downloadQuality))
+    parser.add_argument('-f', '--format', type=str.lower, choices=VIDEO_FORMATS + AUDIO_FORMATS,
+                        help="container or audio format, defaults to the configured format")
+    parser.add_argument('-x', '--audio-only', action='store_true', help="download audio only")
+    parser.add_argument('--playlist', action='store_true', help="treat every URL as a playlist")
+    parser.add_argument('--start', type=int, default=1, help="first playlist item to download")
+    parser.add_argument('--end', type=int, help="last playlist item to download")
+    parser.add_argument('--subtitles', action='store_true', help="download playlist subtitles")
+    parser.add_argument('--playlist-concurrency', type=int, choices=range(0, 6), metavar='0-5',
+                        default=cfg.get(cfg.concurrentPlaylistDownloads),
+                        help="concurrent downloads per playlist, 0 adapts to the connection")
+    parser.add_argument('--limit-rate', type=float, metavar='MB/s', default=cfg.get(cfg.speedLimit),
+                        help="speed limit of all downloads together, 0 is unlimited")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log debug messages to stderr")
+    args = parser.parse_args(argv)
+
+    if args.format is None:
+        args.format = 'mp3' if args.audio_only else cfg.get(cfg.downloadFormat)
+    if args.audio_only != (args.format in AUDIO_FORMATS):
+        parser.error(f"format {args.format} doesn't match {'audio' if args.audio_only else 'video'} downloads")
+    return args
+
+
+def readUrls(urls, batchFile=None):
+    """ URLs of the command line followed by those of the batch file """
+    urls = list(urls)
+    if batchFile:
+        file = sys.stdin if batchFile == '-' else open(batchFile, encoding='utf-8')
+        with file:
+            urls += [line.strip() for line in file if line.strip() and not line.lstrip().startswith('#')]
+    return urls
+
+
+def makeJobs(args, urls):
+    """ (url, is_playlist, worker options) of every URL, the options are those the GUI journals """
+    jobs = []
+    for url in urls:
+        options = {
+            'download_path': args.output,
+            'quality': args.quality,
+            'format_type': args.format,
+            'is_audio_only': args.audio_only,
+        }
+
+        if args.playlist or is_playlist_only_url(url):
+            options.update({
+                'start_index': args.start,
+                'end_index': args.end,
+                'download_subtitles': args.subtitles,
+                'concurrent_downloads': args.playlist_concurrency,
+            })
+            jobs.append((url, True, options))
+        else:
+            # Like the single download tab, drop playlist parameters from video URLs
+            clean_url, _ = extract_video_id_from_url(url)
+            jobs.append((clean_url or url, False, options))
+    return jobs
+
+
+class BatchJob(QObject):
+    """ One URL of a batch, reports the signals of its worker as events """
+
+    done = Signal(object)
+
+    # seconds between two progress events of a file whose percentage didn't change
+    PROGRESS_INTERVAL = 1.0
+
+    def __init__(self, number, url, isPlaylist, options, parent=None):
+        super().__init__(parent)
+        self.number = number
+        self.url = url
+        self.isPlaylist = isPlaylist
+        self.options = options
+        self.worker = None
+        self.succeeded = False
+        self._reported = {}  # progress key -> (progress, time) of its last event
+
+    def start(self):
+        report('started', job=self.number, url=self.url, playlist=self.isPlaylist)
+
+        if self.isPlaylist:
+            self.worker = ConcurrentPlaylistWorker(url=self.url, **self.options)
+            self.worker.playlistInfoFetched.connect(self.onPlaylistInfo)
+            self.worker.playlistCountUpdated.connect(self.onPlaylistCount)
+            self.worker.fileStarted.connect(self.onFileStarted)
+            self.worker.fileCompleted.connect(self.onFileCompleted)
+            self.worker.fileFailed.connect(self.onFileFailed)
+            self.worker.playlistCompleted.connect(self.onPlaylistCompleted)
+        else:
+            self.worker = DownloadWorker(url=self.url, **self.options)
+            self.worker.videoInfoFetched.connect(self.onVideoInfo)
+            self.worker.downloadCompleted.connect(self.onDownloadCompleted)
+            self.worker.downloadFailed.connect(self.onDownloadFailed)
+
+        self.worker.progressAggregator.progressBatch.connect(self.onProgressBatch)
+        self.worker.finished.connect(self.onWorkerFinished)
+        self.worker.start()
+
+    def cancel(self):
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+
+    def onVideoInfo(self, title, duration, thumbnail):
+        report('info', job=self.number, title=title, duration=duration)
+
+    def onPlaylistInfo(self, title, count):
+        report('info', job=self.number, title=title, count=count)
+
+    def onPlaylistCount(self, count):
+        report('count', job=self.number, count=count)
+
+    def onFileStarted(self, index, total, title):
+        report('file_started', job=self.number, index=index, total=total, title=title)
+
+    def onProgressBatch(self, samples):
+        now = time.monotonic()
+        for key, sample in samples.items():
+            index = key if self.isPlaylist else None
+            last = self._reported.get(key)
+            if last and last[0] == sample['progress'] and now - last[1] < self.PROGRESS_INTERVAL:
+                continue
+
+            self._reported[key] = (sample['progress'], now)
+            report('progress', job=self.number, index=index, **sample)
+
+    def onFileCompleted(self, index, file_path, title):
+        self._reported.pop(index, None)
+        report('completed', job=self.number, index=index, title=title, path=file_path)
+
+    def onFileFailed(self, index, error):
+        self._reported.pop(index, None)
+        report('failed', job=self.number, index=index, error=error)
+
+    def onPlaylistCompleted(self, succeeded, failed):
+        self.succeeded = failed == 0
+        report('playlist_completed', job=self.number, succeeded=succeeded, failed=failed)
+
+    def onDownloadCompleted(self, video_id, file_path, title):
+        self.succeeded = True
+        report('completed', job=self.number, index=None, title=title, path=file_path)
+
+    def onDownloadFailed(self, video_id, error):
+        report('failed', job=self.number, index=None, error=error)
+
+    def onWorkerFinished(self):
+        report('finished', job=self.number, success=self.succeeded)
+        self.done.emit(self)
+
+
+class BatchRunner(QObject):
+    """ Runs the jobs of a batch, as many at once as the download scheduler has slots
+
+    Each job still waits for scheduler slots for its files, so the parallel
+    jobs only bound the number of worker threads of a large batch.
+    """
+
+    def __init__(self, jobs, parallel, parent=None):
+        super().__init__(parent)
+        self._pending = deque(BatchJob(number, url, isPlaylist, options, self)
+                              for number, (url, isPlaylist, options) in enumerate(jobs, 1))
+        self._running = set()
+        self._parallel = max(1, parallel)
+        self._failed = 0
+        self._interrupted = False
+
+    def start(self):
+        self._startNext()
+
+    def cancel(self):
+        """ drop pending jobs and cancel the running ones """
+        self._interrupted = True
+        self._pending.clear()
+        for job in list(self._running):
+            job.cancel()
+        self._finishIfDone()
+
+    def _startNext(self):
+        while self._pending and len(self._running) < self._parallel:
+            job = self._pending.popleft()
+            job.done.connect(self._onJobDone)
+            self._running.add(job)
+            job.start()
+        self._finishIfDone()
+
+    def _onJobDone(self, job):
+        self._running.discard(job)
+        if not job.succeeded:
+            self._failed += 1
+        self._startNext()
+
+    def _finishIfDone(self):
+        if self._pending or self._running:
+            return
+
+        if self._interrupted:
+            QCoreApplication.exit(INTERRUPTED)
+        else:
+            QCoreApplication.exit(1 if self._failed else 0)
+
+
+def main(argv):
+    """ run a batch download, returns the process exit code """
+    args = parseArgs(argv)
+    app = QCoreApplication([sys.argv[0]])
+
+    # stdout carries the events, so logs go to stderr
+    setup_logger(level='DEBUG' if args.verbose else 'INFO', stream=sys.stderr)
+
+    try:
+        urls = readUrls(args.urls, args.batch_file)
+    except OSError as e:
+        logger.error(f"Can't read batch file: {e}")
+        return 2
+    if not urls:
+        logger.error("No URLs to download")
+        return 2
+
+    bandwidthLimiter.setLimit(args.limit_rate * MB)
+    runner = BatchRunner(makeJobs(args, urls), downloadScheduler.maxConcurrent())
+
+    # Python only handles Ctrl+C while it runs, so wake it up regularly
+    signal.signal(signal.SIGINT, lambda *_: runner.cancel())
+    timer = QTimer()
+    timer.timeout.connect(lambda: None)
+    timer.start(200)
+
+    QTimer.singleShot(0, runner.start)
+    exit_code = app.exec()
+    logger.info(f"Batch finished with exit code {exit_code}")
+    return exit_code
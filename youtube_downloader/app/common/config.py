@@ -1,6 +1,9 @@
 # coding:utf-8
 import os
 import json
+import time
+import atexit
+import threading
 from enum import Enum
 from PySide6.QtCore import QStandardPaths
 
@@ -17,13 +20,28 @@ class ConfigItem:
         return f"{self.group}/{self.name}"
 
 class Config:
-    """ Configuration manager """
+    """ Configuration manager
+
+    Changes are written behind: mutations only mark the config dirty and a
+    background writer saves it once per debounce window, atomically through a
+    temp file. Call `flush()` to write pending changes immediately.
+    """
+
+    # seconds to coalesce changes before writing config.json
+    SAVE_DELAY = 0.5
 
     def __init__(self):
         self._config = {}
         self._items = []
         self._file = os.path.join(self._getConfigDir(), "config.json")
 
+        # write-behind state
+        self._lock = threading.RLock()
+        self._dirtyCondition = threading.Condition(self._lock)
+        self._writeLock = threading.Lock()
+        self._dirty = False
+        self._writer = None
+
         # load config from file
         self._load()
 
@@ -33,6 +51,10 @@ class Config:
         os.makedirs(config_dir, exist_ok=True)
         return config_dir
 
+    def configDir(self):
+        """ get the directory holding config.json and other app data files """
+        return os.path.dirname(self._file)
+
     def _load(self):
         """ load config from file """
         if not os.path.exists(self._file):
@@ -45,53 +67,87 @@ class Config:
             print(f"Failed to load config: {e}")
 
     def _save(self):
-        """ save config to file """
-        try:
-            with open(self._file, 'w', encoding='utf-8') as f:
-                json.dump(self._config, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Failed to save config: {e}")
+        """ mark config as changed, the background writer saves it """
+        with self._dirtyCondition:
+            self._dirty = True
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writerLoop, name="ConfigWriter", daemon=True)
+                self._writer.start()
+            self._dirtyCondition.notify()
+
+    def _writerLoop(self):
+        """ background writer, coalesces changes into one write per debounce window """
+        while True:
+            with self._dirtyCondition:
+                while not self._dirty:
+                    self._dirtyCondition.wait()
+
+            time.sleep(self.SAVE_DELAY)
+            self.flush()
+
+    def flush(self):
+        """ write pending changes to file now """
+        with self._writeLock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps(self._config, indent=4, ensure_ascii=False)
+                self._dirty = False
+
+            # write to a temp file and swap it in, so a crash never leaves a truncated config
+            tmp_file = self._file + ".tmp"
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self._file)
+            except Exception as e:
+                print(f"Failed to save config: {e}")
 
     def addItem(self, item: ConfigItem):
         """ add config item """
         self._items.append(item)
 
-        # set default value if not exists
-        if item.group not in self._config:
-            self._config[item.group] = {}
+        with self._lock:
+            # set default value if not exists
+            if item.group not in self._config:
+                self._config[item.group] = {}
 
-        if item.name not in self._config[item.group]:
-            self._config[item.group][item.name] = item.defaultValue
-            self._save()
+            if item.name not in self._config[item.group]:
+                self._config[item.group][item.name] = item.defaultValue
+                self._save()
 
     def get(self, item: ConfigItem):
         """ get config value """
-        if item.group not in self._config:
-            return item.defaultValue
+        with self._lock:
+            if item.group not in self._config:
+                return item.defaultValue
 
-        if item.name not in self._config[item.group]:
-            return item.defaultValue
+            if item.name not in self._config[item.group]:
+                return item.defaultValue
 
-        value = self._config[item.group][item.name]
+            value = self._config[item.group][item.name]
 
-        # validate value
-        if item.validator and not item.validator.validate(value):
-            value = item.defaultValue
-            self._config[item.group][item.name] = value
-            self._save()
+            # validate value
+            if item.validator and not item.validator.validate(value):
+                value = item.defaultValue
+                self._config[item.group][item.name] = value
+                self._save()
 
-        return value
+            return value
 
     def set(self, item: ConfigItem, value):
         """ set config value """
         if item.validator and not item.validator.validate(value):
             return False
 
-        if item.group not in self._config:
-            self._config[item.group] = {}
+        with self._lock:
+            if item.group not in self._config:
+                self._config[item.group] = {}
 
-        self._config[item.group][item.name] = value
-        self._save()
+            self._config[item.group][item.name] = value
+            self._save()
         return True
 
 class Validator:
@@ -124,6 +180,24 @@ class IntValidator(Validator):
         except:
             return False
 
+class FloatValidator(Validator):
+    """ Float validator """
+
+    def __init__(self, min_value=None, max_value=None):
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def validate(self, value):
+        try:
+            value = float(value)
+            if self.min_value is not None and value < self.min_value:
+                return False
+            if self.max_value is not None and value > self.max_value:
+                return False
+            return True
+        except:
+            return False
+
 class EnumValidator(Validator):
     """ Enum validator """
 
@@ -136,6 +210,9 @@ class EnumValidator(Validator):
 # global config instance
 cfg = Config()
 
+# write pending changes on interpreter shutdown
+atexit.register(cfg.flush)
+
 # config items
 cfg.dpiScale = ConfigItem("Appearance", "DpiScale", "Auto")
 cfg.language = ConfigItem("General", "Language", "en_US")
@@ -145,11 +222,12 @@ cfg.theme = ConfigItem("Appearance", "Theme", "Auto")
 cfg.maxConcurrentDownloads = ConfigItem("Download", "MaxConcurrentDownloads", 3, IntValidator(1, 10))
 cfg.downloadFormat = ConfigItem("Download", "Format", "mp4")
 cfg.downloadQuality = ConfigItem("Download", "Quality", "720p")
-cfg.speedLimit = ConfigItem("Download", "SpeedLimit", 0, IntValidator(0, 100))  # 0 = unlimited, MB/s
-cfg.concurrentPlaylistDownloads = ConfigItem("Download", "ConcurrentPlaylistDownloads", 2, IntValidator(1, 5))
+cfg.speedLimit = ConfigItem("Download", "SpeedLimit", 0, FloatValidator(0, 100))  # 0 = unlimited, MB/s for all downloads together
+cfg.downloadConnections = ConfigItem("Download", "Connections", 4, IntValidator(1, 16))  # parallel connections per file
+cfg.concurrentPlaylistDownloads = ConfigItem("Download", "ConcurrentPlaylistDownloads", 2, IntValidator(0, 5))  # 0 = auto
 cfg.retryAttempts = ConfigItem("Download", "RetryAttempts", 3, IntValidator(1, 10))
 cfg.historyLimit = ConfigItem("History", "Limit", 100, IntValidator(10, 1000))
-cfg.downloadHistory = ConfigItem("History", "DownloadHistory", [])
+cfg.downloadHistory = ConfigItem("History", "DownloadHistory", [])  # legacy, migrated to history store
 
 # add config items
 cfg.addItem(cfg.dpiScale)
@@ -157,10 +235,11 @@ cfg.addItem(cfg.language)
 cfg.addItem(cfg.downloadFolder)
 cfg.addItem(cfg.micaEnabled)
 cfg.addItem(cfg.theme)
-cfg.maxConcurrentDownloads
+cfg.addItem(cfg.maxConcurrentDownloads)
 cfg.addItem(cfg.downloadFormat)
 cfg.addItem(cfg.downloadQuality)
 cfg.addItem(cfg.speedLimit)
+cfg.addItem(cfg.downloadConnections)
 cfg.addItem(cfg.concurrentPlaylistDownloads)
 cfg.addItem(cfg.retryAttempts)
 cfg.addItem(cfg.historyLimit)
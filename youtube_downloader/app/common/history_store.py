@@ -0,0 +1,246 @@
+# coding: utf-8
+"""
+SQLite-backed download history store
+
+Each history entry is one row, so appending an entry or changing its status
+writes a single small row instead of re-serializing the whole config file.
+Every mutation emits `historyChanged` with the inserted, updated and removed
+entry ids, so views can apply a diff instead of reloading everything.
+"""
+import json
+import os
+import sqlite3
+import threading
+from PySide6.QtCore import QObject, Signal
+
+from app.common.config import cfg
+from app.common.logger import get_logger
+
+logger = get_logger('HistoryStore')
+
+
+class HistoryStore(QObject):
+    """ Download history store with indexed timestamp, status, type and title columns
+
+    Signals:
+        historyChanged: Emitted after a mutation (inserted_ids, updated_ids, removed_ids)
+    """
+
+    historyChanged = Signal(list, list, list)  # inserted_ids, updated_ids, removed_ids
+
+    # columns that can be changed through update()
+    FIELDS = ('timestamp', 'status', 'type', 'title', 'path', 'items')
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self._path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        # WAL keeps single-row writes cheap and lets readers run during a write
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._createSchema()
+
+    def _createSchema(self):
+        """ create history table and indexes """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " timestamp TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " type TEXT NOT NULL DEFAULT 'single',"
+                " title TEXT NOT NULL DEFAULT '',"
+                " path TEXT NOT NULL DEFAULT '',"
+                " items TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_status ON history(status)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_type ON history(type)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_title ON history(title)")
+
+    @staticmethod
+    def _rowToEntry(row):
+        """ convert a database row to the history entry dict used by the views """
+        entry = {
+            'id': row['id'],
+            'timestamp': row['timestamp'],
+            'status': row['status'],
+            'type': row['type'],
+            'title': row['title'],
+            'path': row['path'],
+        }
+
+        # only playlists carry an item list
+        if row['items'] is not None:
+            try:
+                entry['items'] = json.loads(row['items'])
+            except ValueError:
+                entry['items'] = []
+
+        return entry
+
+    @staticmethod
+    def _entryToValues(entry):
+        """ convert a history entry dict to column values """
+        items = entry.get('items')
+        return (
+            entry.get('timestamp', ''),
+            entry.get('status', ''),
+            entry.get('type', 'single'),
+            entry.get('title', entry.get('details', '')) or '',
+            entry.get('path', '') or '',
+            json.dumps(items, ensure_ascii=False) if items is not None else None,
+        )
+
+    def append(self, entry):
+        """ append an entry and return its id """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO history (timestamp, status, type, title, path, items) VALUES (?, ?, ?, ?, ?, ?)",
+                self._entryToValues(entry)
+            )
+            entry_id = cursor.lastrowid
+
+        self.historyChanged.emit([entry_id], [], [])
+        return entry_id
+
+    def update(self, entry_id, **fields):
+        """ update the given fields of one entry, return True if the entry exists """
+        columns = []
+        values = []
+        for name, value in fields.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown history field: {name}")
+
+            if name == 'items':
+                value = json.dumps(value, ensure_ascii=False) if value is not None else None
+            elif value is None:
+                value = ''
+
+            columns.append(f"{name} = ?")
+            values.append(value)
+
+        if not columns:
+            return False
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE history SET {', '.join(columns)} WHERE id = ?",
+                (*values, entry_id)
+            )
+            updated = cursor.rowcount > 0
+
+        if updated:
+            self.historyChanged.emit([], [entry_id], [])
+        return updated
+
+    def replaceStatus(self, old_status, new_status):
+        """ change the status of every entry with `old_status`, return the changed ids """
+        with self._lock, self._conn:
+            ids = [row['id'] for row in self._conn.execute(
+                "SELECT id FROM history WHERE status = ?", (old_status,))]
+            if ids:
+                self._conn.execute(
+                    "UPDATE history SET status = ? WHERE status = ?", (new_status, old_status))
+
+        if ids:
+            self.historyChanged.emit([], ids, [])
+        return ids
+
+    def get(self, entry_id):
+        """ get one entry by id, or None """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM history WHERE id = ?", (entry_id,)).fetchone()
+        return self._rowToEntry(row) if row else None
+
+    def getMany(self, entry_ids):
+        """ get the entries with the given ids, ordered from oldest to newest """
+        if not entry_ids:
+            return []
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM history WHERE id IN ({', '.join('?' * len(entry_ids))}) ORDER BY id",
+                list(entry_ids)
+            ).fetchall()
+        return [self._rowToEntry(row) for row in rows]
+
+    def entries(self, limit=None):
+        """ get entries ordered from oldest to newest, optionally only the newest `limit` """
+        with self._lock:
+            if limit is None:
+                rows = self._conn.execute("SELECT * FROM history ORDER BY id").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM (SELECT * FROM history ORDER BY id DESC LIMIT ?) ORDER BY id",
+                    (int(limit),)
+                ).fetchall()
+        return [self._rowToEntry(row) for row in rows]
+
+    def count(self):
+        """ number of stored entries """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def trim(self, limit):
+        """ keep only the newest `limit` entries, return the removed ids """
+        with self._lock, self._conn:
+            ids = [row['id'] for row in self._conn.execute(
+                "SELECT id FROM history ORDER BY id DESC LIMIT -1 OFFSET ?", (int(limit),))]
+            if ids:
+                self._conn.executemany("DELETE FROM history WHERE id = ?", [(i,) for i in ids])
+
+        if ids:
+            self.historyChanged.emit([], [], ids)
+        return ids
+
+    def clear(self):
+        """ remove all entries """
+        with self._lock, self._conn:
+            ids = [row['id'] for row in self._conn.execute("SELECT id FROM history")]
+            self._conn.execute("DELETE FROM history")
+
+        if ids:
+            self.historyChanged.emit([], [], ids)
+
+    def importEntries(self, entries):
+        """ bulk insert entries in order, used to migrate the legacy config history """
+        with self._lock, self._conn:
+            first_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM history").fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO history (timestamp, status, type, title, path, items) VALUES (?, ?, ?, ?, ?, ?)",
+                [self._entryToValues(e) for e in entries if isinstance(e, dict)]
+            )
+            ids = [row['id'] for row in self._conn.execute(
+                "SELECT id FROM history WHERE id > ? ORDER BY id", (first_id,))]
+
+        if ids:
+            self.historyChanged.emit(ids, [], [])
+
+    def close(self):
+        """ close the database connection """
+        with self._lock:
+            self._conn.close()
+
+
+def _migrateConfigHistory(store):
+    """ move history kept in config.json by older versions into the store """
+    legacy = cfg.get(cfg.downloadHistory)
+    if not isinstance(legacy, list) or not legacy:
+        return
+
+    try:
+        if store.count() == 0:
+            store.importEntries(legacy)
+            logger.info(f"Migrated {len(legacy)} history entries from config to history store")
+        cfg.set(cfg.downloadHistory, [])
+    except Exception as e:
+        logger.error(f"Failed to migrate config history: {e}")
+
+
+# global history store instance
+historyStore = HistoryStore(os.path.join(cfg.configDir(), "history.db"))
+_migrateConfigHistory(historyStore)
@@ -0,0 +1,192 @@
+# coding: utf-8
+"""
+Crash-safe journal of unfinished download jobs
+
+A job is written when a download starts and removed once it completes, fails or
+is cancelled, so every job still in the journal at launch was interrupted by a
+crash or by closing the app. Each job keeps its url and worker options, and each
+item keeps its state and partial file, so the download can be started again and
+yt-dlp continues the partial files instead of downloading them from scratch.
+"""
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.common.config import cfg
+from app.common.logger import get_logger
+
+logger = get_logger('JobJournal')
+
+
+class JobJournal:
+    """ Journal of unfinished single and playlist download jobs """
+
+    # item states
+    QUEUED = 'queued'
+    DOWNLOADING = 'downloading'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, path):
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        # every write is committed at once, WAL keeps them durable across app crashes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._createSchema()
+
+    def _createSchema(self):
+        """ create job and item tables """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " kind TEXT NOT NULL,"
+                " url TEXT NOT NULL,"
+                " options TEXT NOT NULL,"
+                " history_id INTEGER,"
+                " created REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " job_id INTEGER NOT NULL,"
+                " idx INTEGER NOT NULL,"
+                " video_id TEXT,"
+                " title TEXT,"
+                " state TEXT NOT NULL,"
+                " partial_path TEXT,"
+                " file_path TEXT,"
+                " PRIMARY KEY (job_id, idx))"
+            )
+
+    def createJob(self, kind, url, options, history_id=None):
+        """ record a new job and return its id, `options` are the keyword arguments of its worker """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (kind, url, options, history_id, created) VALUES (?, ?, ?, ?, ?)",
+                (kind, url, json.dumps(options), history_id, time.time())
+            )
+        return cursor.lastrowid
+
+    def updateItem(self, job_id, index, **fields):
+        """ create or update one item of a job, e.g. `state`, `video_id`, `title`, `partial_path`, `file_path` """
+        if job_id is None:
+            return
+
+        fields.setdefault('state', self.QUEUED)
+        columns = ('video_id', 'title', 'state', 'partial_path', 'file_path')
+        unknown = set(fields) - set(columns)
+        if unknown:
+            raise ValueError(f"Unknown job item fields: {', '.join(sorted(unknown))}")
+
+        names = list(fields)
+        with self._lock, self._conn:
+            # a finished job has no items to update
+            if self._conn.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is None:
+                return
+            self._conn.execute(
+                f"INSERT INTO items (job_id, idx, {', '.join(names)}) VALUES (?, ?, {', '.join('?' * len(names))})"
+                f" ON CONFLICT (job_id, idx) DO UPDATE SET {', '.join(f'{n} = excluded.{n}' for n in names)}",
+                (job_id, index, *(fields[n] for n in names))
+            )
+
+    def partialFileHook(self, job_id, index):
+        """ yt-dlp progress hook recording the partial file of an item whenever it changes """
+        last = {'path': None}
+
+        def hook(d):
+            path = d.get('tmpfilename') or d.get('filename')
+            if d.get('status') == 'downloading' and path and path != last['path']:
+                last['path'] = path
+                self.updateItem(job_id, index, state=self.DOWNLOADING, partial_path=path)
+
+        return hook
+
+    def items(self, job_id):
+        """ items of a job ordered by index """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM items WHERE job_id = ? ORDER BY idx", (job_id,)).fetchall()
+        return [self._rowToItem(row) for row in rows]
+
+    def doneItems(self, job_id):
+        """ finished items of a job by index """
+        return {item['index']: item for item in self.items(job_id) if item['state'] == self.DONE}
+
+    def unfinishedJobs(self):
+        """ jobs still in the journal, oldest first """
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+
+        jobs = []
+        for row in rows:
+            try:
+                options = json.loads(row['options'])
+            except ValueError:
+                options = {}
+            jobs.append({
+                'id': row['id'],
+                'kind': row['kind'],
+                'url': row['url'],
+                'options': options,
+                'history_id': row['history_id'],
+                'created': row['created'],
+                'items': self.items(row['id']),
+            })
+        return jobs
+
+    def finishJob(self, job_id):
+        """ drop a completed, failed or cancelled job """
+        if job_id is None:
+            return
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM items WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def discardJob(self, job_id):
+        """ drop an interrupted job that won't be resumed, with the partial files of its items """
+        for item in self.items(job_id):
+            if item['state'] != self.DONE and item['partial_path']:
+                self._removePartialFiles(item['partial_path'])
+
+        self.finishJob(job_id)
+
+    @staticmethod
+    def _rowToItem(row):
+        return {
+            'index': row['idx'],
+            'video_id': row['video_id'],
+            'title': row['title'],
+            'state': row['state'],
+            'partial_path': row['partial_path'],
+            'file_path': row['file_path'],
+        }
+
+    @staticmethod
+    def _removePartialFiles(path):
+        """ remove a partial file with its fragments and yt-dlp resume state """
+        candidates = [path] + glob.glob(glob.escape(path) + '-Frag*')
+        if path.endswith('.part'):
+            candidates.append(path[:-len('.part')] + '.ytdl')
+
+        for candidate in candidates:
+            try:
+                if os.path.isfile(candidate):
+                    os.remove(candidate)
+            except OSError as e:
+                logger.warning(f"Failed to remove partial file {candidate}: {e}")
+
+    def close(self):
+        """ close the database connection """
+        with self._lock:
+            self._conn.close()
+
+
+# global job journal instance
+jobJournal = JobJournal(os.path.join(cfg.configDir(), "jobs.db"))
@@ -32,7 +32,7 @@ class ColoredFormatter(logging.Formatter):
         return super().format(record)
 
 
-def setup_logger(name='YouTubeDownloader', level=logging.INFO):
+def setup_logger(name='YouTubeDownloader', level=logging.INFO, stream=None):
     """
     Set up application logger with file and console handlers
     Each session creates a new log file with timestamp
@@ -40,6 +40,7 @@ def setup_logger(name='YouTubeDownloader', level=logging.INFO):
     Args:
         name: Logger name
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        stream: Console stream, stdout by default
         
     Returns:
         Configured logger instance
@@ -73,7 +74,7 @@ def setup_logger(name='YouTubeDownloader', level=logging.INFO):
     file_handler.setLevel(logging.DEBUG)  # Log everything to file
     
     # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler = logging.StreamHandler(stream or sys.stdout)
     console_handler.setLevel(level)  # Use specified level for console
     
     # Formatters
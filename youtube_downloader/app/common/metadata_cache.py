@@ -0,0 +1,273 @@
+# coding: utf-8
+"""
+On-disk cache of extracted video and playlist metadata
+
+Video info is stored unprocessed (as returned by `extract_info(process=False)`)
+so it can be handed to `process_ie_result` to download without another page
+or player request. Entries expire with their stream URLs and the least
+recently used entries are evicted once the cache grows past its size limit.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from yt_dlp.extractor import gen_extractor_classes
+from yt_dlp.utils import PlaylistEntries
+
+from app.common.config import cfg
+from app.common.logger import get_logger
+
+logger = get_logger('MetadataCache')
+
+
+@lru_cache(maxsize=1024)
+def _matchUrl(url):
+    """ get (extractor key, id) of a url without network access, or None """
+    for ie in gen_extractor_classes():
+        if ie.ie_key() == 'Generic' or not ie.suitable(url):
+            continue
+
+        temp_id = ie.get_temp_id(url)
+        return (ie.ie_key(), temp_id) if temp_id else None
+
+    return None
+
+
+class MetadataCache:
+    """ Metadata cache keyed by extractor and video or playlist id """
+
+    # video info lives until its stream urls expire, minus a safety margin
+    VIDEO_TTL = 60 * 60
+    EXPIRE_MARGIN = 10 * 60
+
+    # flat playlist listings only hold ids and titles
+    PLAYLIST_TTL = 60 * 60
+
+    # total size of cached json before least recently used entries are evicted
+    MAX_SIZE = 64 * 1024 * 1024
+
+    _EXPIRE_RE = re.compile(r'[?&/]expire[=/](\d+)')
+
+    def __init__(self, path, maxSize=MAX_SIZE):
+        self._maxSize = maxSize
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._createSchema()
+        self.purgeExpired()
+
+    def _createSchema(self):
+        """ create cache table and indexes """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                " key TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_metadata_accessed ON metadata(accessed)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_metadata_expires ON metadata(expires)")
+
+    @staticmethod
+    def videoKey(url=None, ie_key=None, video_id=None):
+        """ cache key of a video, from its extractor key and id or from its url """
+        if not (ie_key and video_id):
+            match = _matchUrl(url) if url else None
+            if match is None:
+                return None
+            ie_key, video_id = match
+
+        return f"video:{ie_key}:{video_id}"
+
+    @staticmethod
+    def playlistKey(url, playlist_items=None):
+        """ cache key of a flat playlist listing, or None if the url has no known id """
+        match = _matchUrl(url)
+        if match is None:
+            return None
+        return f"playlist:{match[0]}:{match[1]}:{playlist_items or ''}"
+
+    def get(self, key):
+        """ get a cached info dict, or None if missing or expired """
+        if key is None:
+            return None
+
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT data, expires FROM metadata WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM metadata WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE metadata SET accessed = ? WHERE key = ?", (now, key))
+
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            self.remove(key)
+            return None
+
+    def put(self, key, info, ttl):
+        """ cache an info dict for `ttl` seconds """
+        if key is None or ttl <= 0:
+            return
+
+        try:
+            data = json.dumps(info, ensure_ascii=False, default=repr)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Not caching {key}: {e}")
+            return
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadata (key, data, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now + ttl, now)
+            )
+            self._evict()
+
+    def remove(self, key):
+        """ remove one entry """
+        if key is None:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM metadata WHERE key = ?", (key,))
+
+    def clear(self):
+        """ remove all entries """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM metadata")
+
+    def purgeExpired(self):
+        """ remove expired entries """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM metadata WHERE expires <= ?", (time.time(),))
+
+    def size(self):
+        """ total size of cached json """
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM metadata").fetchone()[0]
+
+    def _evict(self):
+        """ drop least recently used entries until the cache fits its size limit, lock must be held """
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM metadata").fetchone()[0]
+        if total <= self._maxSize:
+            return
+
+        keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM metadata ORDER BY accessed"):
+            if total <= self._maxSize:
+                break
+            keys.append((key,))
+            total -= size
+
+        self._conn.executemany("DELETE FROM metadata WHERE key = ?", keys)
+        logger.debug(f"Evicted {len(keys)} metadata cache entries")
+
+    @staticmethod
+    def _cacheable(ydl, info):
+        """ json-safe copy of an info dict, without private callbacks like `__post_extractor` """
+        info = ydl.sanitize_info(info)
+        return {k: v for k, v in info.items() if not k.startswith('__')}
+
+    def _videoTTL(self, info):
+        """ seconds until the earliest stream url of `info` expires """
+        now = time.time()
+        expires = []
+        for fmt in info.get('formats') or [info]:
+            match = self._EXPIRE_RE.search(fmt.get('url') or '')
+            if match:
+                expires.append(int(match.group(1)))
+
+        if not expires:
+            return self.VIDEO_TTL
+        return min(expires) - self.EXPIRE_MARGIN - now
+
+    def extractVideo(self, ydl, url, ie_key=None, video_id=None):
+        """ get the unprocessed info of a video from the cache, or extract and cache it
+
+        Pass the result to `ydl.process_ie_result` to select formats and download.
+        """
+        key = self.videoKey(url, ie_key, video_id)
+        info = self.get(key)
+        if info is not None:
+            logger.info(f"Using cached metadata for {key}")
+            return info
+
+        info = ydl.extract_info(url, download=False, process=False)
+
+        # redirects have no streams of their own, only resolved videos are cached
+        if info and info.get('_type', 'video') == 'video':
+            if key is None:
+                key = self.videoKey(ie_key=info.get('extractor_key'), video_id=info.get('id'))
+            self.put(key, self._cacheable(ydl, info), self._videoTTL(info))
+
+        return info
+
+    def discardVideo(self, url, ie_key=None, video_id=None):
+        """ drop cached info of a video, e.g. after a download from it failed """
+        self.remove(self.videoKey(url, ie_key, video_id))
+
+    def streamPlaylist(self, ydl, url):
+        """ get a flat playlist listing whose entries are extracted page by page
+
+        Returns `(info, entries)` where `info` has no entries and `entries` lazily
+        yields the entries selected by the `playlist_items` option of `ydl`, so
+        the first entries can be used before the whole listing is known.
+        `info['playlist_count']` is set when the number of entries is known in
+        advance. The listing is cached once `entries` is exhausted. Returns `(info, None)` if
+        the url isn't a playlist. `ydl` must be created with `extract_flat`.
+        """
+        playlist_items = ydl.params.get('playlist_items')
+        key = self.playlistKey(url, playlist_items)
+        cached = self.get(key)
+        if cached is not None:
+            logger.info(f"Using cached playlist listing for {key}")
+            entries = cached.pop('entries', [])
+            cached['playlist_count'] = len(entries)
+            return cached, iter(entries)
+
+        # without processing, extractors return their entries as generators or paged lists
+        info = ydl.extract_info(url, download=False, process=False)
+        while info and info.get('_type') in ('url', 'url_transparent'):
+            info = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+
+        if not info or 'entries' not in info:
+            return info, None
+
+        playlist = PlaylistEntries(ydl, info)
+        header = {k: v for k, v in info.items() if k != 'entries'}
+
+        # the count of a range is only known once its entries are listed
+        if playlist_items:
+            header.pop('playlist_count', None)
+        else:
+            header['playlist_count'] = header.get('playlist_count') or playlist.get_full_count()
+
+        def entries():
+            collected = []
+            for _, entry in playlist.get_requested_items():
+                if entry:
+                    collected.append(entry)
+                    yield entry
+
+            self.put(key, self._cacheable(ydl, {**header, 'entries': collected}), self.PLAYLIST_TTL)
+
+        return header, entries()
+
+    def close(self):
+        """ close the database connection """
+        with self._lock:
+            self._conn.close()
+
+
+# global metadata cache instance
+metadataCache = MetadataCache(os.path.join(cfg.configDir(), "metadata_cache.db"))
@@ -0,0 +1,48 @@
+# coding: utf-8
+"""
+Startup timing report
+
+The entry point and the main window mark each import and init phase as it
+finishes, and the phases are logged as one report once the first frame is
+up, so a phase that regresses shows up in every session log.
+"""
+import logging
+import time
+
+# plain logging, importing the app logger would pull Qt in before the first mark
+logger = logging.getLogger('YouTubeDownloader').getChild('Startup')
+
+
+class StartupTimer:
+    """ Durations of the startup phases, each measured from the previous mark """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._last = self._start
+        self._phases = []  # (phase, seconds)
+
+    def mark(self, phase):
+        """ record the time since the previous mark as the duration of `phase` """
+        now = time.perf_counter()
+        self._phases.append((phase, now - self._last))
+        self._last = now
+
+    def phases(self):
+        return list(self._phases)
+
+    def total(self):
+        """ seconds from creation to the last mark """
+        return self._last - self._start
+
+    def report(self):
+        """ log the phases marked so far """
+        if not self._phases:
+            return
+
+        width = max(len(phase) for phase, _ in self._phases)
+        lines = [f"  {phase:<{width}}  {seconds * 1000:8.1f} ms" for phase, seconds in self._phases]
+        logger.info(f"Startup took {self.total() * 1000:.1f} ms\n" + "\n".join(lines))
+
+
+# global startup timer, created when the entry point starts importing
+startupTimer = StartupTimer()
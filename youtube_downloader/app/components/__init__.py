@@ -1,9 +1,24 @@
 # coding: utf-8
 """
 Components package for Ytp Downloader
+
+The workers import yt-dlp, so they are only loaded when first accessed,
+importing a single component doesn't pull in the download engine.
 """
-from .download_worker import DownloadWorker
-from .playlist_worker import PlaylistDownloadWorker
-from .concurrent_playlist_worker import ConcurrentPlaylistWorker
+import importlib
+
+_EXPORTS = {
+    'DownloadScheduler': 'download_scheduler',
+    'downloadScheduler': 'download_scheduler',
+    'DownloadWorker': 'download_worker',
+    'PlaylistDownloadWorker': 'playlist_worker',
+    'ConcurrentPlaylistWorker': 'concurrent_playlist_worker',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ['DownloadWorker', 'PlaylistDownloadWorker', 'ConcurrentPlaylistWorker']
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
@@ -0,0 +1,134 @@
+# coding: utf-8
+"""
+Process-wide download bandwidth limit
+
+Every yt-dlp transfer draws the bytes it reads from one token bucket, so the
+configured speed limit caps the bandwidth of all downloads together instead of
+each one. Waiting transfers take turns of a small quantum, which splits the
+bandwidth evenly between them and hands the share of a finished download to
+the ones still running.
+"""
+import threading
+import time
+from collections import deque
+
+from yt_dlp.downloader.common import FileDownloader
+
+from app.common.config import cfg
+from app.common.logger import get_logger
+from app.components.cancellation import currentToken
+
+logger = get_logger('BandwidthLimiter')
+
+MB = 1024 * 1024
+
+
+class BandwidthLimiter:
+    """ Token bucket shared by all downloads, a limit of 0 disables it """
+
+    # seconds of bandwidth the bucket holds, bounds the burst after an idle period
+    BURST = 0.25
+
+    # turns per second, a turn lets one download read limit / TURNS_PER_SECOND bytes
+    TURNS_PER_SECOND = 20
+
+    # seconds a waiting download sleeps at most before checking for cancellation
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, limit=0):
+        self._condition = threading.Condition()
+        self._limit = 0
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._waiting = deque()  # turns of the waiting downloads, the first one is served
+        self.setLimit(limit)
+
+    def limit(self):
+        return self._limit
+
+    def setLimit(self, limit):
+        """ change the limit in bytes per second, waiting downloads follow at once """
+        with self._condition:
+            self._refill()
+            self._limit = max(0, int(limit))
+            self._tokens = min(self._tokens, self._capacity())
+            self._condition.notify_all()
+
+        logger.info(f"Bandwidth limit set to {self._limit / MB:.2f} MB/s" if self._limit else "Bandwidth unlimited")
+
+    def consume(self, amount, isCancelled=None):
+        """ block until `amount` bytes may be transferred
+
+        Returns False if `isCancelled()` becomes true while waiting.
+        """
+        if not self._limit:
+            return True
+
+        turn = object()
+        with self._condition:
+            self._waiting.append(turn)
+            try:
+                while amount > 0 and self._limit:
+                    if isCancelled is not None and isCancelled():
+                        return False
+
+                    self._refill()
+                    need = min(amount, self._quantum())
+                    if self._waiting[0] is turn and self._tokens >= need:
+                        self._tokens -= need
+                        amount -= need
+
+                        # the next download's turn, this one queues up again
+                        self._waiting.rotate(-1)
+                        self._condition.notify_all()
+                        continue
+
+                    timeout = self.POLL_INTERVAL
+                    if self._waiting[0] is turn:
+                        timeout = min(timeout, (need - self._tokens) / self._limit)
+                    self._condition.wait(timeout)
+                return True
+            finally:
+                self._waiting.remove(turn)
+                self._condition.notify_all()
+
+    def _capacity(self):
+        return max(self._limit * self.BURST, self._quantum())
+
+    def _quantum(self):
+        return max(1.0, self._limit / self.TURNS_PER_SECOND)
+
+    def _refill(self):
+        """ add the tokens earned since the last refill, lock must be held """
+        now = time.monotonic()
+        if self._limit:
+            self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self._limit)
+        self._updated = now
+
+
+# global bandwidth limiter instance
+bandwidthLimiter = BandwidthLimiter(cfg.get(cfg.speedLimit) * MB)
+
+
+_slowDown = FileDownloader.slow_down
+
+
+def _limitedSlowDown(self, start_time, now, byte_counter):
+    """ `FileDownloader.slow_down` that also draws the bytes read since its last call from the global limit """
+    # byte_counter counts from start_time, which restarts with every fragment and retry.
+    # Concurrent fragment threads share one downloader, so progress is kept per thread
+    progress = self.__dict__.setdefault('_limiterProgress', {})  # thread id -> (start_time, byte_counter)
+    thread = threading.get_ident()
+    last_start, last_counter = progress.get(thread, (None, 0))
+    read = byte_counter - last_counter if last_start == start_time else byte_counter
+    progress[thread] = (start_time, byte_counter)
+
+    if read > 0:
+        token = currentToken()
+        bandwidthLimiter.consume(read, token.isCancelled if token is not None else None)
+
+    _slowDown(self, start_time, now, byte_counter)
+
+
+# the http downloader, also used for fragments, calls slow_down after every block
+FileDownloader.slow_down = _limitedSlowDown
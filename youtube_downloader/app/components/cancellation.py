@@ -0,0 +1,171 @@
+# coding: utf-8
+"""
+Cooperative cancellation of downloads
+
+A `CancelToken` is passed to yt-dlp as a progress and postprocessor hook, so a
+cancelled download raises `DownloadCancelled` on its own thread at the next
+progress update instead of having its thread killed. Cancelling also kills the
+ffmpeg processes started for the download, and `cleanup()` removes the partial
+files it left behind.
+"""
+import glob
+import os
+import threading
+from contextlib import contextmanager
+
+import yt_dlp.downloader.external
+import yt_dlp.postprocessor.ffmpeg
+from yt_dlp.utils import DownloadCancelled, Popen
+
+from app.common.logger import get_logger
+
+logger = get_logger('Cancellation')
+
+_local = threading.local()
+
+
+class _TrackedPopen(Popen):
+    """ yt-dlp subprocess that registers with the cancel token of its thread """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._token = getattr(_local, 'token', None)
+        if self._token is not None:
+            self._token._addProcess(self)
+
+    def __exit__(self, *args):
+        try:
+            return super().__exit__(*args)
+        finally:
+            if self._token is not None:
+                self._token._removeProcess(self)
+
+
+# ffmpeg postprocessors and the ffmpeg downloader start their processes through these
+yt_dlp.postprocessor.ffmpeg.Popen = _TrackedPopen
+yt_dlp.downloader.external.Popen = _TrackedPopen
+
+
+class CancelToken:
+    """ Cancellation state of one download
+
+    Use `progressHook` as both a yt-dlp progress hook and postprocessor hook,
+    and run the download inside `with token.bind():` so its ffmpeg processes
+    can be killed on cancel.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+        self._partialFiles = set()
+
+    def isCancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        """ request cancellation and kill running ffmpeg processes """
+        self._event.set()
+        with self._lock:
+            processes = list(self._processes)
+
+        for process in processes:
+            self._kill(process)
+
+    def check(self):
+        """ raise `DownloadCancelled` if cancellation was requested """
+        if self._event.is_set():
+            raise DownloadCancelled()
+
+    def progressHook(self, d):
+        """ yt-dlp hook, remembers partial files and stops the download once cancelled """
+        if d.get('status') == 'downloading':
+            for key in ('tmpfilename', 'filename'):
+                if d.get(key):
+                    with self._lock:
+                        self._partialFiles.add(d[key])
+
+        self.check()
+
+    @contextmanager
+    def bind(self):
+        """ attach this token to the current thread while downloading """
+        previous = getattr(_local, 'token', None)
+        _local.token = self
+        try:
+            yield self
+        finally:
+            _local.token = previous
+
+    def cleanup(self):
+        """ remove partial files of a cancelled download """
+        with self._lock:
+            paths = list(self._partialFiles)
+            self._partialFiles.clear()
+
+        for path in paths:
+            candidates = [path, f"{path}.part", f"{path}.ytdl"]
+            candidates += glob.glob(glob.escape(path) + '.part-Frag*')
+            candidates += glob.glob(glob.escape(path) + '-Frag*')
+            for candidate in candidates:
+                self._remove(candidate)
+
+    def _addProcess(self, process):
+        with self._lock:
+            self._processes.add(process)
+
+        # cancelled while the process was starting
+        if self._event.is_set():
+            self._kill(process)
+
+    def _removeProcess(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    def _kill(self, process):
+        """ kill and reap an ffmpeg process, then drop its unfinished output file """
+        if process.poll() is not None:
+            return
+
+        try:
+            process.kill()
+            process.wait(timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to kill process {process.pid}: {e}")
+            return
+
+        # yt-dlp passes the output file last
+        args = process.args if isinstance(process.args, (list, tuple)) else []
+        if args:
+            output = os.fsdecode(args[-1])
+            if output.startswith('file:'):
+                output = output[len('file:'):]
+            self._remove(output)
+
+        logger.info(f"Killed process {process.pid}")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            if os.path.isfile(path):
+                os.remove(path)
+                logger.debug(f"Removed partial file: {path}")
+        except OSError as e:
+            logger.warning(f"Failed to remove partial file {path}: {e}")
+
+
+def currentToken():
+    """ cancel token bound to the current thread, None outside of a download """
+    return getattr(_local, 'token', None)
+
+
+_cancelledWorkers = set()
+
+
+def keepUntilFinished(thread):
+    """ keep a cancelled QThread referenced until it finishes, so it's never destroyed while running """
+    if not thread.isRunning():
+        return
+
+    _cancelledWorkers.add(thread)
+    thread.finished.connect(lambda: _cancelledWorkers.discard(thread))
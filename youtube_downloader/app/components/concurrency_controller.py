@@ -0,0 +1,110 @@
+# coding: utf-8
+"""
+Adaptive number of concurrent playlist downloads
+
+The best parallelism depends on the link and on whether the server throttles
+single streams, so in auto mode a playlist measures its total throughput and
+climbs to the slot count where one more download stops paying off.
+"""
+import re
+import threading
+
+from app.common.logger import get_logger
+
+logger = get_logger('ConcurrencyController')
+
+
+class ConcurrencyController:
+    """ Hill climbing on the total throughput of a playlist's downloads
+
+    Feed `sample()` the speeds of the running downloads at a fixed interval.
+    After each window of samples the controller tries one more slot and keeps
+    it if the throughput rose noticeably, otherwise it goes back and holds
+    there for a while before probing again. Throttling errors halve the slots
+    at once.
+    """
+
+    # samples averaged per decision
+    WINDOW = 5
+
+    # relative throughput gain that justifies an added slot
+    MIN_GAIN = 0.1
+
+    # windows to stay at a plateau or after throttling before probing again
+    HOLD_WINDOWS = 6
+
+    # failures that mean the server limits us
+    THROTTLING_ERROR = re.compile(r'HTTP Error (?:429|403)|Too Many Requests|rate.?limit', re.IGNORECASE)
+
+    def __init__(self, minSlots=1, maxSlots=8, initialSlots=2):
+        self._lock = threading.Lock()
+        self._minSlots = max(1, minSlots)
+        self._maxSlots = max(self._minSlots, maxSlots)
+        self._slots = min(max(initialSlots, self._minSlots), self._maxSlots)
+        self._samples = []
+        self._throttled = False
+        self._baseline = None  # throughput before the slot being probed was added
+        self._hold = 0
+
+    def slots(self):
+        return self._slots
+
+    @classmethod
+    def isThrottlingError(cls, message):
+        return bool(cls.THROTTLING_ERROR.search(message or ''))
+
+    def reportThrottled(self):
+        """ a download was refused for making too many requests, safe to call from any thread """
+        with self._lock:
+            self._throttled = True
+
+    def sample(self, speeds, busy=True):
+        """ record the speeds of the running downloads in bytes/s and return the slot count to use
+
+        `busy` tells whether every slot had a download, idle slots say nothing about the link.
+        """
+        with self._lock:
+            throttled, self._throttled = self._throttled, False
+
+        if throttled:
+            slots = max(self._minSlots, self._slots // 2)
+            if slots != self._slots:
+                logger.info(f"Throttled, backing off from {self._slots} to {slots} downloads")
+            self._setSlots(slots)
+            return self._slots
+
+        if not busy:
+            return self._slots
+
+        speeds = [speed for speed in speeds if speed]
+        self._samples.append((sum(speeds), sum(speeds) / len(speeds) if speeds else 0))
+        if len(self._samples) < self.WINDOW:
+            return self._slots
+
+        average = sum(total for total, _ in self._samples) / len(self._samples)
+        per_download = sum(speed for _, speed in self._samples) / len(self._samples)
+        self._samples.clear()
+
+        if self._baseline is not None and average < self._baseline * (1 + self.MIN_GAIN):
+            # the probed slot didn't pay off, the link is saturated
+            logger.info(f"Throughput plateaued at {average / 1024:.0f} KB/s "
+                        f"({per_download / 1024:.0f} KB/s per download), staying at {self._slots - 1} downloads")
+            self._setSlots(self._slots - 1)
+        elif self._hold:
+            self._hold -= 1
+        elif self._slots < self._maxSlots:
+            self._baseline = average
+            self._slots += 1
+            logger.info(f"Throughput {average / 1024:.0f} KB/s ({per_download / 1024:.0f} KB/s per download), "
+                        f"probing {self._slots} downloads")
+        else:
+            self._baseline = None
+
+        return self._slots
+
+    def _setSlots(self, slots):
+        """ settle on a slot count and hold it before probing again """
+        self._slots = max(self._minSlots, slots)
+        self._samples.clear()
+        self._baseline = None
+        self._hold = self.HOLD_WINDOWS
@@ -2,66 +2,81 @@
 """
 Concurrent playlist download worker - downloads multiple files simultaneously
 """
-from PySide6.QtCore import QThread, Signal, QThreadPool, QRunnable, QObject
+from PySide6.QtCore import QThread, Signal, QRunnable, QTimer
 import yt_dlp
 import os
 import time
-from queue import Queue
 import threading
+from collections import deque
+from functools import partial
 
-from app.common.utils import format_speed, format_eta, clean_unicode_text
+from app.common.utils import clean_unicode_text
 from app.common.logger import get_logger
 from app.common.config import cfg
+from app.common.metadata_cache import metadataCache
+from app.common.job_journal import jobJournal
+from app.components.download_scheduler import downloadScheduler, DownloadScheduler
+from app.components.cancellation import CancelToken, keepUntilFinished
+from app.components import bandwidth_limiter  # noqa: F401, throttles every yt-dlp transfer
+from app.components.progress_aggregator import ProgressAggregator
+from app.components.concurrency_controller import ConcurrencyController
+from app.components.ydl_pool import YoutubeDLPool
+from app.components.postprocessing import postProcessingPool, deferPostProcessing
 
 logger = get_logger('ConcurrentPlaylistWorker')
 
 
-class DownloadSignals(QObject):
-    """Signals for download tasks"""
-    started = Signal(int, int, str)  # index, total, title
-    progress = Signal(int, int, str, str)  # index, progress%, speed, eta
-    completed = Signal(int, str, str)  # index, file_path, title
-    failed = Signal(int, str)  # index, error
-
-
 class DownloadTask(QRunnable):
     """Individual download task for thread pool"""
     
-    def __init__(self, index, total, video_url, title, download_opts, playlist_title, 
-                 started_callback=None, progress_callback=None, completed_callback=None, failed_callback=None):
+    def __init__(self, index, total, video_url, title, download_opts, playlist_title, ydl_pool,
+                 started_callback=None, progress_callback=None, completed_callback=None, failed_callback=None,
+                 video_id=None, ie_key=None, duration=None, job_id=None, finished_callback=None,
+                 postprocessing_callback=None, postprocessing_group=None):
         super().__init__()
         self.index = index
         self.total = total
         self.video_url = video_url
         self.title = title
-        self.download_opts = download_opts.copy()
+        
+        # Known from the flat playlist entry, so no lookup is needed before downloading
+        self.video_id = video_id
+        self.ie_key = ie_key
+        self.duration = duration
+        self.download_opts = download_opts
         self.playlist_title = playlist_title
-        self.signals = DownloadSignals()
-        self._is_cancelled = False
+        
+        # Threads keep their YoutubeDL across the items of a playlist, the worker owns and closes the pool
+        self.ydl_pool = ydl_pool
+        self._token = CancelToken()
         self.started_callback = started_callback
         self.progress_callback = progress_callback
         self.completed_callback = completed_callback
         self.failed_callback = failed_callback
+        self.finished_callback = finished_callback  # Called after every run, also when cancelled
+        self.postprocessing_callback = postprocessing_callback  # Called when post-processing moves to the pool
+        self.postprocessing_group = postprocessing_group
         
         # Progress tracking to prevent jumping
         self._last_progress = 0
-        self._last_update_time = 0
-        self._update_interval = 0.5  # Update UI every 0.5 seconds
         self._last_total_bytes = 0  # Track total bytes to detect new file downloads
         
-        # Update output template for this specific file
-        self.download_opts['outtmpl'] = os.path.join(
-            self.download_opts['outtmpl_base'],
-            self.playlist_title,
-            f'{index} - %(title)s.%(ext)s'
-        )
+        # Output template for this specific file
+        self.outtmpl = self.output_template(self.download_opts['outtmpl_base'], self.playlist_title, index)
         
-        # Set progress hook for this task
-        self.download_opts['progress_hooks'] = [self.progress_hook]
+        # Progress hooks for this task, the token stops yt-dlp once cancelled
+        self.progress_hooks = [self._token.progressHook, self.progress_hook,
+                               jobJournal.partialFileHook(job_id, index)]
+        self.postprocessor_hooks = [self._token.progressHook]
         
+    @staticmethod
+    def output_template(download_path, playlist_title, index):
+        """Output template of the file at `index` of a playlist"""
+        return os.path.join(download_path, playlist_title, f'{index} - %(title)s.%(ext)s')
+    
     def progress_hook(self, d):
-        """Handle progress for this specific download"""
-        if self._is_cancelled:
+        """Report raw progress for this specific download, the worker batches it for the UI"""
+        if self._token.isCancelled():
             return
         
         status = d.get('status')
@@ -86,94 +101,113 @@ class DownloadTask(QRunnable):
             # Detect if this is a new file download (yt-dlp downloads video+audio separately)
             if total != self._last_total_bytes and self._last_total_bytes > 0:
                 logger.info(f"[Task {self.index}] New file detected, continuing from {self._last_progress}%")
-                self._last_update_time = 0
             
             self._last_total_bytes = total
             
             # Calculate current file progress (0-100)
-            progress = int((downloaded / total) * 100) if total > 0 else 0
+            progress = int((downloaded / total) * 100)
             progress = max(0, min(100, progress))
             
             # Ensure progress never goes backwards
             if progress < self._last_progress:
                 progress = self._last_progress
         
-        # Throttle updates to prevent UI jumping (update every 0.5s or on significant change)
-        current_time = time.time()
-        time_since_update = current_time - self._last_update_time
-        progress_change = abs(progress - self._last_progress)
-        
-        # Update if: enough time passed OR significant progress change (>5%) OR reached 100%
-        should_update = (
-            time_since_update >= self._update_interval or 
-            progress_change >= 5 or 
-            progress == 100
-        )
-        
-        if not should_update:
-            return
-        
-        speed_bytes = d.get('speed')
-        speed = format_speed(speed_bytes) if speed_bytes else 'Calculating...'
-        
-        eta_seconds = d.get('eta')
-        eta = format_eta(eta_seconds) if eta_seconds else 'Calculating...'
-        
-        # Update tracking variables
         self._last_progress = progress
-        self._last_update_time = current_time
         
-        # Use callback instead of signal
+        # Use callback instead of signal, no throttling needed since samples are only stored
         if self.progress_callback:
-            self.progress_callback(self.index, progress, speed, eta)
+            self.progress_callback(self.index, progress, downloaded, total, d.get('speed'), d.get('eta'))
         
     def run(self):
-        """Execute download"""
+        """Execute download, its post-processing continues on the post-processing pool"""
+        ydl = None
         try:
             # Check if cancelled before starting
-            if self._is_cancelled:
+            if self._token.isCancelled():
                 logger.info(f"Task {self.index}/{self.total} cancelled before start: {self.title}")
                 return
             
             # Log start and call callback
-            logger.info(f"Task {self.index}/{self.total} started: {self.title}")
+            logger.info(f"Task {self.index}/{self.total} started: {self.title} ({self.duration or '?'}s)")
             
             # Call the callback directly instead of using signals (QRunnable signals don't work reliably)
             if self.started_callback:
                 self.started_callback(self.index, self.total, self.title)
             
-            # Check again before actual download
-            if self._is_cancelled:
-                logger.info(f"Task {self.index}/{self.total} cancelled during start: {self.title}")
-                return
+            ydl = self.ydl_pool.acquire(self.outtmpl, self.progress_hooks, self.postprocessor_hooks)
+            with self._token.bind(), deferPostProcessing(ydl) as deferred:
+                # Reuse cached metadata when re-queuing or retrying
+                ie_result = metadataCache.extractVideo(ydl, self.video_url, self.ie_key, self.video_id)
+                self._token.check()
+                try:
+                    video_info = ydl.process_ie_result(ie_result, download=True)
+                except Exception:
+                    if not self._token.isCancelled():
+                        metadataCache.discardVideo(self.video_url, self.ie_key, self.video_id)
+                    raise
             
-            with yt_dlp.YoutubeDL(self.download_opts) as ydl:
-                video_info = ydl.extract_info(self.video_url, download=True)
-                
-                # Check if cancelled during download
-                if self._is_cancelled:
-                    logger.info(f"Task {self.index}/{self.total} cancelled during download: {self.title}")
+            if deferred:
+                # Merging and converting run on the CPU, so this slot can start the next download.
+                # The task keeps its YoutubeDL until then, the postprocessors belong to it
+                if self.postprocessing_callback:
+                    self.postprocessing_callback(self.index)
+                if postProcessingPool.submit(partial(self.post_process, ydl, deferred),
+                                             group=self.postprocessing_group,
+                                             isCancelled=self._token.isCancelled):
+                    ydl = None
                     return
-                
-                # Get the actual output file path (handles audio conversion)
-                file_path = self.get_actual_output_path(ydl, video_info)
-                
-            logger.info(f"Task {self.index}/{self.total} completed: {self.title}")
+                self._token.check()
             
-            # Use callback for completion (only if not cancelled)
-            if self.completed_callback and not self._is_cancelled:
-                self.completed_callback(self.index, file_path, self.title)
+            self.complete(ydl, video_info)
             
         except Exception as e:
-            logger.error(f"Task {self.index}/{self.total} failed: {str(e)}")
-            
-            # Use callback for failure
-            if self.failed_callback:
-                self.failed_callback(self.index, str(e))
+            self.fail(e)
+        finally:
+            if ydl is not None:
+                self.ydl_pool.release(ydl)
+            if self.finished_callback:
+                self.finished_callback(self.index)
+    
+    def post_process(self, ydl, deferred):
+        """Run the post-processing run() deferred, on the post-processing pool"""
+        try:
+            with self._token.bind():
+                self._token.check()
+                for args in deferred:
+                    video_info = ydl.post_process(*args)
+            self.complete(ydl, video_info)
+        except Exception as e:
+            self.fail(e)
+        finally:
+            self.ydl_pool.release(ydl)
+    
+    def complete(self, ydl, video_info):
+        """Report the finished file"""
+        # Get the actual output file path (handles audio conversion)
+        file_path = self.get_actual_output_path(ydl, video_info)
+        logger.info(f"Task {self.index}/{self.total} completed: {self.title}")
+        
+        # Use callback for completion
+        if self.completed_callback:
+            self.completed_callback(self.index, file_path, self.title)
+    
+    def fail(self, e):
+        """Report a failed or cancelled download"""
+        # Killed ffmpeg processes surface as postprocessing errors, so check the token too
+        if self._token.isCancelled():
+            self._token.cleanup()
+            logger.info(f"Task {self.index}/{self.total} cancelled: {self.title}")
+            return
+        
+        logger.error(f"Task {self.index}/{self.total} failed: {str(e)}")
+        
+        # Use callback for failure
+        if self.failed_callback:
+            self.failed_callback(self.index, str(e))
             
     def cancel(self):
-        """Cancel this download"""
-        self._is_cancelled = True
+        """Cancel this download, it stops at its next progress update"""
+        self._token.cancel()
     
     def get_actual_output_path(self, ydl, info_dict):
         """
@@ -223,15 +257,31 @@ class ConcurrentPlaylistWorker(QThread):
     """
     
     playlistInfoFetched = Signal(str, int)
+    playlistCountUpdated = Signal(int)  # total count, grows while the playlist is listed
     fileStarted = Signal(int, int, str)
-    fileProgress = Signal(int, int, str, str)
     fileCompleted = Signal(int, str, str)
     fileFailed = Signal(int, str)
     playlistCompleted = Signal(int, int)
     
+    # milliseconds cancel() waits for the worker and its tasks to stop
+    CANCEL_TIMEOUT = 3000
+    
+    # seconds between two count updates while the playlist is listed
+    COUNT_UPDATE_INTERVAL = 0.5
+    
+    # listed items waiting for a slot, per concurrent download, before listing pauses
+    QUEUED_PER_SLOT = 2
+    
+    # concurrent_downloads value that lets the worker find the best concurrency itself
+    AUTO_CONCURRENCY = 0
+    
+    # most downloads auto mode runs at once, and milliseconds between its throughput samples
+    AUTO_MAX_DOWNLOADS = 8
+    AUTO_SAMPLE_INTERVAL = 1000
+    
     def __init__(self, url, download_path, quality, format_type, is_audio_only,
                  start_index=1, end_index=None, download_subtitles=False,
-                 concurrent_downloads=2, speed_limit=0):
+                 concurrent_downloads=2, job_id=None):
         super().__init__()
         self.url = url
         self.download_path = download_path
@@ -242,17 +292,45 @@ class ConcurrentPlaylistWorker(QThread):
         self.end_index = end_index
         self.download_subtitles = download_subtitles
         self.concurrent_downloads = concurrent_downloads
-        self.speed_limit = speed_limit  # MB/s, 0 = unlimited
+        self.job_id = job_id  # Job journal entry, lets the playlist resume after a restart
         
         self._is_cancelled = False
         self._total_count = 0
         self._success_count = 0
         self._fail_count = 0
         self._active_tasks = {}
-        self._thread_pool = QThreadPool()
-        self._thread_pool.setMaxThreadCount(concurrent_downloads)
+        self._processing_tasks = {}  # tasks that left their slot and are post-processed
+        self._entry_ids = {}  # index -> video id, recorded in the job journal
+        
+        # Listed items only become tasks as slots free up, so memory stays
+        # bounded by the concurrency instead of the playlist size
+        self._condition = threading.Condition()
+        self._queue = deque()  # (index, item) listed but not dispatched yet
+        self._skipped_indexes = set()
+        self._paused = False
+        self._download_opts = None
+        self._playlist_title = None
+        self._ydl_pool = None
+        
+        # Task progress is batched per UI tick instead of emitted per hook call
+        self.progressAggregator = ProgressAggregator()
+        self.started.connect(self.progressAggregator.start)
+        self.finished.connect(self.progressAggregator.stop)
+        
+        # In auto mode the concurrency follows the measured throughput
+        self._concurrency = None
+        if concurrent_downloads == self.AUTO_CONCURRENCY:
+            self._concurrency = ConcurrencyController(
+                maxSlots=min(self.AUTO_MAX_DOWNLOADS, downloadScheduler.maxConcurrent()))
+            self.concurrent_downloads = self._concurrency.slots()
+            
+            self._concurrencyTimer = QTimer(self)
+            self._concurrencyTimer.setInterval(self.AUTO_SAMPLE_INTERVAL)
+            self._concurrencyTimer.timeout.connect(self._adjust_concurrency)
+            self.started.connect(self._concurrencyTimer.start)
+            self.finished.connect(self._concurrencyTimer.stop)
         
-        logger.info(f"ConcurrentPlaylistWorker created: concurrent={concurrent_downloads}, speed_limit={speed_limit}MB/s")
+        logger.info(f"ConcurrentPlaylistWorker created: concurrent={concurrent_downloads or 'auto'}")
         
     def run(self):
         """Main execution"""
@@ -262,18 +340,23 @@ class ConcurrentPlaylistWorker(QThread):
         try:
             self.download_playlist()
         except Exception as e:
-            logger.error(f"Playlist download failed: {str(e)}", exc_info=True)
-            self.fileFailed.emit(0, str(e))
+            if not self._is_cancelled:
+                logger.error(f"Playlist download failed: {str(e)}", exc_info=True)
+                self.fileFailed.emit(0, str(e))
         finally:
+            downloadScheduler.removeGroup(self)
             duration = time.time() - start_time
             logger.info(f"Concurrent playlist worker finished: {self._success_count} succeeded, {self._fail_count} failed (took {duration:.2f}s)")
-            self.playlistCompleted.emit(self._success_count, self._fail_count)
+            
+            # The interface has already been reset when the playlist was cancelled
+            if not self._is_cancelled:
+                self.playlistCompleted.emit(self._success_count, self._fail_count)
             
     def download_playlist(self):
         """Download playlist with concurrent downloads"""
         logger.info(f"Starting concurrent playlist download: {self.url}")
         
-        # Step 1: Fast playlist info fetch
+        # Step 1: Flat listing options, entries are listed page by page while downloading
         info_opts = {
             'quiet': True,
             'no_warnings': True,
@@ -288,21 +371,6 @@ class ConcurrentPlaylistWorker(QThread):
             
         os.makedirs(self.download_path, exist_ok=True)
         
-        # Get playlist info
-        with yt_dlp.YoutubeDL(info_opts) as ydl:
-            logger.info("Fetching playlist info...")
-            info_dict = ydl.extract_info(self.url, download=False)
-            
-            if not info_dict or 'entries' not in info_dict:
-                raise Exception("Invalid playlist URL")
-                
-            playlist_title = info_dict.get('title', 'Playlist')
-            entries = [e for e in info_dict['entries'] if e]
-            self._total_count = len(entries)
-            
-            logger.info(f"Playlist: '{playlist_title}' with {self._total_count} videos")
-            self.playlistInfoFetched.emit(playlist_title, self._total_count)
-            
         # Step 2: Prepare download options
         download_opts = {
             'format': self.get_format_string(),
@@ -311,13 +379,9 @@ class ConcurrentPlaylistWorker(QThread):
             'no_warnings': True,
             'noprogress': True,
             'windowsfilenames': True,
+            'continuedl': True,  # Resume partial files left by an interrupted session
         }
         
-        # Add speed limit if specified
-        if self.speed_limit > 0:
-            download_opts['ratelimit'] = self.speed_limit * 1024 * 1024  # Convert MB/s to bytes/s
-            logger.info(f"Speed limit set to {self.speed_limit} MB/s")
-            
         if self.download_subtitles:
             download_opts['writesubtitles'] = True
             download_opts['writeautomaticsub'] = True
@@ -349,76 +413,308 @@ class ConcurrentPlaylistWorker(QThread):
         if not self.is_audio_only and self.format_type.lower() == 'mkv':
             download_opts['merge_output_format'] = 'mkv'
             
-        # Step 3: Create and queue download tasks
-        for index, entry in enumerate(entries, start=1):
-            if self._is_cancelled:
-                break
+        # Step 3: List entries and queue a download task for each one
+        # Tasks run on the global download scheduler, limited to this playlist's concurrency
+        downloadScheduler.setGroupLimit(self, self.concurrent_downloads)
+        
+        skipped = 0
+        done_items = jobJournal.doneItems(self.job_id) if self.job_id else {}
+        try:
+            with yt_dlp.YoutubeDL(info_opts) as info_ydl, yt_dlp.YoutubeDL(download_opts) as ydl:
+                logger.info("Fetching playlist info...")
+                info_dict, entries = metadataCache.streamPlaylist(info_ydl, self.url)
+            
+                if entries is None:
+                    raise Exception("Invalid playlist URL")
                 
-            video_url = entry.get('url') or entry.get('webpage_url') or entry.get('id')
-            title = entry.get('title', f'Video {index}')
+                playlist_title = info_dict.get('title', 'Playlist')
+                self._playlist_title = playlist_title
+                self._download_opts = download_opts
+                self._ydl_pool = YoutubeDLPool(download_opts)
+            
+                # The count may only be known once the last page is listed, 0 until then
+                known_count = info_dict.get('playlist_count') or 0
+                self._total_count = known_count
+            
+                logger.info(f"Playlist: '{playlist_title}' with {known_count or 'unknown number of'} videos")
+                self.playlistInfoFetched.emit(playlist_title, self._total_count)
+            
+                listings = {}
+                output_ext = self.get_output_ext(download_opts)
+                reported_count = self._total_count
+                last_count_update = 0
+                index = 0
             
-            if not video_url.startswith('http'):
-                video_url = f"https://www.youtube.com/watch?v={video_url}"
+                # Each entry is dispatched as soon as its page is listed
+                for index, entry in enumerate(entries, start=1):
+                    if self._is_cancelled:
+                        break
                 
-            # Create download task with callbacks (QRunnable signals don't work reliably)
-            task = DownloadTask(
-                index, self._total_count, video_url, title, 
-                download_opts, playlist_title,
-                started_callback=self._on_task_started,
-                progress_callback=self._on_task_progress,
-                completed_callback=self._on_task_completed,
-                failed_callback=self._on_task_failed
-            )
+                    if index > self._total_count:
+                        self._total_count = index
+                        if time.time() - last_count_update >= self.COUNT_UPDATE_INTERVAL:
+                            last_count_update = time.time()
+                            reported_count = self._total_count
+                            self.playlistCountUpdated.emit(reported_count)
+                    
+                    video_url = entry.get('url') or entry.get('webpage_url') or entry.get('id')
+                    title = entry.get('title', f'Video {index}')
+                
+                    if not video_url.startswith('http'):
+                        video_url = f"https://www.youtube.com/watch?v={video_url}"
+                    self._entry_ids[index] = entry.get('id')
+                
+                    # Skip files already downloaded without touching the network
+                    file_path = self.get_journaled_file(done_items.get(index), entry)
+                    if not file_path:
+                        file_path = self.get_existing_file(ydl, listings, output_ext, playlist_title, index, entry)
+                    if file_path:
+                        skipped += 1
+                        self._on_task_completed(index, file_path, title)
+                        continue
+                    
+                    # Queue a light item, its task is created once a slot is free
+                    self._enqueue(index, {
+                        'url': video_url,
+                        'title': title,
+                        'id': entry.get('id'),
+                        'ie_key': entry.get('ie_key'),
+                        'duration': entry.get('duration'),
+                    })
             
-            self._active_tasks[index] = task
-            self._thread_pool.start(task)
+                # The listing is complete, report the final count
+                if not self._is_cancelled:
+                    self._total_count = index
+                    if reported_count != index:
+                        self.playlistCountUpdated.emit(index)
+                    logger.info(f"Listed {index} videos of '{playlist_title}'")
             
-        # Wait for all tasks to complete or timeout
-        self._thread_pool.waitForDone(-1)  # Wait indefinitely
+            if skipped:
+                logger.info(f"Skipped {skipped} already downloaded files")
+        finally:
+            # Items listed before a listing error still run to completion
+            self._wait_until_dispatched()
+            downloadScheduler.waitForGroup(self)
+            postProcessingPool.waitForGroup(self)
+            if self._ydl_pool:
+                self._ydl_pool.close()
         
         # Log cancellation if it occurred
         if self._is_cancelled:
             logger.info("Playlist download was cancelled by user")
         
+    def list_existing_files(self, folder, listings):
+        """Names in `folder`, listed once per playlist so skip checks don't stat every file"""
+        if folder not in listings:
+            try:
+                listings[folder] = {os.path.normcase(name) for name in os.listdir(folder)}
+            except OSError:
+                listings[folder] = set()
+        return listings[folder]
+    
+    def get_output_ext(self, download_opts):
+        """Extension of finished files, None if it is only known after format selection"""
+        for pp in download_opts.get('postprocessors', []):
+            if pp.get('key') == 'FFmpegExtractAudio':
+                codec = pp.get('preferredcodec', 'mp3')
+                return 'ogg' if codec == 'vorbis' else codec
+        
+        if download_opts.get('merge_output_format'):
+            return download_opts['merge_output_format']
+        
+        format_type = self.format_type.lower()
+        return format_type if format_type in ('mp4', 'webm') else None
+    
+    def get_existing_file(self, ydl, listings, output_ext, playlist_title, index, entry):
+        """Path of the already downloaded file of a playlist entry, or None"""
+        if not output_ext or not entry.get('title'):
+            return None
+        
+        outtmpl = DownloadTask.output_template(self.download_path, playlist_title, index)
+        file_path = ydl.prepare_filename(
+            {'id': entry.get('id'), 'title': entry['title'], 'ext': output_ext}, outtmpl=outtmpl
+        )
+        
+        # yt-dlp sanitizes the folder name too, so list the folder it actually writes to
+        names = self.list_existing_files(os.path.dirname(file_path), listings)
+        if os.path.normcase(os.path.basename(file_path)) in names:
+            return file_path
+        return None
+    
+    def get_journaled_file(self, item, entry):
+        """Path of a file the job journal recorded as done for this entry, or None"""
+        if not item or item['video_id'] != entry.get('id'):
+            return None
+        
+        file_path = item['file_path']
+        return file_path if file_path and os.path.exists(file_path) else None
+    
     def _on_task_started(self, index, total, title):
         """Handle task started"""
         # Don't emit if cancelled
         if self._is_cancelled:
             return
-        self.fileStarted.emit(index, total, title)
+        jobJournal.updateItem(self.job_id, index, state=jobJournal.DOWNLOADING,
+                              video_id=self._entry_ids.get(index), title=title)
+        
+        # The task was created before the listing finished, report the count known now
+        self.fileStarted.emit(index, max(total, self._total_count), title)
     
-    def _on_task_progress(self, index, progress, speed, eta):
+    def _on_task_progress(self, index, progress, downloaded, total, speed, eta):
         """Handle task progress"""
-        # Don't emit if cancelled
+        # Don't report if cancelled
         if self._is_cancelled:
             return
-        self.fileProgress.emit(index, progress, speed, eta)
+        self.progressAggregator.update(index, progress, downloaded, total, speed, eta)
     
     def _on_task_completed(self, index, file_path, title):
         """Handle task completion"""
+        with self._condition:
+            self._processing_tasks.pop(index, None)
+        
         # Don't emit if cancelled
         if self._is_cancelled:
-            if index in self._active_tasks:
-                del self._active_tasks[index]
             return
             
+        # Drop the pending sample so it can't arrive after the completion
+        self.progressAggregator.discard(index)
         self._success_count += 1
+        jobJournal.updateItem(self.job_id, index, state=jobJournal.DONE, video_id=self._entry_ids.get(index),
+                              title=title, file_path=file_path)
         self.fileCompleted.emit(index, file_path, title)
-        if index in self._active_tasks:
-            del self._active_tasks[index]
             
     def _on_task_failed(self, index, error):
         """Handle task failure"""
+        with self._condition:
+            self._processing_tasks.pop(index, None)
+        
         # Don't emit if cancelled
         if self._is_cancelled:
-            if index in self._active_tasks:
-                del self._active_tasks[index]
             return
             
+        self.progressAggregator.discard(index)
         self._fail_count += 1
+        if self._concurrency and ConcurrencyController.isThrottlingError(error):
+            self._concurrency.reportThrottled()
+        jobJournal.updateItem(self.job_id, index, state=jobJournal.FAILED)
         self.fileFailed.emit(index, error)
-        if index in self._active_tasks:
-            del self._active_tasks[index]
+    
+    def _on_task_postprocessing(self, index):
+        """Handle a task handing its post-processing to the pool, it stays cancellable until done"""
+        with self._condition:
+            task = self._active_tasks.get(index)
+            if task:
+                self._processing_tasks[index] = task
+        
+        # Its download is done, a stale speed would count as throughput of the running downloads
+        self.progressAggregator.discard(index)
+    
+    def _on_task_finished(self, index):
+        """Handle a task leaving its slot, the next queued item takes it"""
+        with self._condition:
+            self._active_tasks.pop(index, None)
+            self._dispatch()
+            self._condition.notify_all()
+    
+    def _enqueue(self, index, item):
+        """Queue a listed item, blocks the listing while enough items are waiting"""
+        with self._condition:
+            self._queue.append((index, item))
+            self._dispatch()
+            while len(self._queue) >= self.concurrent_downloads * self.QUEUED_PER_SLOT and not self._is_cancelled:
+                self._condition.wait(0.5)
+    
+    def _wait_until_dispatched(self):
+        """Wait until every queued item was handed to the scheduler"""
+        with self._condition:
+            while self._queue and not self._is_cancelled:
+                self._condition.wait(0.5)
+    
+    def _dispatch(self):
+        """Create tasks for queued items while slots are free, condition must be held"""
+        while (self._queue and not self._paused and not self._is_cancelled
+               and len(self._active_tasks) < self.concurrent_downloads):
+            index, item = self._queue.popleft()
+            if index in self._skipped_indexes:
+                self._skipped_indexes.discard(index)
+                logger.info(f"Skipped queued item {index}: {item['title']}")
+                continue
+            
+            # Create download task with callbacks (QRunnable signals don't work reliably)
+            task = DownloadTask(
+                index, self._total_count, item['url'], item['title'],
+                self._download_opts, self._playlist_title, self._ydl_pool,
+                started_callback=self._on_task_started,
+                progress_callback=self._on_task_progress,
+                completed_callback=self._on_task_completed,
+                failed_callback=self._on_task_failed,
+                finished_callback=self._on_task_finished,
+                video_id=item['id'],
+                ie_key=item['ie_key'],
+                duration=item['duration'],
+                job_id=self.job_id,
+                postprocessing_callback=self._on_task_postprocessing,
+                postprocessing_group=self
+            )
+            
+            self._active_tasks[index] = task
+            downloadScheduler.start(task, DownloadScheduler.PRIORITY_PLAYLIST, group=self)
+        
+        self._condition.notify_all()
+    
+    def _adjust_concurrency(self):
+        """Feed the speeds of the running downloads to the auto mode controller and apply its choice"""
+        if self._is_cancelled or self._paused:
+            return
+        
+        speeds = [sample['speed'] for sample in self.progressAggregator.snapshot().values()]
+        with self._condition:
+            busy = len(self._active_tasks) >= self.concurrent_downloads
+        
+        slots = self._concurrency.sample(speeds, busy)
+        if slots != self.concurrent_downloads:
+            self.set_concurrency(slots)
+    
+    def set_concurrency(self, concurrent_downloads):
+        """Change how many items download at once, running downloads are never interrupted"""
+        with self._condition:
+            self.concurrent_downloads = max(1, concurrent_downloads)
+            downloadScheduler.setGroupLimit(self, self.concurrent_downloads)
+            self._dispatch()
+            self._condition.notify_all()
+        logger.info(f"Concurrent downloads set to {self.concurrent_downloads}")
+    
+    def pause(self):
+        """Stop starting queued items, running downloads continue"""
+        with self._condition:
+            self._paused = True
+        logger.info("Playlist download paused")
+    
+    def resume(self):
+        """Start queued items again after pause()"""
+        with self._condition:
+            self._paused = False
+            self._dispatch()
+        logger.info("Playlist download resumed")
+    
+    def is_paused(self):
+        return self._paused
+    
+    def skip_item(self, index):
+        """Don't download the item at `index` if it hasn't started yet, it may not be listed yet"""
+        with self._condition:
+            if index not in self._active_tasks:
+                self._skipped_indexes.add(index)
+    
+    def move_to_front(self, index):
+        """Start a queued item next, return False if it isn't waiting in the queue"""
+        with self._condition:
+            for position, (queued_index, item) in enumerate(self._queue):
+                if queued_index == index:
+                    del self._queue[position]
+                    self._queue.appendleft((queued_index, item))
+                    return True
+        return False
             
     def get_format_string(self):
         """Get format string for yt-dlp"""
@@ -473,18 +769,18 @@ class ConcurrentPlaylistWorker(QThread):
         logger.info("Cancelling concurrent playlist downloads")
         self._is_cancelled = True
         
-        # Cancel all active tasks
-        for task in self._active_tasks.values():
-            task.cancel()
-        
-        # Clear the thread pool to prevent new tasks from starting
-        self._thread_pool.clear()
+        # Drop queued items and tasks to prevent them from starting
+        with self._condition:
+            self._queue.clear()
+            tasks = list(self._active_tasks.values()) + list(self._processing_tasks.values())
+            self._condition.notify_all()
+        downloadScheduler.cancelGroup(self)
         
-        # Give tasks a moment to check cancellation flag
-        self._thread_pool.waitForDone(2000)
+        # Stop running tasks, they raise at their next progress update and kill their ffmpeg processes
+        for task in tasks:
+            task.cancel()
         
-        # Force terminate the worker thread if still running
-        if self.isRunning():
-            logger.warning("Force terminating worker thread")
-            self.terminate()
-            self.wait(2000)
+        # Cooperative cancellation finishes quickly, never block the UI for long
+        if not self.wait(self.CANCEL_TIMEOUT):
+            logger.warning("Playlist worker still finishing after cancel, it will stop on its own")
+            keepUntilFinished(self)
@@ -0,0 +1,179 @@
+# coding: utf-8
+"""
+Process-wide download scheduler
+
+Every transfer, single video or playlist item, takes a slot from this scheduler
+before it touches the network, so the number of simultaneous downloads never
+exceeds the configured maximum. Waiting transfers are started by priority, so a
+single download gets the next free slot ahead of the queued playlist items.
+"""
+import bisect
+import itertools
+import threading
+from PySide6.QtCore import QThreadPool, QRunnable
+
+from app.common.config import cfg
+from app.common.logger import get_logger
+
+logger = get_logger('DownloadScheduler')
+
+
+class _Ticket:
+    """ A transfer waiting for or holding a slot """
+
+    def __init__(self, priority, seq, group, runnable):
+        self.priority = priority
+        self.seq = seq
+        self.group = group
+        self.runnable = runnable
+        self.granted = threading.Event()
+
+    def sortKey(self):
+        return (-self.priority, self.seq)
+
+    def __lt__(self, other):
+        return self.sortKey() < other.sortKey()
+
+
+class _SlotRunnable(QRunnable):
+    """ Runs a scheduled runnable and gives its slot back afterwards """
+
+    def __init__(self, scheduler, ticket):
+        super().__init__()
+        self.scheduler = scheduler
+        self.ticket = ticket
+
+    def run(self):
+        try:
+            self.ticket.runnable.run()
+        except Exception as e:
+            logger.error(f"Scheduled task failed: {e}", exc_info=True)
+        finally:
+            self.scheduler.release(self.ticket)
+
+
+class DownloadScheduler:
+    """ Global download scheduler with a concurrency cap, priorities and per-group limits
+
+    Runnables submitted with `start()` run on the scheduler's thread pool once
+    they get a slot. Threads that download themselves (like `DownloadWorker`)
+    block in `acquire()` for a slot and hand it back with `release()`.
+    A group (e.g. one playlist) can be limited to fewer slots than the global cap.
+    """
+
+    PRIORITY_SINGLE = 10
+    PRIORITY_PLAYLIST = 0
+
+    def __init__(self, maxConcurrent):
+        self._condition = threading.Condition()
+        self._maxConcurrent = max(1, int(maxConcurrent))
+        self._pending = []  # tickets sorted by priority, then submission order
+        self._running = set()
+        self._groupLimits = {}
+        self._seq = itertools.count()
+
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(self._maxConcurrent)
+
+    def maxConcurrent(self):
+        return self._maxConcurrent
+
+    def setMaxConcurrent(self, maxConcurrent):
+        """ change the global cap, running transfers are never interrupted """
+        with self._condition:
+            self._maxConcurrent = max(1, int(maxConcurrent))
+            self._pool.setMaxThreadCount(max(self._maxConcurrent, self._pool.maxThreadCount()))
+            logger.info(f"Max concurrent downloads set to {self._maxConcurrent}")
+            self._dispatch()
+
+    def setGroupLimit(self, group, limit):
+        """ let at most `limit` transfers of `group` run at once """
+        with self._condition:
+            self._groupLimits[group] = max(1, int(limit))
+            self._dispatch()
+
+    def start(self, runnable, priority=PRIORITY_PLAYLIST, group=None):
+        """ queue a runnable, it runs on the scheduler's pool once it gets a slot """
+        with self._condition:
+            self._enqueue(_Ticket(priority, next(self._seq), group, runnable))
+
+    def acquire(self, priority=PRIORITY_SINGLE, group=None, isCancelled=None):
+        """ block until a slot is free and return its ticket
+
+        Returns None if `isCancelled()` becomes true while waiting.
+        """
+        with self._condition:
+            ticket = _Ticket(priority, next(self._seq), group, None)
+            self._enqueue(ticket)
+
+            while not ticket.granted.is_set():
+                if isCancelled is not None and isCancelled():
+                    self._pending.remove(ticket)
+                    self._condition.notify_all()
+                    return None
+                self._condition.wait(0.2)
+
+        return ticket
+
+    def release(self, ticket):
+        """ give the slot of a ticket back """
+        if ticket is None:
+            return
+
+        with self._condition:
+            if ticket in self._running:
+                self._running.remove(ticket)
+                self._dispatch()
+                self._condition.notify_all()
+
+    def cancelGroup(self, group):
+        """ drop the waiting transfers of a group, return the dropped runnables """
+        with self._condition:
+            dropped = [t for t in self._pending if t.group is group and t.runnable is not None]
+            self._pending = [t for t in self._pending if t not in dropped]
+            self._condition.notify_all()
+        return [t.runnable for t in dropped]
+
+    def waitForGroup(self, group, timeout=None):
+        """ wait until no transfer of a group is waiting or running, return False on timeout """
+        with self._condition:
+            done = self._condition.wait_for(
+                lambda: not any(t.group is group for t in itertools.chain(self._pending, self._running)),
+                timeout
+            )
+        return done
+
+    def removeGroup(self, group):
+        """ forget the limit of a finished group """
+        with self._condition:
+            self._groupLimits.pop(group, None)
+
+    def _enqueue(self, ticket):
+        """ add a ticket to the queue, lock must be held """
+        bisect.insort(self._pending, ticket)
+        self._dispatch()
+
+    def _groupRunning(self, group):
+        return sum(1 for t in self._running if t.group is group)
+
+    def _dispatch(self):
+        """ hand free slots to waiting tickets in priority order, lock must be held """
+        index = 0
+        while len(self._running) < self._maxConcurrent and index < len(self._pending):
+            ticket = self._pending[index]
+            limit = self._groupLimits.get(ticket.group)
+            if ticket.group is not None and limit is not None and self._groupRunning(ticket.group) >= limit:
+                index += 1
+                continue
+
+            del self._pending[index]
+            self._running.add(ticket)
+            ticket.granted.set()
+            if ticket.runnable is not None:
+                self._pool.start(_SlotRunnable(self, ticket))
+
+        self._condition.notify_all()
+
+
+# global download scheduler instance
+downloadScheduler = DownloadScheduler(cfg.get(cfg.maxConcurrentDownloads))
@@ -7,8 +7,16 @@ import yt_dlp
 import os
 import time
 
-from app.common.utils import clean_unicode_text, format_speed, format_eta
+from app.common.config import cfg
+from app.common.utils import format_speed, format_eta
 from app.common.logger import get_logger
+from app.common.metadata_cache import metadataCache
+from app.common.job_journal import jobJournal
+from app.components.download_scheduler import downloadScheduler, DownloadScheduler
+from app.components.cancellation import CancelToken, keepUntilFinished
+from app.components import bandwidth_limiter  # noqa: F401, throttles every yt-dlp transfer
+from app.components.progress_aggregator import ProgressAggregator
+from app.components.segmented_download import SegmentingPP
 
 logger = get_logger('DownloadWorker')
 
@@ -28,23 +36,40 @@ class DownloadWorker(QThread):
     downloadCompleted = Signal(str, str, str)  # video_id, file_path, title
     downloadFailed = Signal(str, str)  # video_id, error_message
     videoInfoFetched = Signal(str, str, str)  # title, duration, thumbnail_url
+    
+    # milliseconds cancel() waits for the worker to stop
+    CANCEL_TIMEOUT = 3000
 
-    def __init__(self, url, download_path, quality, format_type, is_audio_only):
+    def __init__(self, url, download_path, quality, format_type, is_audio_only, job_id=None):
         super().__init__()
         self.url: str = url
         self.download_path = download_path
         self.quality = quality
         self.format_type = format_type
         self.is_audio_only = is_audio_only
-        self._is_cancelled = False
+        self.job_id = job_id  # Job journal entry, lets the download resume after a restart
+        self._token = CancelToken()
         self._ydl = None  # Store yt-dlp instance for cancellation
+        self._slot = None  # Download scheduler slot
         self._start_time = None
         
+        # Large files and DASH/HLS fragments download over several connections at once
+        self.connections = cfg.get(cfg.downloadConnections)
+        self._segmented = False
+        
         # Progress tracking to prevent jumping
         self._last_progress = 0
         self._last_total_bytes = 0
         
-        logger.info(f"DownloadWorker created: URL={url[:50]}..., Quality={quality}, Format={format_type}, AudioOnly={is_audio_only}")
+        # yt-dlp may call the progress hook hundreds of times per second, the hook
+        # only stores raw samples and progressUpdated is emitted once per UI tick
+        self.progressAggregator = ProgressAggregator()
+        self.progressAggregator.progressBatch.connect(self.emit_progress)
+        self.started.connect(self.progressAggregator.start)
+        self.finished.connect(self.progressAggregator.stop)
+        
+        logger.info(f"DownloadWorker created: URL={url[:50]}..., Quality={quality}, Format={format_type}, "
+                    f"AudioOnly={is_audio_only}, Connections={self.connections}")
 
     def run(self):
         """Main thread execution"""
@@ -52,6 +77,15 @@ class DownloadWorker(QThread):
         logger.info("Download worker started")
         
         try:
+            # Wait for a slot of the global download scheduler, single downloads
+            # get the next free one ahead of queued playlist items
+            self._slot = downloadScheduler.acquire(
+                DownloadScheduler.PRIORITY_SINGLE, isCancelled=self._token.isCancelled
+            )
+            if self._slot is None:
+                logger.info("Download cancelled while waiting for a slot")
+                return
+            
             if "playlist" in self.url.lower() or "list=" in self.url.lower():
                 logger.info("Detected playlist URL")
                 self.download_playlist()
@@ -60,8 +94,11 @@ class DownloadWorker(QThread):
                 self.download_video()
         except Exception as e:
             logger.error(f"Download failed with exception: {str(e)}", exc_info=True)
-            self.downloadFailed.emit("unknown", str(e))
+            if not self._token.isCancelled():
+                self.downloadFailed.emit("unknown", str(e))
         finally:
+            downloadScheduler.release(self._slot)
+            self._slot = None
             duration = time.time() - self._start_time
             logger.info(f"Download worker finished (took {duration:.2f}s)")
 
@@ -73,12 +110,16 @@ class DownloadWorker(QThread):
             ydl_opts = {
                 'format': self.get_format_string(),
                 'outtmpl': os.path.join(self.download_path, '%(title)s.%(ext)s'),
-                'progress_hooks': [self.progress_hook],
+                'progress_hooks': [self._token.progressHook, self.progress_hook,
+                                   jobJournal.partialFileHook(self.job_id, 1)],
+                'postprocessor_hooks': [self._token.progressHook],
+                'continuedl': True,  # Resume partial files left by an interrupted session
                 'quiet': True,
                 'no_warnings': True,
                 'noprogress': True,  # Disable console progress output
                 'restrictfilenames': False,
                 'windowsfilenames': True,  # Use Windows-safe filenames
+                'concurrent_fragment_downloads': self.connections,
             }
             
             # For MKV, add merge format to ensure proper container
@@ -112,33 +153,68 @@ class DownloadWorker(QThread):
             # Ensure download directory exists
             os.makedirs(self.download_path, exist_ok=True)
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # First, fetch video info
-                info_dict = ydl.extract_info(self.url, download=False)
-                if info_dict:
-                    title = info_dict.get('title', 'Unknown')
-                    duration = str(info_dict.get('duration', 0))
-                    thumbnail = info_dict.get('thumbnail', '')
-                    self.videoInfoFetched.emit(title, duration, thumbnail)
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl, self._token.bind():
+                if self.connections > 1:
+                    ydl.add_post_processor(SegmentingPP(ydl), when='before_dl')
+                
+                # Extract the video page once (or reuse cached info), without format selection or download
+                ie_result = metadataCache.extractVideo(ydl, self.url)
+                self._token.check()
+                
+                # Redirects (short links etc.) only carry a target url, their
+                # metadata becomes known once the download resolves them
+                info_emitted = self.emit_video_info(ie_result)
+                
+                # Now download from the extracted info instead of extracting again
+                try:
+                    info_dict = ydl.process_ie_result(ie_result, download=True)
+                except Exception:
+                    # cached stream urls may have been rejected, extract again next time
+                    if not self._token.isCancelled():
+                        metadataCache.discardVideo(self.url)
+                    raise
+                if not info_emitted:
+                    self.emit_video_info(info_dict)
                 
-                # Now download
-                info_dict = ydl.extract_info(self.url, download=True)
                 video_id = info_dict.get('id', 'unknown')
                 title = info_dict.get('title', 'Unknown')
                 
                 # Get the actual output file path
                 file_path = self.get_actual_output_path(ydl, info_dict)
 
-                if not self._is_cancelled:
-                    logger.info(f"Video download completed: {title} -> {file_path}")
-                    self.downloadCompleted.emit(video_id, file_path, title)
-                else:
-                    logger.warning("Download was cancelled")
+                # A cancel after the download finished wins, the interface already showed it
+                self._token.check()
+                logger.info(f"Video download completed: {title} -> {file_path}")
+                # Hand out the final sample ahead of the completion, nothing may follow it
+                self.progressAggregator.flush()
+                self.progressAggregator.clear()
+                self.downloadCompleted.emit(video_id, file_path, title)
 
         except Exception as e:
+            # Killed ffmpeg processes surface as postprocessing errors, so check the token too
+            if self._token.isCancelled():
+                self.on_cancelled()
+                return
             logger.error(f"Video download failed: {str(e)}", exc_info=True)
+            self.progressAggregator.clear()
             self.downloadFailed.emit("unknown", str(e))
     
+    def emit_video_info(self, info_dict):
+        """Emit videoInfoFetched for an info dict, return False if it has no metadata yet"""
+        if not info_dict or info_dict.get('_type') in ('url', 'url_transparent'):
+            return False
+        
+        title = info_dict.get('title', 'Unknown')
+        duration = str(info_dict.get('duration', 0))
+        
+        # Unprocessed results only carry the thumbnail list
+        thumbnail = info_dict.get('thumbnail') or ''
+        if not thumbnail and info_dict.get('thumbnails'):
+            thumbnail = info_dict['thumbnails'][-1].get('url', '')
+        
+        self.videoInfoFetched.emit(title, duration, thumbnail)
+        return True
+    
     def get_actual_output_path(self, ydl, info_dict):
         """
         Get the actual output file path after post-processing
@@ -176,7 +252,8 @@ class DownloadWorker(QThread):
             ydl_opts = {
                 'format': self.get_format_string(),
                 'outtmpl': os.path.join(self.download_path, '%(playlist_title)s', '%(title)s.%(ext)s'),
-                'progress_hooks': [self.progress_hook],
+                'progress_hooks': [self._token.progressHook, self.progress_hook],
+                'postprocessor_hooks': [self._token.progressHook],
                 'quiet': True,
                 'no_warnings': True,
                 'noprogress': True,
@@ -214,19 +291,24 @@ class DownloadWorker(QThread):
             # Ensure download directory exists
             os.makedirs(self.download_path, exist_ok=True)
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl, self._token.bind():
                 info_dict = ydl.extract_info(self.url, download=True)
+                self._token.check()
 
                 # Get list of downloaded files
                 if 'entries' in info_dict:
                     for entry in info_dict['entries']:
-                        if entry and not self._is_cancelled:
+                        if entry:
                             video_id = entry.get('id', 'unknown')
                             title = entry.get('title', 'Unknown')
                             file_path = ydl.prepare_filename(entry)
+                            self._token.check()
                             self.downloadCompleted.emit(video_id, file_path, title)
 
         except Exception as e:
+            if self._token.isCancelled():
+                self.on_cancelled()
+                return
             self.downloadFailed.emit("unknown", f"Playlist download failed: {str(e)}")
 
     def get_format_string(self):
@@ -295,7 +377,7 @@ class DownloadWorker(QThread):
                - filename: output file path
                - info_dict: video metadata
         """
-        if self._is_cancelled:
+        if self._token.isCancelled():
             return
 
         status = d.get('status')
@@ -338,31 +420,8 @@ class DownloadWorker(QThread):
                 
                 self._last_progress = progress_int
             
-            # Get speed (prefer raw bytes/sec for accuracy)
-            speed_bytes = d.get('speed')
-            if speed_bytes and speed_bytes > 0:
-                speed = format_speed(speed_bytes)
-            else:
-                # Fallback: use formatted string (clean Unicode)
-                speed = clean_unicode_text(d.get('_speed_str', 'Calculating...'))
-                if not speed or speed == 'N/A':
-                    speed = 'Calculating...'
-            
-            # Get ETA (prefer raw seconds for accuracy)
-            eta_seconds = d.get('eta')
-            if eta_seconds and eta_seconds > 0:
-                eta = format_eta(eta_seconds)
-            else:
-                # Fallback: use formatted string (clean Unicode)
-                eta = clean_unicode_text(d.get('_eta_str', 'Calculating...'))
-                if not eta or eta == 'N/A' or eta == 'Unknown':
-                    eta = 'Calculating...'
-            
-            # Log progress periodically (every 10%)
-            if progress_int % 10 == 0 and progress_int > 0:
-                logger.debug(f"Download progress: {progress_int}% | Speed: {speed} | ETA: {eta}")
-            
-            self.progressUpdated.emit(progress_int, video_id, speed, eta)
+            self._segmented = bool(d.get('fragment_count')) and self.connections > 1
+            self.progressAggregator.update(video_id, progress_int, downloaded, total, d.get('speed'), d.get('eta'))
             
         elif status == 'finished':
             # Download finished, post-processing may occur
@@ -373,13 +432,32 @@ class DownloadWorker(QThread):
             # Error occurred
             logger.error(f"Download error in progress hook")
 
+    def emit_progress(self, samples):
+        """Emit progressUpdated for the latest samples, runs on the UI thread once per tick"""
+        for video_id, sample in samples.items():
+            speed = format_speed(sample['speed'])
+            eta = format_eta(sample['eta'])
+            if self._segmented:
+                speed = f"{speed} ({self.connections} connections)"
+            
+            # Log progress periodically (every 10%)
+            if sample['progress'] % 10 == 0 and sample['progress'] > 0:
+                logger.debug(f"Download progress: {sample['progress']}% | Speed: {speed} | ETA: {eta}")
+            
+            self.progressUpdated.emit(sample['progress'], video_id, speed, eta)
+    
+    def on_cancelled(self):
+        """Clean up after the download stopped on cancellation"""
+        self._token.cleanup()
+        logger.info("Download was cancelled")
+
     def cancel(self):
-        """Cancel the download"""
+        """Cancel the download, the worker stops at its next progress update"""
         logger.info("Cancel requested")
-        self._is_cancelled = True
-        # Force terminate the thread if it's stuck
-        if self.isRunning():
-            logger.warning("Terminating worker thread")
-            self.terminate()
-            self.wait(1000)  # Wait up to 1 second
-            logger.info("Worker thread terminated")
+        self._token.cancel()
+        self.progressAggregator.clear()
+        
+        # Cooperative cancellation finishes quickly, never block the UI for long
+        if not self.wait(self.CANCEL_TIMEOUT):
+            logger.warning("Worker still finishing after cancel, it will stop on its own")
+            keepUntilFinished(self)
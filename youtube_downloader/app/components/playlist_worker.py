@@ -9,6 +9,9 @@ import time
 
 from app.common.utils import format_speed, format_eta
 from app.common.logger import get_logger
+from app.common.metadata_cache import metadataCache
+from app.components.download_scheduler import downloadScheduler, DownloadScheduler
+from app.components.cancellation import CancelToken, keepUntilFinished
 
 logger = get_logger('PlaylistWorker')
 
@@ -18,7 +21,8 @@ class PlaylistDownloadWorker(QThread):
     Worker thread for downloading YouTube playlists with individual file tracking
     
     Signals:
-        playlistInfoFetched: Emitted when playlist info is retrieved (title, count)
+        playlistInfoFetched: Emitted when playlist info is retrieved (title, count, 0 if not known yet)
+        playlistCountUpdated: Emitted when more entries are listed (count)
         fileStarted: Emitted when a file starts downloading (index, total, title)
         fileProgress: Emitted during file download (index, progress%, speed, eta)
         fileCompleted: Emitted when a file finishes (index, file_path, title)
@@ -27,11 +31,15 @@ class PlaylistDownloadWorker(QThread):
     """
     
     playlistInfoFetched = Signal(str, int)  # playlist_title, video_count
+    playlistCountUpdated = Signal(int)  # video_count, grows while the playlist is listed
     fileStarted = Signal(int, int, str)  # index, total, title
     fileProgress = Signal(int, int, str, str)  # index, progress%, speed, eta
     fileCompleted = Signal(int, str, str)  # index, file_path, title
     fileFailed = Signal(int, str)  # index, error_message
     playlistCompleted = Signal(int, int)  # success_count, fail_count
+    
+    # milliseconds cancel() waits for the worker to stop
+    CANCEL_TIMEOUT = 3000
 
     def __init__(self, url, download_path, quality, format_type, is_audio_only, 
                  start_index=1, end_index=None, download_subtitles=False):
@@ -44,7 +52,7 @@ class PlaylistDownloadWorker(QThread):
         self.start_index = start_index
         self.end_index = end_index
         self.download_subtitles = download_subtitles
-        self._is_cancelled = False
+        self._token = CancelToken()
         self._current_index = 0
         self._total_count = 0
         self._success_count = 0
@@ -66,7 +74,8 @@ class PlaylistDownloadWorker(QThread):
         finally:
             duration = time.time() - self._start_time
             logger.info(f"Playlist worker finished: {self._success_count} succeeded, {self._fail_count} failed (took {duration:.2f}s)")
-            self.playlistCompleted.emit(self._success_count, self._fail_count)
+            if not self._token.isCancelled():
+                self.playlistCompleted.emit(self._success_count, self._fail_count)
 
     def download_playlist(self):
         """Download playlist with individual file tracking"""
@@ -88,26 +97,26 @@ class PlaylistDownloadWorker(QThread):
 
             os.makedirs(self.download_path, exist_ok=True)
 
-            # Get playlist info quickly
-            with yt_dlp.YoutubeDL(info_opts) as ydl:
-                logger.info("Fetching playlist info...")
-                info_dict = ydl.extract_info(self.url, download=False)
-                
-                if not info_dict or 'entries' not in info_dict:
-                    raise Exception("Invalid playlist URL or no videos found")
-                
-                playlist_title = info_dict.get('title', 'Playlist')
-                entries = [e for e in info_dict['entries'] if e]
-                self._total_count = len(entries)
-                
-                logger.info(f"Playlist info fetched: '{playlist_title}' with {self._total_count} videos")
-                self.playlistInfoFetched.emit(playlist_title, self._total_count)
+            # Get playlist info quickly, entries are listed page by page while downloading
+            info_ydl = yt_dlp.YoutubeDL(info_opts)
+            logger.info("Fetching playlist info...")
+            info_dict, entries = metadataCache.streamPlaylist(info_ydl, self.url)
+            
+            if entries is None:
+                raise Exception("Invalid playlist URL or no videos found")
+            
+            playlist_title = info_dict.get('title', 'Playlist')
+            self._total_count = info_dict.get('playlist_count') or 0
+            
+            logger.info(f"Playlist info fetched: '{playlist_title}' with {self._total_count or 'unknown number of'} videos")
+            self.playlistInfoFetched.emit(playlist_title, self._total_count)
             
             # Now download each video individually
             download_opts = {
                 'format': self.get_format_string(),
                 'outtmpl': os.path.join(self.download_path, playlist_title, '%(playlist_index)s - %(title)s.%(ext)s'),
-                'progress_hooks': [self.progress_hook],
+                'progress_hooks': [self._token.progressHook, self.progress_hook],
+                'postprocessor_hooks': [self._token.progressHook],
                 'quiet': True,
                 'no_warnings': True,
                 'noprogress': True,
@@ -129,9 +138,20 @@ class PlaylistDownloadWorker(QThread):
                 }]
 
             # Download each video one by one
-            with yt_dlp.YoutubeDL(download_opts) as ydl:
+            with info_ydl, yt_dlp.YoutubeDL(download_opts) as ydl, self._token.bind():
                 for index, entry in enumerate(entries, start=1):
-                    if self._is_cancelled:
+                    if self._token.isCancelled():
+                        break
+                    
+                    if index > self._total_count:
+                        self._total_count = index
+                        self.playlistCountUpdated.emit(self._total_count)
+                    
+                    # Wait for a slot of the global download scheduler
+                    slot = downloadScheduler.acquire(
+                        DownloadScheduler.PRIORITY_PLAYLIST, isCancelled=self._token.isCancelled
+                    )
+                    if slot is None:
                         break
                     
                     self._current_index = index
@@ -149,7 +169,14 @@ class PlaylistDownloadWorker(QThread):
                             if not video_url.startswith('http'):
                                 video_url = f"https://www.youtube.com/watch?v={video_url}"
                             
-                            video_info = ydl.extract_info(video_url, download=True)
+                            # Reuse cached metadata when re-queuing or retrying
+                            ie_result = metadataCache.extractVideo(ydl, video_url, entry.get('ie_key'), entry.get('id'))
+                            try:
+                                video_info = ydl.process_ie_result(ie_result, download=True)
+                            except Exception:
+                                if not self._token.isCancelled():
+                                    metadataCache.discardVideo(video_url, entry.get('ie_key'), entry.get('id'))
+                                raise
                             file_path = ydl.prepare_filename(video_info)
                             
                             logger.info(f"File {index}/{self._total_count} completed: {title}")
@@ -159,12 +186,22 @@ class PlaylistDownloadWorker(QThread):
                             raise Exception("No video URL found")
                             
                     except Exception as e:
+                        # Killed ffmpeg processes surface as postprocessing errors, so check the token too
+                        if self._token.isCancelled():
+                            self._token.cleanup()
+                            logger.info(f"File {index}/{self._total_count} cancelled: {title}")
+                            break
+                        
                         error_msg = str(e)
                         logger.warning(f"File {index}/{self._total_count} failed: {title} - {error_msg}")
                         self.fileFailed.emit(index, error_msg)
                         self._fail_count += 1
+                    finally:
+                        downloadScheduler.release(slot)
 
         except Exception as e:
+            if self._token.isCancelled():
+                return
             logger.error(f"Playlist download exception: {str(e)}", exc_info=True)
             self.fileFailed.emit(0, f"Playlist download failed: {str(e)}")
 
@@ -206,7 +243,7 @@ class PlaylistDownloadWorker(QThread):
                - filename: output file path
                - info_dict: video metadata including playlist_index
         """
-        if self._is_cancelled:
+        if self._token.isCancelled():
             return
 
         status = d.get('status')
@@ -276,11 +313,11 @@ class PlaylistDownloadWorker(QThread):
             logger.error(f"Download error in progress hook for file {self._current_index}")
 
     def cancel(self):
-        """Cancel the download"""
+        """Cancel the download, the worker stops at its next progress update"""
         logger.info("Playlist cancel requested")
-        self._is_cancelled = True
-        if self.isRunning():
-            logger.warning("Terminating playlist worker thread")
-            self.terminate()
-            self.wait(1000)
-            logger.info("Playlist worker terminated")
+        self._token.cancel()
+        
+        # Cooperative cancellation finishes quickly, never block the UI for long
+        if not self.wait(self.CANCEL_TIMEOUT):
+            logger.warning("Playlist worker still finishing after cancel, it will stop on its own")
+            keepUntilFinished(self)
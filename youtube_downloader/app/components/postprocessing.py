@@ -0,0 +1,113 @@
+# coding: utf-8
+"""
+Post-processing stage of playlist downloads
+
+Merging formats and converting audio keep ffmpeg busy for a while after a
+transfer ends. Done on the download thread, that time holds a download slot
+while the link sits idle. Finished downloads hand their post-processing to this
+pool instead, sized to the CPU cores, and their slot starts the next item at
+once, so network and CPU work overlap.
+"""
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from app.common.logger import get_logger
+
+logger = get_logger('PostProcessing')
+
+
+class PostProcessingPool:
+    """ Threads running post-processing jobs, with per-group waiting
+
+    ffmpeg does the work in processes of its own, so one thread per core keeps
+    all cores busy. `submit()` blocks while the queue is full, which slows the
+    downloads to the pace of the CPU instead of piling up unprocessed files.
+    """
+
+    # jobs waiting per thread before submit() blocks
+    QUEUED_PER_THREAD = 2
+
+    def __init__(self, threads=None):
+        self._threads = max(1, threads or os.cpu_count() or 1)
+        self._condition = threading.Condition()
+        self._queue = deque()  # (group, job) waiting for a thread
+        self._running = []  # groups of the running jobs
+        self._workers = 0
+
+    def threads(self):
+        return self._threads
+
+    def submit(self, job, group=None, isCancelled=None):
+        """ run `job()` on the pool
+
+        Returns False without queuing the job if `isCancelled()` becomes true
+        while waiting for room in the queue.
+        """
+        with self._condition:
+            while len(self._queue) >= self._threads * self.QUEUED_PER_THREAD:
+                if isCancelled is not None and isCancelled():
+                    return False
+                self._condition.wait(0.2)
+
+            self._queue.append((group, job))
+            if self._workers < self._threads:
+                self._workers += 1
+                threading.Thread(target=self._work, name='PostProcessing', daemon=True).start()
+            self._condition.notify_all()
+        return True
+
+    def waitForGroup(self, group, timeout=None):
+        """ wait until no job of a group is waiting or running, return False on timeout """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not any(g is group for g in self._running)
+                and not any(g is group for g, _ in self._queue),
+                timeout
+            )
+
+    def _work(self):
+        """ run queued jobs until the queue is empty """
+        while True:
+            with self._condition:
+                if not self._queue:
+                    self._workers -= 1
+                    return
+                group, job = self._queue.popleft()
+                self._running.append(group)
+                self._condition.notify_all()
+
+            try:
+                job()
+            except Exception as e:
+                logger.error(f"Post-processing job failed: {e}", exc_info=True)
+            finally:
+                with self._condition:
+                    self._running.remove(group)
+                    self._condition.notify_all()
+
+
+@contextmanager
+def deferPostProcessing(ydl):
+    """ let yt-dlp download without post-processing inside the block
+
+    Yields a list that receives the arguments of the skipped step, run it
+    later with `ydl.post_process(*args)`.
+    """
+    deferred = []
+
+    def capture(filename, info, files_to_move=None):
+        # yt-dlp strips the keys a download shares with its video from this dict afterwards
+        deferred.append((filename, dict(info), files_to_move))
+        return info
+
+    ydl.post_process = capture
+    try:
+        yield deferred
+    finally:
+        del ydl.post_process
+
+
+# global post-processing pool instance
+postProcessingPool = PostProcessingPool()
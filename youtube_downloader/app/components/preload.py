@@ -0,0 +1,42 @@
+# coding: utf-8
+"""
+Background import of the download engine
+
+yt-dlp and the workers built on it aren't needed to show the window, so the
+interfaces import them on first download. `preloadEngine()` imports them on a
+background thread once the window is up, so the first download doesn't wait
+for the import either.
+"""
+import importlib
+import threading
+import time
+
+from app.common.logger import get_logger
+from app.components.download_scheduler import downloadScheduler  # noqa: F401, its thread pool must belong to the UI thread
+
+logger = get_logger('Preload')
+
+# modules imported in the background, importing them also patches yt-dlp
+ENGINE_MODULES = (
+    'app.components.download_worker',
+    'app.components.concurrent_playlist_worker',
+)
+
+
+def _importEngine():
+    start = time.perf_counter()
+    for name in ENGINE_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            # the first download imports it again and reports the error
+            logger.warning(f"Failed to preload {name}: {e}")
+            return
+    logger.info(f"Preloaded download engine in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+def preloadEngine():
+    """ import the download engine on a daemon thread, returns the thread """
+    thread = threading.Thread(target=_importEngine, name='PreloadEngine', daemon=True)
+    thread.start()
+    return thread
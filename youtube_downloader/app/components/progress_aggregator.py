@@ -0,0 +1,84 @@
+# coding: utf-8
+"""
+Batched progress reporting for concurrent downloads
+
+Download threads write raw progress samples into a shared snapshot without
+emitting any signal. A timer on the UI thread hands the samples that changed
+since the last tick to the view in one batch, so signal traffic and repaints
+stay at one per tick no matter how many downloads run at once.
+"""
+import threading
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class ProgressAggregator(QObject):
+    """ Collects progress samples from worker threads and emits them batched on the UI thread
+
+    Create it on the UI thread. Each sample is a dict with `progress` (0-100),
+    `downloaded` and `total` bytes, `speed` in bytes/s and `eta` in seconds.
+
+    Signals:
+        progressBatch: Emitted once per tick with the changed samples (key -> sample)
+    """
+
+    progressBatch = Signal(object)  # dict, int keys would be lost in a QVariantMap
+
+    # milliseconds between two batches
+    TICK_INTERVAL = 100
+
+    def __init__(self, interval=TICK_INTERVAL, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._changed = set()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+
+    def start(self):
+        """ start emitting batches, call on the UI thread """
+        self._timer.start()
+
+    def stop(self):
+        """ stop emitting batches after handing out the pending samples, call on the UI thread """
+        self._timer.stop()
+        self.flush()
+
+    def update(self, key, progress, downloaded=0, total=0, speed=None, eta=None):
+        """ record the latest sample of a download, safe to call from any thread """
+        sample = {'progress': progress, 'downloaded': downloaded, 'total': total, 'speed': speed, 'eta': eta}
+        with self._lock:
+            if self._samples.get(key) != sample:
+                self._samples[key] = sample
+                self._changed.add(key)
+
+    def discard(self, key):
+        """ forget a finished download, so no stale sample follows its completion """
+        with self._lock:
+            self._samples.pop(key, None)
+            self._changed.discard(key)
+
+    def clear(self):
+        """ forget all downloads """
+        with self._lock:
+            self._samples.clear()
+            self._changed.clear()
+
+    def snapshot(self):
+        """ latest sample of every running download """
+        with self._lock:
+            return dict(self._samples)
+
+    def takeChanges(self):
+        """ samples changed since the last call """
+        with self._lock:
+            changes = {key: self._samples[key] for key in self._changed}
+            self._changed.clear()
+        return changes
+
+    def flush(self):
+        """ emit the changed samples, if any """
+        changes = self.takeChanges()
+        if changes:
+            self.progressBatch.emit(changes)
@@ -0,0 +1,103 @@
+# coding: utf-8
+"""
+Segmented multi-connection downloads
+
+Servers often throttle every connection, so a long video pulled over one
+connection downloads far below the link speed. yt-dlp already fetches DASH and
+HLS fragments in parallel with `concurrent_fragment_downloads`. Large plain
+http formats are split into byte ranges here, so the same fragment downloader
+fetches them over several connections and appends them in order on disk.
+"""
+import os
+
+from yt_dlp.downloader import PROTOCOL_MAP
+from yt_dlp.downloader.dash import DashSegmentsFD
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.postprocessor.common import PostProcessor
+
+from app.common.logger import get_logger
+
+logger = get_logger('SegmentedDownload')
+
+# protocol of formats split into byte range segments
+SEGMENTS_PROTOCOL = 'http_segments'
+
+# bytes per segment, the size YouTube itself requests per chunk to avoid throttling
+SEGMENT_SIZE = 10 * 1024 * 1024
+
+
+class SegmentedHttpFD(DashSegmentsFD):
+    """ Downloads the byte range segments of a plain http format in parallel
+
+    Unlike DASH fragments, a missing segment fails the download instead of
+    being skipped. A server that ignores byte ranges is detected by the file
+    size, the file is then downloaded again over one connection.
+    """
+
+    FD_NAME = 'segments'
+
+    def real_download(self, filename, info_dict):
+        if not super().real_download(filename, info_dict):
+            return False
+
+        expected = info_dict.get('filesize')
+        size = os.path.getsize(filename) if os.path.isfile(filename) else None
+        if size == expected:
+            return True
+
+        logger.warning(f"Segmented download has {size} instead of {expected} bytes, downloading over one connection")
+        os.remove(filename)
+        downloader = HttpFD(self.ydl, self.params)
+        for hook in self._progress_hooks:
+            downloader.add_progress_hook(hook)
+        return downloader.real_download(filename, dict(info_dict, protocol=info_dict['segmented_protocol']))
+
+    def _get_fragments(self, fmt, ctx, extra_query):
+        # the DASH downloader only passes fragment urls on
+        for fragment in super()._get_fragments(fmt, ctx, extra_query):
+            fragment['byte_range'] = fmt['fragments'][fragment['index']]['byte_range']
+            yield fragment
+
+    def download_and_append_fragments_multiple(self, *args, **kwargs):
+        kwargs['is_fatal'] = lambda idx: True
+        return super().download_and_append_fragments_multiple(*args, **kwargs)
+
+
+PROTOCOL_MAP[SEGMENTS_PROTOCOL] = SegmentedHttpFD
+
+
+def splitIntoSegments(fmt, segmentSize=SEGMENT_SIZE):
+    """ turn a large plain http format into byte range segments, return False if it doesn't qualify """
+    size = fmt.get('filesize')
+    if (fmt.get('protocol') not in ('http', 'https') or fmt.get('fragments') or fmt.get('is_live')
+            or not size or size < 2 * segmentSize):
+        return False
+
+    fmt['fragments'] = [
+        {'url': fmt['url'], 'byte_range': {'start': start, 'end': min(start + segmentSize, size)}}
+        for start in range(0, size, segmentSize)
+    ]
+    fmt['segmented_protocol'] = fmt['protocol']
+    fmt['protocol'] = SEGMENTS_PROTOCOL
+    return True
+
+
+class SegmentingPP(PostProcessor):
+    """ Splits the selected formats into segments right before they download
+
+    Add it with `when='before_dl'` and set `concurrent_fragment_downloads` to
+    the number of connections per file.
+    """
+
+    def __init__(self, downloader=None, segmentSize=SEGMENT_SIZE):
+        super().__init__(downloader)
+        self._segmentSize = segmentSize
+
+    def run(self, info):
+        formats = info.get('requested_formats') or [info]
+        segmented = [fmt.get('format_id') for fmt in formats if splitIntoSegments(fmt, self._segmentSize)]
+        if segmented:
+            logger.info(f"Downloading format {', '.join(map(str, segmented))} in segments")
+            if info.get('requested_formats'):
+                info['protocol'] = '+'.join(fmt['protocol'] for fmt in formats)
+        return [], info
@@ -0,0 +1,113 @@
+# coding: utf-8
+"""
+Reusable YoutubeDL instances for playlist downloads
+
+Building a YoutubeDL processes every option and sets up extractors, the network
+opener, the cookie jar and the postprocessors. For playlists of many short
+videos that rivals the transfer itself, so the instances of a playlist are
+reused from item to item and only the output template and the hooks change.
+"""
+import threading
+from contextlib import contextmanager
+
+import yt_dlp
+
+from app.common.logger import get_logger
+
+logger = get_logger('YoutubeDLPool')
+
+
+class _Context:
+    """ A YoutubeDL whose progress hooks forward to the item it currently downloads """
+
+    def __init__(self, params):
+        self.progressHooks = []
+        self.postprocessorHooks = []
+
+        # postprocessors copy their hooks when they are created, so the hooks
+        # given to yt-dlp stay fixed and dispatch to the current item's hooks
+        params = dict(params, progress_hooks=[self._onProgress], postprocessor_hooks=[self._onPostprocess])
+        self.ydl = yt_dlp.YoutubeDL(params)
+
+    def _onProgress(self, d):
+        for hook in self.progressHooks:
+            hook(d)
+
+    def _onPostprocess(self, d):
+        for hook in self.postprocessorHooks:
+            hook(d)
+
+    def prepare(self, outtmpl, progressHooks, postprocessorHooks):
+        """ point the instance at the next item """
+        self.ydl.params['outtmpl']['default'] = outtmpl
+        self.progressHooks = list(progressHooks)
+        self.postprocessorHooks = list(postprocessorHooks)
+
+    def reset(self):
+        """ forget the finished item, its errors must not fail the next one """
+        self.progressHooks = []
+        self.postprocessorHooks = []
+        self.ydl._download_retcode = 0
+        self.ydl._num_downloads = 0
+
+    def close(self):
+        self.ydl.close()
+
+
+class YoutubeDLPool:
+    """ Long-lived YoutubeDL instances, all built from the same options
+
+    `acquire()` hands out an idle instance prepared for one item, or builds one
+    if all are in use, and `release()` takes it back. An instance serves one
+    item at a time, so the items of a playlist can download concurrently and
+    an item may keep its instance past its download until it is post-processed.
+    Call `close()` once the playlist is done.
+    """
+
+    def __init__(self, params):
+        self._params = dict(params)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._busy = {}  # id of a handed out YoutubeDL -> its context
+
+    def acquire(self, outtmpl, progressHooks=(), postprocessorHooks=()):
+        """ YoutubeDL writing to `outtmpl` and reporting to the given hooks until it is released """
+        with self._lock:
+            context = self._idle.pop() if self._idle else None
+
+        if context is None:
+            context = _Context(self._params)
+
+        context.prepare(outtmpl, progressHooks, postprocessorHooks)
+        with self._lock:
+            self._busy[id(context.ydl)] = context
+        return context.ydl
+
+    def release(self, ydl):
+        """ take back an instance handed out by `acquire()` """
+        with self._lock:
+            context = self._busy.pop(id(ydl))
+        context.reset()
+        with self._lock:
+            self._idle.append(context)
+
+    @contextmanager
+    def use(self, outtmpl, progressHooks=(), postprocessorHooks=()):
+        """ YoutubeDL for the duration of the block """
+        ydl = self.acquire(outtmpl, progressHooks, postprocessorHooks)
+        try:
+            yield ydl
+        finally:
+            self.release(ydl)
+
+    def close(self):
+        """ close all idle instances """
+        with self._lock:
+            contexts = list(self._idle)
+            self._idle.clear()
+
+        for context in contexts:
+            try:
+                context.close()
+            except Exception as e:
+                logger.warning(f"Failed to close YoutubeDL instance: {e}")
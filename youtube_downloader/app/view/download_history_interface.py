@@ -19,6 +19,7 @@ import os
 from datetime import datetime, timedelta
 
 from app.common.config import cfg
+from app.common.history_store import historyStore
 from app.components.download_worker import DownloadWorker
 
 class DownloadHistoryInterface(ScrollArea):
@@ -435,16 +436,13 @@ class DownloadHistoryInterface(ScrollArea):
             'path': file_path
         }
 
-        # Add to history list
+        # Save to history store and keep history limited
+        entry['id'] = historyStore.append(entry)
+        historyStore.trim(cfg.get(cfg.historyLimit))
         self.download_history.append(entry)
-
-        # Keep history limited
         if len(self.download_history) > cfg.get(cfg.historyLimit):
             self.download_history.pop(0)
 
-        # Save to config
-        cfg.set(cfg.downloadHistory, self.download_history)
-
         # Update display
         self.updateHistoryDisplay()
 
@@ -561,15 +559,13 @@ class DownloadHistoryInterface(ScrollArea):
         """ Clear history """
         self.historyTable.setRowCount(0)
         self.download_history.clear()
-        cfg.set(cfg.downloadHistory, [])  # Clear stored history
+        historyStore.clear()  # Clear stored history
 
     def loadHistory(self):
-        """ Load history from config """
+        """ Load history from the history store """
         try:
-            stored_history = cfg.get(cfg.downloadHistory)
-            if isinstance(stored_history, list):
-                self.download_history = stored_history
-                self.updateHistoryDisplay()
+            self.download_history = historyStore.entries(cfg.get(cfg.historyLimit))
+            self.updateHistoryDisplay()
         except:
             self.download_history = []
 
@@ -600,8 +596,9 @@ class DownloadHistoryInterface(ScrollArea):
     def cancelDownload(self):
         """ Cancel current download """
         if self.current_worker and self.current_worker.isRunning():
+            # A late signal of the cancelled worker must not touch this or a newer download
+            self.disconnectWorker(self.current_worker)
             self.current_worker.cancel()
-            self.current_worker.wait()
             self.statusLabel.setText("Download cancelled")
             self.progressRing.hide()
             self.progressBar.setVisible(False)
@@ -621,6 +618,13 @@ class DownloadHistoryInterface(ScrollArea):
                 parent=self
             )
     
+    def disconnectWorker(self, worker):
+        """ Stop receiving the signals of a worker """
+        worker.progressUpdated.disconnect(self.updateProgress)
+        worker.downloadCompleted.disconnect(self.downloadCompleted)
+        worker.downloadFailed.disconnect(self.downloadFailed)
+        worker.videoInfoFetched.disconnect(self.showVideoInfo)
+
     def showVideoInfo(self, title, duration, thumbnail_url):
         """ Show video information """
         self.videoTitleLabel.setText(title)
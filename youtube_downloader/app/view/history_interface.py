@@ -2,19 +2,20 @@
 """
 Download History Interface
 """
-from PySide6.QtCore import Qt, QUrl
+from PySide6.QtCore import Qt, QUrl, QTimer
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFileDialog, 
                                QFrame, QTableWidgetItem, QHeaderView, QApplication, QDialog)
 from PySide6.QtGui import QDesktopServices, QColor
 
 from qfluentwidgets import (ScrollArea, PushButton, LineEdit, CardWidget, BodyLabel, 
                             CaptionLabel, FluentIcon as FIF, RoundMenu, Action,
-                            InfoBar, InfoBarPosition, SubtitleLabel, TableWidget,
+                            InfoBar, InfoBarPosition, SubtitleLabel, TableWidget, TableView,
                             IconInfoBadge, InfoBadge, DotInfoBadge, MessageBox)
 import os
-from datetime import datetime, timedelta
 
 from app.common.config import cfg
+from app.common.history_store import historyStore
+from app.view.history_model import HistoryTableModel, HistoryFilterModel, HistoryItemDelegate, HistoryColumn
 
 
 class PlaylistDetailsDialog(MessageBox):
@@ -120,7 +121,11 @@ class HistoryInterface(ScrollArea):
         self.vBoxLayout = QVBoxLayout(self.view)
 
         # History components
-        self.historyTable = TableWidget(self)
+        self.historyModel = HistoryTableModel(self)
+        self.historyFilterModel = HistoryFilterModel(self)
+        self.searchTimer = QTimer(self)
+        self.historyTable = TableView(self)
+        self.emptyLabel = CaptionLabel("No download history yet. Start downloading videos to see them here!")
         self.clearBtn = PushButton("Clear History", self, FIF.DELETE)
         self.exportBtn = PushButton("Export", self, FIF.SAVE)
         self.searchInput = LineEdit()
@@ -132,13 +137,12 @@ class HistoryInterface(ScrollArea):
         # Connect signals
         self.clearBtn.clicked.connect(self.clearHistory)
         self.exportBtn.clicked.connect(self.exportHistory)
-        self.searchInput.textChanged.connect(self.filterHistory)
+        self.searchInput.textChanged.connect(lambda: self.searchTimer.start())
+        self.searchTimer.timeout.connect(lambda: self.filterHistory(self.searchInput.text()))
+        historyStore.historyChanged.connect(self.onHistoryChanged)
 
-        # Download history
-        self.download_history = []
-
-        # Load existing history
-        self.loadHistory()
+        # Load existing history once the page has been painted, opening it never waits for the query
+        QTimer.singleShot(0, self.loadHistory)
 
     def __initWidget(self):
         """ Initialize widgets """
@@ -154,8 +158,9 @@ class HistoryInterface(ScrollArea):
 
         # Configure history table
         self.historyTable.setObjectName('historyTable')
-        self.historyTable.setColumnCount(5)
-        self.historyTable.setHorizontalHeaderLabels(['Type', 'Status', 'Date & Time', 'Title', 'File Location'])
+        self.historyFilterModel.setSourceModel(self.historyModel)
+        self.historyTable.setModel(self.historyFilterModel)
+        self.historyTable.setItemDelegate(HistoryItemDelegate(self.historyTable))
         
         # Enable modern TableWidget features
         self.historyTable.setBorderVisible(True)
@@ -173,9 +178,9 @@ class HistoryInterface(ScrollArea):
         header.setMinimumSectionSize(80)
         
         # Set column widths
-        self.historyTable.setColumnWidth(0, 100)  # Type column
-        self.historyTable.setColumnWidth(1, 120)  # Status column
-        self.historyTable.setColumnWidth(2, 160)  # Time column
+        self.historyTable.setColumnWidth(HistoryColumn.TYPE, 100)
+        self.historyTable.setColumnWidth(HistoryColumn.STATUS, 120)
+        self.historyTable.setColumnWidth(HistoryColumn.TIME, 160)
         
         # Row height
         self.historyTable.verticalHeader().setDefaultSectionSize(40)
@@ -186,10 +191,22 @@ class HistoryInterface(ScrollArea):
         self.historyTable.customContextMenuRequested.connect(self.showHistoryContextMenu)
         self.historyTable.doubleClicked.connect(self.openHistoryFile)
         
+        # Empty state
+        self.emptyLabel.setAlignment(Qt.AlignCenter)
+        self.emptyLabel.setTextColor(QColor(128, 128, 128), QColor(128, 128, 128))
+        font = self.emptyLabel.font()
+        font.setItalic(True)
+        self.emptyLabel.setFont(font)
+        self.emptyLabel.hide()
+        
         # Configure search input
         self.searchInput.setClearButtonEnabled(True)
         self.searchInput.setMinimumWidth(250)
         self.searchInput.setFixedHeight(32)
+        
+        # Filter once typing pauses instead of on every keystroke
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(200)
 
     def __initLayout(self):
         """ Initialize layout """
@@ -216,149 +233,34 @@ class HistoryInterface(ScrollArea):
         historyCardLayout.addWidget(separator)
         
         # History table
+        historyCardLayout.addWidget(self.emptyLabel)
         historyCardLayout.addWidget(self.historyTable, 1)
         
         # Add history card to main layout
         self.vBoxLayout.addWidget(historyCard, 1)
 
-    def updateHistoryDisplay(self):
-        """ Update the history table display """
-        self.historyTable.setRowCount(0)  # Clear table
-        
-        if not self.download_history:
-            # Show empty state message
-            self.historyTable.setRowCount(1)
-            empty_item = QTableWidgetItem("No download history yet. Start downloading videos to see them here!")
-            empty_item.setTextAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-            empty_item.setForeground(QColor(128, 128, 128))
-            font = empty_item.font()
-            font.setItalic(True)
-            empty_item.setFont(font)
-            self.historyTable.setItem(0, 0, empty_item)
-            self.historyTable.setSpan(0, 0, 1, 5)  # Span across all columns
-        else:
-            for entry in reversed(self.download_history):  # Show newest first
-                self.addHistoryRow(entry)
+    def updateHistoryDisplay(self, entries):
+        """ Rebuild the history table from `entries`, ordered from oldest to newest """
+        self.historyModel.setEntries(entries)
+        self.updateEmptyState()
 
-    def addHistoryRow(self, entry):
-        """ Add history row to table """
-        row = self.historyTable.rowCount()
-        self.historyTable.insertRow(row)
+    def updateEmptyState(self):
+        """ Show empty state message when there is no history """
+        self.emptyLabel.setVisible(self.historyModel.rowCount() == 0)
 
-        # Type column with icon
-        entry_type = entry.get('type', 'single')
-        type_widget = QWidget()
-        type_layout = QHBoxLayout(type_widget)
-        type_layout.setContentsMargins(8, 0, 8, 0)
-        type_layout.setSpacing(8)
-        
-        if entry_type == 'playlist':
-            type_badge = IconInfoBadge.attension(FIF.LIBRARY)
-            type_label = BodyLabel("Playlist")
-        else:
-            type_badge = IconInfoBadge.info(FIF.VIDEO)
-            type_label = BodyLabel("Single")
-        
-        type_layout.addWidget(type_badge)
-        type_layout.addWidget(type_label)
-        type_layout.addStretch()
-        
-        self.historyTable.setCellWidget(row, 0, type_widget)
+    def onHistoryChanged(self, inserted_ids, updated_ids, removed_ids):
+        """ Apply a history store change to the table without reloading it """
+        model = self.historyModel
+        if removed_ids:
+            model.removeIds(removed_ids)
+        if updated_ids:
+            for entry in historyStore.getMany(updated_ids):
+                model.updateEntry(entry)
+        if inserted_ids:
+            model.insertEntries(historyStore.getMany(inserted_ids))
+            model.truncate(cfg.get(cfg.historyLimit))
 
-        # Status column with badges
-        status_text = entry['status']
-        
-        status_widget = QWidget()
-        status_layout = QHBoxLayout(status_widget)
-        status_layout.setContentsMargins(8, 0, 8, 0)
-        status_layout.setSpacing(8)
-        
-        if 'Success' in status_text:
-            badge = IconInfoBadge.success(FIF.ACCEPT_MEDIUM)
-            badge.setToolTip("Download completed successfully")
-            status_label = BodyLabel("Success")
-            status_label.setStyleSheet("color: #10893E;")
-        elif 'Failed' in status_text:
-            badge = IconInfoBadge.error(FIF.CANCEL_MEDIUM)
-            error_msg = entry.get('title', 'Download failed')
-            badge.setToolTip(f"Error: {error_msg}")
-            status_label = BodyLabel("Failed")
-            status_label.setStyleSheet("color: #D13438;")
-        elif 'Downloading' in status_text:
-            badge = DotInfoBadge.attension()
-            status_label = BodyLabel("Downloading")
-            status_label.setStyleSheet("color: #0078D4;")
-        elif 'Cancelled' in status_text:
-            badge = IconInfoBadge.warning(FIF.CANCEL)
-            badge.setToolTip("Download was cancelled by user")
-            status_label = BodyLabel("Cancelled")
-            status_label.setStyleSheet("color: #F7630C;")
-        elif 'Interrupted' in status_text:
-            badge = IconInfoBadge.warning(FIF.SYNC)
-            badge.setToolTip("Download was interrupted (app closed)")
-            status_label = BodyLabel("Interrupted")
-            status_label.setStyleSheet("color: #CA5010;")
-        else:
-            badge = DotInfoBadge.info()
-            status_label = BodyLabel(status_text)
-        
-        status_layout.addWidget(badge)
-        status_layout.addWidget(status_label)
-        status_layout.addStretch()
-        
-        self.historyTable.setCellWidget(row, 1, status_widget)
-
-        # Time column
-        timestamp = entry['timestamp']
-        try:
-            dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
-            today = datetime.now().date()
-            
-            if dt.date() == today:
-                time_display = f"Today {dt.strftime('%H:%M:%S')}"
-            elif dt.date() == today - timedelta(days=1):
-                time_display = f"Yesterday {dt.strftime('%H:%M:%S')}"
-            else:
-                time_display = dt.strftime('%Y-%m-%d %H:%M')
-        except:
-            time_display = timestamp
-            
-        time_item = QTableWidgetItem(time_display)
-        time_item.setToolTip(f"Downloaded on {timestamp}")
-        time_item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        time_item.setFlags(time_item.flags() & ~Qt.ItemIsEditable)  # Make non-editable
-        self.historyTable.setItem(row, 2, time_item)
-
-        # Title column
-        title_text = entry.get('title', entry.get('details', 'Unknown'))
-        
-        # For playlists, show item count if available
-        if entry_type == 'playlist' and 'items' in entry:
-            item_count = len(entry['items'])
-            title_text = f"{title_text} ({item_count} items)"
-        
-        title_item = QTableWidgetItem(title_text)
-        title_item.setToolTip(title_text)
-        title_item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        title_item.setFlags(title_item.flags() & ~Qt.ItemIsEditable)  # Make non-editable
-        self.historyTable.setItem(row, 3, title_item)
-        
-        # Path column
-        file_path = entry.get('path', '')
-        if file_path:
-            filename = os.path.basename(file_path)
-            path_item = QTableWidgetItem(f"  {filename}")
-            path_item.setIcon(FIF.FOLDER.icon())
-            path_item.setToolTip(f"Full path: {file_path}\nDouble-click to open")
-            path_item.setForeground(QColor(0, 120, 215))
-        else:
-            path_item = QTableWidgetItem("  N/A")
-            path_item.setForeground(QColor(128, 128, 128))
-            path_item.setToolTip("File path not available")
-            
-        path_item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        path_item.setFlags(path_item.flags() & ~Qt.ItemIsEditable)  # Make non-editable
-        self.historyTable.setItem(row, 4, path_item)
+        self.updateEmptyState()
 
     def clearHistory(self):
         """ Clear history """
@@ -368,9 +270,7 @@ class HistoryInterface(ScrollArea):
             self
         )
         if confirm.exec():
-            self.historyTable.setRowCount(0)
-            self.download_history.clear()
-            cfg.set(cfg.downloadHistory, [])
+            historyStore.clear()
             InfoBar.success(
                 title='History Cleared',
                 content='Download history has been cleared',
@@ -378,38 +278,27 @@ class HistoryInterface(ScrollArea):
             )
 
     def loadHistory(self):
-        """ Load history from config """
+        """ Load history from the history store """
         try:
-            stored_history = cfg.get(cfg.downloadHistory)
-            if isinstance(stored_history, list):
-                self.download_history = stored_history
-                self.updateHistoryDisplay()
-        except:
-            self.download_history = []
+            entries = historyStore.entries(cfg.get(cfg.historyLimit))
+        except Exception:
+            entries = []
+        self.updateHistoryDisplay(entries)
     
     def refreshHistory(self):
-        """ Refresh history display from config """
+        """ Reload the whole history display from the history store """
         self.loadHistory()
     
-    def updateHistoryEntry(self, index, status, path=None):
+    def updateHistoryEntry(self, history_id, status, path=None):
         """ Update a specific history entry """
-        if 0 <= index < len(self.download_history):
-            self.download_history[index]['status'] = status
-            if path:
-                self.download_history[index]['path'] = path
-            cfg.set(cfg.downloadHistory, self.download_history)
-            self.updateHistoryDisplay()
+        fields = {'status': status}
+        if path:
+            fields['path'] = path
+        historyStore.update(history_id, **fields)
 
     def filterHistory(self, text):
         """ Filter history based on search text """
-        for row in range(self.historyTable.rowCount()):
-            should_show = False
-            for col in range(self.historyTable.columnCount()):
-                item = self.historyTable.item(row, col)
-                if item and text.lower() in item.text().lower():
-                    should_show = True
-                    break
-            self.historyTable.setRowHidden(row, not should_show)
+        self.historyFilterModel.setSearchText(text)
     
     def exportHistory(self):
         """ Export history to file """
@@ -421,10 +310,10 @@ class HistoryInterface(ScrollArea):
                 with open(file_path, 'w', encoding='utf-8') as f:
                     if file_path.endswith('.csv'):
                         f.write("Type,Status,Time,Title,Path\n")
-                        for entry in self.download_history:
+                        for entry in self.historyModel.entries():
                             f.write(f'"{entry.get("type", "single")}","{entry["status"]}","{entry["timestamp"]}","{entry.get("title", "")}","{entry.get("path", "")}"\n')
                     else:
-                        for entry in self.download_history:
+                        for entry in self.historyModel.entries():
                             f.write(f"{entry.get('type', 'single')} | {entry['status']} | {entry['timestamp']} | {entry.get('title', '')} | {entry.get('path', '')}\n")
                 
                 InfoBar.success(
@@ -441,12 +330,12 @@ class HistoryInterface(ScrollArea):
     
     def showHistoryContextMenu(self, pos):
         """ Show context menu for history table """
-        item = self.historyTable.itemAt(pos)
-        if item:
-            row = item.row()
+        index = self.historyTable.indexAt(pos)
+        if index.isValid():
+            row = index.row()
             
             # Get entry type and data
-            entry = self.download_history[len(self.download_history) - 1 - row] if row < len(self.download_history) else None
+            entry = self.historyFilterModel.entry(row)
             
             menu = RoundMenu(parent=self)
             
@@ -457,22 +346,19 @@ class HistoryInterface(ScrollArea):
                 menu.addAction(viewDetailsAction)
                 menu.addSeparator()
             
-            path_item = self.historyTable.item(row, 4)
-            if path_item and path_item.text().strip() and path_item.text() != "N/A":
-                file_path = entry.get('path', '') if entry else ''
+            file_path = entry.get('path', '') if entry else ''
+            if file_path and os.path.exists(file_path):
+                openFileAction = Action(FIF.DOCUMENT, "Open File")
+                openFileAction.triggered.connect(lambda: self.openFile(file_path))
+                menu.addAction(openFileAction)
+                
+                openFolderAction = Action(FIF.FOLDER, "Open Folder")
+                openFolderAction.triggered.connect(lambda: self.openFolder(file_path))
+                menu.addAction(openFolderAction)
                 
-                if file_path and os.path.exists(file_path):
-                    openFileAction = Action(FIF.DOCUMENT, "Open File")
-                    openFileAction.triggered.connect(lambda: self.openFile(file_path))
-                    menu.addAction(openFileAction)
-                    
-                    openFolderAction = Action(FIF.FOLDER, "Open Folder")
-                    openFolderAction.triggered.connect(lambda: self.openFolder(file_path))
-                    menu.addAction(openFolderAction)
-                    
-                    copyPathAction = Action(FIF.COPY, "Copy Path")
-                    copyPathAction.triggered.connect(lambda: QApplication.clipboard().setText(file_path))
-                    menu.addAction(copyPathAction)
+                copyPathAction = Action(FIF.COPY, "Copy Path")
+                copyPathAction.triggered.connect(lambda: QApplication.clipboard().setText(file_path))
+                menu.addAction(copyPathAction)
             
             if menu.actions():
                 menu.exec(self.historyTable.mapToGlobal(pos))
@@ -485,8 +371,7 @@ class HistoryInterface(ScrollArea):
     
     def openHistoryFile(self, index):
         """ Open file from history on double click """
-        row = index.row()
-        entry = self.download_history[len(self.download_history) - 1 - row] if row < len(self.download_history) else None
+        entry = self.historyFilterModel.entry(index.row())
         
         if entry:
             # If it's a playlist, show details
@@ -0,0 +1,406 @@
+# coding: utf-8
+"""
+Model and delegate for the download history table
+
+The model exposes history entries to a TableView and the delegate paints the
+type and status badges, so only the visible rows cost anything to draw. The
+proxy model filters rows against a lowercase search key cached per entry.
+"""
+import os
+from datetime import datetime, timedelta
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QSortFilterProxyModel, QModelIndex, QRectF
+from PySide6.QtGui import QColor, QPainter
+
+from qfluentwidgets import TableItemDelegate, FluentIcon as FIF, Theme, isDarkTheme, themeColor
+
+
+class HistoryColumn:
+    """ History table columns """
+    TYPE = 0
+    STATUS = 1
+    TIME = 2
+    TITLE = 3
+    PATH = 4
+
+    HEADERS = ['Type', 'Status', 'Date & Time', 'Title', 'File Location']
+
+
+# badge level -> (light color, dark color), same palette as InfoBadge
+BADGE_COLORS = {
+    'info': (QColor(138, 138, 138), QColor(157, 157, 157)),
+    'success': (QColor(15, 123, 15), QColor(108, 203, 95)),
+    'attention': (None, None),  # theme color
+    'warning': (QColor(157, 93, 0), QColor(255, 244, 206)),
+    'error': (QColor(196, 43, 28), QColor(255, 153, 164)),
+}
+
+# status kind -> (badge level, badge icon or None for a dot, label, label color, tooltip)
+STATUS_BADGES = {
+    'success': ('success', FIF.ACCEPT_MEDIUM, "Success", QColor('#10893E'), "Download completed successfully"),
+    'failed': ('error', FIF.CANCEL_MEDIUM, "Failed", QColor('#D13438'), None),
+    'downloading': ('attention', None, "Downloading", QColor('#0078D4'), None),
+    'cancelled': ('warning', FIF.CANCEL, "Cancelled", QColor('#F7630C'), "Download was cancelled by user"),
+    'interrupted': ('warning', FIF.SYNC, "Interrupted", QColor('#CA5010'), "Download was interrupted (app closed)"),
+    'other': ('info', None, None, None, None),
+}
+
+# entry type -> (badge level, badge icon, label)
+TYPE_BADGES = {
+    'playlist': ('attention', FIF.LIBRARY, "Playlist"),
+    'single': ('info', FIF.VIDEO, "Single"),
+}
+
+# role used by the delegate to get the badge of a cell
+BadgeRole = Qt.UserRole + 1
+
+
+def statusKind(status_text):
+    """ Map a history status text to its badge kind """
+    for keyword, kind in (('Success', 'success'), ('Failed', 'failed'), ('Downloading', 'downloading'),
+                          ('Cancelled', 'cancelled'), ('Interrupted', 'interrupted')):
+        if keyword in status_text:
+            return kind
+    return 'other'
+
+
+def searchKey(entry):
+    """ Lowercase text searched for an entry: title, path, status, type, time and playlist item titles """
+    parts = [
+        entry.get('title', entry.get('details', '')) or '',
+        entry.get('path', '') or '',
+        entry.get('status', '') or '',
+        "playlist" if entry.get('type') == 'playlist' else "single",
+        entry.get('timestamp', '') or '',
+    ]
+    for item in entry.get('items') or []:
+        if isinstance(item, dict):
+            parts.append(item.get('title', '') or '')
+
+    return '\n'.join(parts).lower()
+
+
+def formatTimestamp(timestamp):
+    """ Format a history timestamp relative to today """
+    try:
+        dt = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return timestamp
+
+    today = datetime.now().date()
+    if dt.date() == today:
+        return f"Today {dt.strftime('%H:%M:%S')}"
+    elif dt.date() == today - timedelta(days=1):
+        return f"Yesterday {dt.strftime('%H:%M:%S')}"
+    return dt.strftime('%Y-%m-%d %H:%M')
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """ Table model over download history entries, newest first """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._entries = []
+        self._searchKeys = {}  # entry id -> search key
+
+    def setEntries(self, entries):
+        """ Replace all entries, `entries` is ordered from oldest to newest """
+        self.beginResetModel()
+        self._entries = list(reversed(entries))
+        self._searchKeys.clear()
+        self.endResetModel()
+
+    def searchKey(self, row):
+        """ Search key of the entry at `row`, built on first use """
+        entry = self._entries[row]
+        key = self._searchKeys.get(entry['id'])
+        if key is None:
+            key = self._searchKeys[entry['id']] = searchKey(entry)
+        return key
+
+    def searchKeys(self):
+        """ Search keys of all rows """
+        keys = self._searchKeys
+        return [keys.get(entry['id']) or self.searchKey(row) for row, entry in enumerate(self._entries)]
+
+    def entry(self, row):
+        """ Get the history entry shown at `row`, or None """
+        if 0 <= row < len(self._entries):
+            return self._entries[row]
+        return None
+
+    def entries(self):
+        """ All entries ordered from oldest to newest """
+        return list(reversed(self._entries))
+
+    def _searchRow(self, entry_id):
+        """ Binary search for the row where `entry_id` is or would be, rows are sorted by descending id """
+        lo, hi = 0, len(self._entries)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entries[mid]['id'] > entry_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def rowOfId(self, entry_id):
+        """ Row of the entry with `entry_id`, or -1 """
+        row = self._searchRow(entry_id)
+        if row < len(self._entries) and self._entries[row]['id'] == entry_id:
+            return row
+        return -1
+
+    def insertEntries(self, entries):
+        """ Insert new entries at their sorted position """
+        for entry in entries:
+            if self.rowOfId(entry['id']) >= 0:
+                self.updateEntry(entry)
+                continue
+
+            row = self._searchRow(entry['id'])
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._entries.insert(row, entry)
+            self.endInsertRows()
+
+    def updateEntry(self, entry):
+        """ Replace an entry in place and repaint its row """
+        row = self.rowOfId(entry['id'])
+        if row < 0:
+            return
+
+        self._entries[row] = entry
+        self._searchKeys.pop(entry['id'], None)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def removeIds(self, entry_ids):
+        """ Remove the entries with the given ids """
+        rows = sorted((r for r in map(self.rowOfId, entry_ids) if r >= 0), reverse=True)
+        if len(rows) > len(self._entries) // 2:
+            # cheaper to rebuild than to remove most rows one by one
+            remove = set(entry_ids)
+            self.beginResetModel()
+            self._entries = [e for e in self._entries if e['id'] not in remove]
+            self._searchKeys = {i: k for i, k in self._searchKeys.items() if i not in remove}
+            self.endResetModel()
+            return
+
+        for row in rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self._searchKeys.pop(self._entries[row]['id'], None)
+            del self._entries[row]
+            self.endRemoveRows()
+
+    def truncate(self, limit):
+        """ Keep only the newest `limit` entries """
+        if len(self._entries) > limit:
+            self.beginRemoveRows(QModelIndex(), limit, len(self._entries) - 1)
+            for entry in self._entries[limit:]:
+                self._searchKeys.pop(entry['id'], None)
+            del self._entries[limit:]
+            self.endRemoveRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._entries)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HistoryColumn.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HistoryColumn.HEADERS[section]
+        if orientation == Qt.Horizontal and role == Qt.TextAlignmentRole:
+            return int(Qt.AlignLeft | Qt.AlignVCenter)
+        return None
+
+    def flags(self, index):
+        # rows are selectable but never editable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        entry = self._entries[index.row()]
+        column = index.column()
+
+        if role == Qt.DisplayRole:
+            return self._displayText(entry, column)
+        elif role == Qt.ToolTipRole:
+            return self._toolTip(entry, column)
+        elif role == BadgeRole:
+            if column == HistoryColumn.TYPE:
+                return TYPE_BADGES['playlist' if entry.get('type') == 'playlist' else 'single']
+            if column == HistoryColumn.STATUS:
+                return statusKind(entry.get('status', ''))
+        elif role == Qt.ForegroundRole and column == HistoryColumn.PATH:
+            return QColor(0, 120, 215) if entry.get('path') else QColor(128, 128, 128)
+        elif role == Qt.DecorationRole and column == HistoryColumn.PATH and entry.get('path'):
+            return FIF.FOLDER.icon()
+        elif role == Qt.TextAlignmentRole:
+            return int(Qt.AlignLeft | Qt.AlignVCenter)
+
+        return None
+
+    def _displayText(self, entry, column):
+        """ Display text of a cell """
+        if column == HistoryColumn.TYPE:
+            return "Playlist" if entry.get('type') == 'playlist' else "Single"
+        elif column == HistoryColumn.STATUS:
+            label = STATUS_BADGES[statusKind(entry.get('status', ''))][2]
+            return label or entry.get('status', '')
+        elif column == HistoryColumn.TIME:
+            return formatTimestamp(entry.get('timestamp', ''))
+        elif column == HistoryColumn.TITLE:
+            return self._titleText(entry)
+        elif column == HistoryColumn.PATH:
+            file_path = entry.get('path', '')
+            return f"  {os.path.basename(file_path)}" if file_path else "  N/A"
+        return None
+
+    def _titleText(self, entry):
+        """ Title text, playlists show their item count """
+        title_text = entry.get('title', entry.get('details', 'Unknown'))
+        if entry.get('type') == 'playlist' and 'items' in entry:
+            title_text = f"{title_text} ({len(entry['items'])} items)"
+        return title_text
+
+    def _toolTip(self, entry, column):
+        """ Tooltip of a cell """
+        if column == HistoryColumn.STATUS:
+            kind = statusKind(entry.get('status', ''))
+            if kind == 'failed':
+                return f"Error: {entry.get('title', 'Download failed')}"
+            return STATUS_BADGES[kind][4]
+        elif column == HistoryColumn.TIME:
+            return f"Downloaded on {entry.get('timestamp', '')}"
+        elif column == HistoryColumn.TITLE:
+            return self._titleText(entry)
+        elif column == HistoryColumn.PATH:
+            file_path = entry.get('path', '')
+            if file_path:
+                return f"Full path: {file_path}\nDouble-click to open"
+            return "File path not available"
+        return None
+
+
+class HistoryFilterModel(QSortFilterProxyModel):
+    """ Proxy model showing the history entries that match every search term """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._terms = []
+        self._matchedRows = None
+
+    def setSearchText(self, text):
+        """ Filter by the whitespace separated terms of `text` """
+        terms = text.lower().split()
+        if terms == self._terms:
+            return
+
+        # Qt 6.9 replaced invalidateFilter() with a begin/end pair around the change
+        changing = hasattr(self, 'beginFilterChange')
+        if changing:
+            self.beginFilterChange()
+        self._terms = terms
+
+        # match all rows in one pass, so the per-row callbacks of the
+        # refilter below are only set lookups
+        model = self.sourceModel()
+        if terms and model is not None:
+            keys = model.searchKeys()
+            rows = range(len(keys))
+            for term in terms:
+                rows = [r for r in rows if term in keys[r]]
+            self._matchedRows = set(rows)
+
+        if changing:
+            self.endFilterChange(QSortFilterProxyModel.Direction.Rows)
+        else:
+            self.invalidateRowsFilter()
+        self._matchedRows = None
+
+    def entry(self, row):
+        """ Get the history entry shown at proxy `row`, or None """
+        index = self.mapToSource(self.index(row, 0))
+        return self.sourceModel().entry(index.row()) if index.isValid() else None
+
+    def _matches(self, key):
+        return all(term in key for term in self._terms)
+
+    def filterAcceptsRow(self, sourceRow, sourceParent):
+        if not self._terms:
+            return True
+        if self._matchedRows is not None:
+            return sourceRow in self._matchedRows
+
+        # rows inserted or changed after the search was set
+        return self._matches(self.sourceModel().searchKey(sourceRow))
+
+
+class HistoryItemDelegate(TableItemDelegate):
+    """ Table delegate that paints type and status badges instead of cell widgets """
+
+    BADGE_SIZE = 16
+    ICON_SIZE = 8
+    DOT_SIZE = 6
+    SPACING = 8
+    MARGIN = 8
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+
+        # badge cells paint their own label
+        if index.column() in (HistoryColumn.TYPE, HistoryColumn.STATUS):
+            option.text = ""
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+
+        column = index.column()
+        if column == HistoryColumn.TYPE:
+            level, icon, label = index.data(BadgeRole)
+            self._drawBadge(painter, option, level, icon, label, None)
+        elif column == HistoryColumn.STATUS:
+            level, icon, label, color, _ = STATUS_BADGES[index.data(BadgeRole)]
+            self._drawBadge(painter, option, level, icon, label or index.data(Qt.DisplayRole), color)
+
+    def _badgeColor(self, level):
+        """ Background color of a badge level """
+        light, dark = BADGE_COLORS[level]
+        if light is None:
+            return themeColor()
+        return dark if isDarkTheme() else light
+
+    def _drawBadge(self, painter, option, level, icon, label, labelColor):
+        """ Draw a badge followed by its label, vertically centered in the cell """
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setClipRect(option.rect)
+
+        rect = option.rect
+        x = rect.x() + self.MARGIN
+        cy = rect.y() + rect.height() / 2
+
+        # badge
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self._badgeColor(level))
+        if icon is None:
+            size = self.DOT_SIZE
+            painter.drawEllipse(QRectF(x, cy - size / 2, size, size))
+        else:
+            size = self.BADGE_SIZE
+            painter.drawEllipse(QRectF(x, cy - size / 2, size, size))
+            offset = (size - self.ICON_SIZE) / 2
+            iconRect = QRectF(x + offset, cy - self.ICON_SIZE / 2, self.ICON_SIZE, self.ICON_SIZE)
+            icon.render(painter, iconRect, Theme.DARK if not isDarkTheme() else Theme.LIGHT)
+
+        # label
+        if labelColor is None:
+            labelColor = QColor(Qt.white) if isDarkTheme() else QColor(Qt.black)
+        painter.setFont(option.font)
+        painter.setPen(labelColor)
+        textRect = rect.adjusted(int(x - rect.x() + size + self.SPACING), 0, -self.MARGIN, 0)
+        painter.drawText(textRect, Qt.AlignLeft | Qt.AlignVCenter, label or "")
+
+        painter.restore()
@@ -0,0 +1,38 @@
+# coding: utf-8
+"""
+Placeholder of a navigation page that builds its interface on first show
+"""
+from PySide6.QtWidgets import QWidget, QVBoxLayout
+
+
+class LazyInterface(QWidget):
+    """ Lightweight stand-in registered with the navigation
+
+    The real interface is created by `factory(parent)` the first time the page
+    is shown, or earlier when `interface()` is called, so pages the user never
+    opens cost nothing at startup.
+    """
+
+    def __init__(self, objectName, factory, parent=None):
+        super().__init__(parent=parent)
+        self.setObjectName(objectName)
+        self._factory = factory
+        self._interface = None
+
+        self.vBoxLayout = QVBoxLayout(self)
+        self.vBoxLayout.setContentsMargins(0, 0, 0, 0)
+
+    def isBuilt(self):
+        return self._interface is not None
+
+    def interface(self):
+        """ the real interface, built on first use """
+        if self._interface is None:
+            self._interface = self._factory(self)
+            self.vBoxLayout.addWidget(self._interface)
+            self._interface.show()
+        return self._interface
+
+    def showEvent(self, e):
+        self.interface()
+        super().showEvent(e)
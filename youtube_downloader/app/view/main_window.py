@@ -11,7 +11,12 @@ from qfluentwidgets import (NavigationAvatarWidget, NavigationItemPosition, Mess
 from qfluentwidgets import setTheme, Theme
 
 from app.common.config import cfg
+from app.common.history_store import historyStore
+from app.common.job_journal import jobJournal
+from app.common.startup_timer import startupTimer
 from app.resource.resource import getAppIcon
+from app.components.preload import preloadEngine
+from app.view.lazy_interface import LazyInterface
 from app.view.single_download_interface import SingleDownloadInterface
 from app.view.playlist_interface import PlaylistInterface
 from app.view.history_interface import HistoryInterface
@@ -24,38 +29,49 @@ class MainWindow(FluentWindow):
     def __init__(self):
         super().__init__()
         self.initWindow()
+        startupTimer.mark("show splash screen")
         # create system theme listener
         self.themeListener = SystemThemeListener(self)
 
         # set initial theme from config before creating interfaces
         self.setInitialTheme()
 
-        # create sub interfaces
-        self.singleDownloadInterface = SingleDownloadInterface(self)
-        self.playlistInterface = PlaylistInterface(self)
-        self.historyInterface = HistoryInterface(self)
-        self.settingsInterface = SettingsInterface(self)
-        self.aboutInterface = AboutInterface(self)
+        # create sub interfaces, each page builds its interface the first time it is shown
+        self.singleDownloadInterface = LazyInterface('singleDownloadInterface', SingleDownloadInterface, self)
+        self.playlistInterface = LazyInterface('playlistInterface', PlaylistInterface, self)
+        self.historyInterface = LazyInterface('historyInterface', HistoryInterface, self)
+        self.settingsInterface = LazyInterface('settingsInterface', SettingsInterface, self)
+        self.aboutInterface = LazyInterface('aboutInterface', AboutInterface, self)
 
         # enable acrylic effect
         self.navigationInterface.setAcrylicEnabled(True)
 
         self.connectSignalToSlot()
 
-        # add items to navigation interface
+        # add items to navigation interface, the start page is built when it is shown
         self.initNavigation()
-        
-        # Clean up incomplete downloads from previous session
-        self.cleanupIncompleteDownloads()
+        startupTimer.mark("build start page")
         
         self.splashScreen.finish()
 
+        # Report the startup once the first frame is up, then load the download engine in the background
+        QTimer.singleShot(0, self.onFirstFrame)
+
+        # Offer to resume downloads interrupted in the previous session once the window is up
+        QTimer.singleShot(0, self.resumeInterruptedDownloads)
+
         # start theme listener
         self.themeListener.start()
 
     def connectSignalToSlot(self):
         pass
 
+    def onFirstFrame(self):
+        """ Log the startup timing report and preload the download engine """
+        startupTimer.mark("first frame")
+        startupTimer.report()
+        preloadEngine()
+
     def setInitialTheme(self):
         """ Set initial theme from config """
         theme = cfg.get(cfg.theme)
@@ -135,6 +151,7 @@ class MainWindow(FluentWindow):
     def closeEvent(self, e):
         self.themeListener.terminate()
         self.themeListener.deleteLater()
+        cfg.flush()
         super().closeEvent(e)
 
     def _onThemeChangedFinished(self):
@@ -144,19 +161,38 @@ class MainWindow(FluentWindow):
         if self.isMicaEffectEnabled():
             QTimer.singleShot(100, lambda: self.windowEffect.setMicaEffect(self.winId(), isDarkTheme()))
     
-    def cleanupIncompleteDownloads(self):
-        """ Clean up downloads that were in progress when app closed """
-        download_history = cfg.get(cfg.downloadHistory) or []
-        modified = False
-        
-        for entry in download_history:
-            if entry.get('status') == 'Downloading':
-                # Mark as incomplete/interrupted
-                entry['status'] = 'Interrupted'
-                modified = True
-        
-        if modified:
-            cfg.set(cfg.downloadHistory, download_history)
-            # Refresh history interface
-            if hasattr(self, 'historyInterface'):
-                self.historyInterface.refreshHistory()
\ No newline at end of file
+    def resumeInterruptedDownloads(self):
+        """ Offer to resume the jobs left in the job journal by the previous session """
+        # Nothing is running yet, the history interface picks the change up from the store
+        historyStore.replaceStatus('Downloading', 'Interrupted')
+
+        jobs = jobJournal.unfinishedJobs()
+
+        # each interface runs one download at a time, so only the newest job of each kind is offered,
+        # older ones stay in the journal with their partial files and are offered on a later launch
+        latest = {}
+        for job in jobs:
+            latest[job['kind']] = job
+        resumable = [job for job in latest.values() if job['kind'] in ('single', 'playlist')]
+
+        resume = False
+        if resumable:
+            items = sum(1 for job in resumable for item in job['items']
+                        if item['partial_path'] and item['state'] != jobJournal.DONE)
+            content = "\n".join(f"• {job['url']}" for job in resumable)
+            if items:
+                content += f"\n\n{items} partially downloaded file(s) will be continued."
+            box = MessageBox('Resume Interrupted Downloads', f"These downloads did not finish last time:\n\n{content}", self)
+            box.yesButton.setText('Resume')
+            box.cancelButton.setText('Discard')
+            resume = bool(box.exec())
+
+        # only the jobs the user was shown are discarded, with their partial files
+        for job in resumable:
+            if not resume:
+                jobJournal.discardJob(job['id'])
+                continue
+
+            interface = self.singleDownloadInterface if job['kind'] == 'single' else self.playlistInterface
+            if interface.interface().resumeJob(job) and job['history_id'] is not None:
+                historyStore.update(job['history_id'], status='Downloading')
\ No newline at end of file
@@ -11,13 +11,14 @@ from qfluentwidgets import (ScrollArea, PushButton, LineEdit, ComboBox,
                             ProgressBar, InfoBar, InfoBarPosition,
                             CardWidget, BodyLabel, CaptionLabel, PrimaryPushButton,
                             FluentIcon as FIF, IndeterminateProgressRing,
-                            StrongBodyLabel, SubtitleLabel, SwitchButton, SpinBox,
+                            StrongBodyLabel, SubtitleLabel, SwitchButton, SpinBox, DoubleSpinBox,
                             CheckBox, IconInfoBadge, InfoBadge, DotInfoBadge)
 import os
 
 from app.common.config import cfg
-from app.common.utils import clean_unicode_text
-from app.components.concurrent_playlist_worker import ConcurrentPlaylistWorker
+from app.common.history_store import historyStore
+from app.common.job_journal import jobJournal
+from app.common.utils import clean_unicode_text, format_speed, format_eta
 
 
 class PlaylistFileCard(CardWidget):
@@ -67,13 +68,19 @@ class PlaylistFileCard(CardWidget):
         layout.addWidget(self.progressBar)
         layout.addLayout(infoRow)
         
+        self._progressStyled = False
+        self._infoBadge = False
+        
     def updateProgress(self, progress, speed, eta):
         """Update progress display"""
         self.progressBar.setValue(progress)
         
-        # Show progress percentage in status label as badge-style text
+        # Show progress percentage in status label as badge-style text,
+        # restyling only once since style sheet changes are expensive
         self.statusLabel.setText(f"{progress}%")
-        self.statusLabel.setStyleSheet("color: #0078D4; font-weight: bold;")
+        if not self._progressStyled:
+            self.statusLabel.setStyleSheet("color: #0078D4; font-weight: bold;")
+            self._progressStyled = True
         
         self.speedLabel.setText(f"Speed: {speed}")
         self.etaLabel.setText(f"ETA: {eta}")
@@ -82,13 +89,14 @@ class PlaylistFileCard(CardWidget):
         if progress < 30:
             # Keep attention badge for low progress
             pass
-        elif progress < 70:
+        elif not self._infoBadge:
             # Change to info badge for medium progress
             index = self.titleRow.indexOf(self.statusBadge)
             if index >= 0:
                 self.statusBadge.deleteLater()
                 self.statusBadge = DotInfoBadge.info()
                 self.titleRow.insertWidget(index, self.statusBadge)
+                self._infoBadge = True
         
     def setCompleted(self):
         """Mark as completed"""
@@ -148,12 +156,14 @@ class PlaylistInterface(ScrollArea):
         
         # Advanced options
         self.concurrentSpin = SpinBox()
-        self.speedLimitSpin = SpinBox()
+        self.speedLimitSpin = DoubleSpinBox()
         
         # Buttons
         self.downloadBtn = PrimaryPushButton("Download Playlist")
         self.cancelBtn = PushButton("Cancel", self, FIF.CANCEL)
         self.cancelBtn.hide()
+        self.pauseBtn = PushButton("Pause", self, FIF.PAUSE)
+        self.pauseBtn.hide()
         
         # Progress
         self.progressRing = IndeterminateProgressRing()
@@ -179,6 +189,7 @@ class PlaylistInterface(ScrollArea):
         
         self.file_cards = {}  # index -> card
         self.current_worker = None
+        self.current_job_id = None
         
         self.__initWidget()
         self.__initLayout()
@@ -186,7 +197,9 @@ class PlaylistInterface(ScrollArea):
         # Connect signals
         self.downloadBtn.clicked.connect(self.startDownload)
         self.cancelBtn.clicked.connect(self.cancelDownload)
+        self.pauseBtn.clicked.connect(self.togglePause)
         self.audioOnlySwitch.checkedChanged.connect(self.updateFormatOptions)
+        self.speedLimitSpin.valueChanged.connect(self.updateSpeedLimit)
         
         self.updateFormatOptions()
         
@@ -236,16 +249,22 @@ class PlaylistInterface(ScrollArea):
         self.endIndexSpin.setMinimumWidth(120)
         
         # Advanced options
-        self.concurrentSpin.setMinimum(1)
-        self.concurrentSpin.setMaximum(5)
+        # The lowest value means auto, the worker isn't imported just for its constant
+        self.concurrentSpin.setMinimum(cfg.concurrentPlaylistDownloads.validator.min_value)
+        self.concurrentSpin.setMaximum(cfg.concurrentPlaylistDownloads.validator.max_value)
         self.concurrentSpin.setValue(cfg.get(cfg.concurrentPlaylistDownloads))
         self.concurrentSpin.setPrefix("Concurrent: ")
+        self.concurrentSpin.setSpecialValueText("Concurrent: Auto")
+        self.concurrentSpin.setToolTip("Auto adds downloads while the total speed keeps rising")
         self.concurrentSpin.setAccelerated(True)
         self.concurrentSpin.setMinimumWidth(140)
         
         self.speedLimitSpin.setMinimum(0)
         self.speedLimitSpin.setMaximum(100)
+        self.speedLimitSpin.setDecimals(1)
+        self.speedLimitSpin.setSingleStep(0.5)
         self.speedLimitSpin.setValue(cfg.get(cfg.speedLimit))
+        self.speedLimitSpin.setToolTip("Shared by all running downloads, changes apply at once")
         self.speedLimitSpin.setPrefix("Limit: ")
         self.speedLimitSpin.setSuffix(" MB/s")
         self.speedLimitSpin.setSpecialValueText("Unlimited")
@@ -256,6 +275,8 @@ class PlaylistInterface(ScrollArea):
         self.downloadBtn.setIcon(FIF.DOWNLOAD)
         self.downloadBtn.setMinimumHeight(36)
         self.cancelBtn.setMinimumHeight(36)
+        self.pauseBtn.setMinimumHeight(36)
+        self.pauseBtn.setToolTip("Running downloads finish, queued videos wait until resumed")
         
     def __initLayout(self):
         """Initialize layout"""
@@ -338,6 +359,7 @@ class PlaylistInterface(ScrollArea):
         btnRow = QHBoxLayout()
         btnRow.addWidget(self.progressRing)
         btnRow.addStretch()
+        btnRow.addWidget(self.pauseBtn)
         btnRow.addWidget(self.cancelBtn)
         btnRow.addWidget(self.downloadBtn)
         mainLayout.addLayout(btnRow)
@@ -436,6 +458,43 @@ class PlaylistInterface(ScrollArea):
                 return
             cfg.set(cfg.downloadFolder, download_path)
             
+        # Add to history immediately with "Downloading" status
+        history_id = self.addToHistoryStart(url)
+        
+        # Journal the job so it can be resumed if the app closes mid-download
+        end_index = self.endIndexSpin.value() if self.endIndexSpin.value() > 0 else None
+        concurrent = self.concurrentSpin.value() if hasattr(self, 'concurrentSpin') else cfg.get(cfg.concurrentPlaylistDownloads)
+        options = {
+            'download_path': download_path,
+            'quality': self.qualityCombo.currentText(),
+            'format_type': self.formatCombo.currentText().lower(),
+            'is_audio_only': self.audioOnlySwitch.isChecked(),
+            'start_index': self.startIndexSpin.value(),
+            'end_index': end_index,
+            'download_subtitles': self.subtitlesCheck.isChecked(),
+            'concurrent_downloads': concurrent,
+        }
+        job_id = jobJournal.createJob('playlist', url, options, history_id)
+        self.runJob(job_id, url, options, history_id)
+        
+    def resumeJob(self, job):
+        """Resume a playlist download interrupted in a previous session"""
+        if self.current_worker and self.current_worker.isRunning():
+            return False
+        
+        self.urlInput.setText(job['url'])
+        
+        # The speed limit is global now, not an option of the job
+        options = dict(job['options'])
+        options.pop('speed_limit', None)
+        self.runJob(job['id'], job['url'], options, job['history_id'])
+        return True
+        
+    def runJob(self, job_id, url, options, history_id):
+        """Start the worker of a journaled playlist job"""
+        self.current_job_id = job_id
+        self.current_history_id = history_id
+        
         # Clear previous cards
         for card in self.file_cards.values():
             card.deleteLater()
@@ -452,37 +511,23 @@ class PlaylistInterface(ScrollArea):
             self.totalBadge.deleteLater()
             self.totalBadge = None
         
-        # Add to history immediately with "Downloading" status
-        self.current_history_index = self.addToHistoryStart(url)
-        
         # Show progress
         self.statusLabel.setText("Fetching playlist info...")
         self.progressRing.show()
         self.downloadBtn.setEnabled(False)
         self.cancelBtn.show()
+        self.setPauseButton(False)
+        self.pauseBtn.show()
         
-        # Create worker with concurrent downloads
-        end_index = self.endIndexSpin.value() if self.endIndexSpin.value() > 0 else None
-        concurrent = self.concurrentSpin.value() if hasattr(self, 'concurrentSpin') else cfg.get(cfg.concurrentPlaylistDownloads)
-        speed_limit = self.speedLimitSpin.value() if hasattr(self, 'speedLimitSpin') else cfg.get(cfg.speedLimit)
-        
-        self.current_worker = ConcurrentPlaylistWorker(
-            url=url,
-            download_path=download_path,
-            quality=self.qualityCombo.currentText(),
-            format_type=self.formatCombo.currentText().lower(),
-            is_audio_only=self.audioOnlySwitch.isChecked(),
-            start_index=self.startIndexSpin.value(),
-            end_index=end_index,
-            download_subtitles=self.subtitlesCheck.isChecked(),
-            concurrent_downloads=concurrent,
-            speed_limit=speed_limit
-        )
+        # Create worker with concurrent downloads, the download engine is imported on first use
+        from app.components.concurrent_playlist_worker import ConcurrentPlaylistWorker
+        self.current_worker = ConcurrentPlaylistWorker(url=url, job_id=job_id, **options)
         
         # Connect signals
         self.current_worker.playlistInfoFetched.connect(self.onPlaylistInfo)
+        self.current_worker.playlistCountUpdated.connect(self.onPlaylistCount)
         self.current_worker.fileStarted.connect(self.onFileStarted)
-        self.current_worker.fileProgress.connect(self.onFileProgress)
+        self.current_worker.progressAggregator.progressBatch.connect(self.onProgressBatch)
         self.current_worker.fileCompleted.connect(self.onFileCompleted)
         self.current_worker.fileFailed.connect(self.onFileFailed)
         self.current_worker.playlistCompleted.connect(self.onPlaylistCompleted)
@@ -497,11 +542,7 @@ class PlaylistInterface(ScrollArea):
         self.playlistCountLabel.setText("")  # Remove text, badges will show the info
         
         # Update history with actual playlist title
-        download_history = cfg.get(cfg.downloadHistory) or []
-        if 0 <= self.current_history_index < len(download_history):
-            download_history[self.current_history_index]['title'] = clean_title
-            cfg.set(cfg.downloadHistory, download_history)
-            self.notifyHistoryUpdate()
+        historyStore.update(self.current_history_id, title=clean_title)
         
         # Add badges to their respective containers
         # Total badge
@@ -520,9 +561,14 @@ class PlaylistInterface(ScrollArea):
         failContainer.addWidget(self.failBadge)
         
         self.playlistInfoCard.show()
-        self.statusLabel.setText(f"Downloading {count} videos...")
+        self.statusLabel.setText(f"Downloading {count} videos..." if count else "Listing playlist...")
         self.progressRing.hide()
         
+    def onPlaylistCount(self, count):
+        """Handle the total count growing while the playlist is listed"""
+        if self.totalBadge:
+            self.totalBadge.setText(str(count))
+        
     def onFileStarted(self, index, total, title):
         """Handle file started - create card only when download actually starts"""
         # Clean title to remove unsupported Unicode characters
@@ -558,10 +604,14 @@ class PlaylistInterface(ScrollArea):
         
         self.currentDownloadLabel.setText(f"{clean_title[:60]}...")
         
-    def onFileProgress(self, index, progress, speed, eta):
-        """Handle file progress"""
-        if index in self.file_cards:
-            self.file_cards[index].updateProgress(progress, speed, eta)
+    def onProgressBatch(self, samples):
+        """Handle the progress of all running files, delivered once per tick"""
+        for index, sample in samples.items():
+            card = self.file_cards.get(index)
+            if card is None:
+                continue
+            
+            card.updateProgress(sample['progress'], format_speed(sample['speed']), format_eta(sample['eta']))
             
     def onFileCompleted(self, index, file_path, title):
         """Handle file completed"""
@@ -588,9 +638,11 @@ class PlaylistInterface(ScrollArea):
         self.statusLabel.setText(f"Completed! {success_count} succeeded, {fail_count} failed")
         self.downloadBtn.setEnabled(True)
         self.cancelBtn.hide()
+        self.pauseBtn.hide()
         
         # Update history with final status
         self.updateHistoryComplete(success_count, fail_count)
+        self.finishJob()
         
         InfoBar.success(
             title='Playlist Download Complete',
@@ -613,31 +665,15 @@ class PlaylistInterface(ScrollArea):
             'items': []
         }
         
-        # Get existing history
-        download_history = cfg.get(cfg.downloadHistory) or []
-        
-        # Add to history list
-        download_history.append(entry)
-        history_index = len(download_history) - 1
-        
-        # Keep history limited
-        if len(download_history) > cfg.get(cfg.historyLimit):
-            download_history.pop(0)
-            history_index -= 1
-        
-        # Save to config
-        cfg.set(cfg.downloadHistory, download_history)
+        # Add to history store and keep history limited
+        history_id = historyStore.append(entry)
+        historyStore.trim(cfg.get(cfg.historyLimit))
         
-        # Notify history interface
-        self.notifyHistoryUpdate()
-        
-        return history_index
+        return history_id
     
     def updateHistoryComplete(self, success_count, fail_count):
         """Update playlist history when download completes"""
-        download_history = cfg.get(cfg.downloadHistory) or []
-        
-        if 0 <= self.current_history_index < len(download_history):
+        if historyStore.get(self.current_history_id):
             # Get playlist title
             playlist_title = self.playlistTitleLabel.text().replace("Playlist: ", "")
             
@@ -652,22 +688,12 @@ class PlaylistInterface(ScrollArea):
                 })
             
             # Update entry
-            download_history[self.current_history_index]['title'] = playlist_title
-            download_history[self.current_history_index]['status'] = f"Success ({success_count}/{success_count + fail_count})" if success_count > 0 else "Failed"
-            download_history[self.current_history_index]['items'] = items
-            
-            # Save to config
-            cfg.set(cfg.downloadHistory, download_history)
-            
-            # Notify history interface
-            self.notifyHistoryUpdate()
-    
-    def notifyHistoryUpdate(self):
-        """Notify history interface to refresh"""
-        # Find history interface and refresh it
-        main_window = self.window()
-        if hasattr(main_window, 'historyInterface'):
-            main_window.historyInterface.refreshHistory()
+            historyStore.update(
+                self.current_history_id,
+                title=playlist_title,
+                status=f"Success ({success_count}/{success_count + fail_count})" if success_count > 0 else "Failed",
+                items=items
+            )
     
     def cancelDownload(self):
         """Cancel download"""
@@ -676,12 +702,37 @@ class PlaylistInterface(ScrollArea):
             self.statusLabel.setText("Download cancelled")
             self.downloadBtn.setEnabled(True)
             self.cancelBtn.hide()
+            self.pauseBtn.hide()
             self.progressRing.hide()
             
             # Update history entry to cancelled
-            if hasattr(self, 'current_history_index'):
-                download_history = cfg.get(cfg.downloadHistory) or []
-                if 0 <= self.current_history_index < len(download_history):
-                    download_history[self.current_history_index]['status'] = 'Cancelled'
-                    cfg.set(cfg.downloadHistory, download_history)
-                    self.notifyHistoryUpdate()
+            if hasattr(self, 'current_history_id'):
+                historyStore.update(self.current_history_id, status='Cancelled')
+            self.finishJob()
+    
+    def updateSpeedLimit(self, speed_limit):
+        """Limit the bandwidth of all downloads together, MB/s"""
+        cfg.set(cfg.speedLimit, speed_limit)
+        from app.components.bandwidth_limiter import bandwidthLimiter, MB
+        bandwidthLimiter.setLimit(speed_limit * MB)
+    
+    def togglePause(self):
+        """Pause or resume starting queued videos"""
+        if not self.current_worker or not self.current_worker.isRunning():
+            return
+        
+        if self.current_worker.is_paused():
+            self.current_worker.resume()
+        else:
+            self.current_worker.pause()
+        self.setPauseButton(self.current_worker.is_paused())
+    
+    def setPauseButton(self, paused):
+        """Show the pause button as resume while paused"""
+        self.pauseBtn.setText("Resume" if paused else "Pause")
+        self.pauseBtn.setIcon(FIF.PLAY if paused else FIF.PAUSE)
+    
+    def finishJob(self):
+        """Remove the current playlist from the job journal, it won't be resumed"""
+        jobJournal.finishJob(self.current_job_id)
+        self.current_job_id = None
@@ -8,6 +8,7 @@ from qfluentwidgets import (ScrollArea, PushSettingCard, SwitchSettingCard,
                             SubtitleLabel, StrongBodyLabel, HyperlinkButton)
 
 from app.common.config import cfg
+from app.components.download_scheduler import downloadScheduler
 
 class SettingsInterface(ScrollArea):
     """ Settings interface """
@@ -44,6 +45,10 @@ class SettingsInterface(ScrollArea):
         self.maxDownloadsCombo.addItems(["1", "2", "3", "4", "5", "10"])
         self.maxDownloadsCombo.setCurrentText(str(cfg.get(cfg.maxConcurrentDownloads)))
 
+        self.connectionsCombo = ComboBox()
+        self.connectionsCombo.addItems(["1", "2", "4", "8", "16"])
+        self.connectionsCombo.setCurrentText(str(cfg.get(cfg.downloadConnections)))
+
         self.historyLimitCombo = ComboBox()
         self.historyLimitCombo.addItems(["50", "100", "200", "500", "1000"])
         self.historyLimitCombo.setCurrentText(str(cfg.get(cfg.historyLimit)))
@@ -79,7 +84,8 @@ class SettingsInterface(ScrollArea):
                 self.downloadFolderCard,
                 self.createComboSetting("Default Quality", "Set default video quality", self.qualityCombo, FIF.VIDEO),
                 self.createComboSetting("Default Format", "Set default download format", self.formatCombo, FIF.DOCUMENT),
-                self.createComboSetting("Max Concurrent Downloads", "Set maximum simultaneous downloads", self.maxDownloadsCombo, FIF.DOWNLOAD)
+                self.createComboSetting("Max Concurrent Downloads", "Set maximum simultaneous downloads", self.maxDownloadsCombo, FIF.DOWNLOAD),
+                self.createComboSetting("Connections per Download", "Download large videos in segments over several connections", self.connectionsCombo, FIF.SPEED_HIGH)
             ]
         ))
 
@@ -150,6 +156,7 @@ class SettingsInterface(ScrollArea):
         self.qualityCombo.currentTextChanged.connect(self.updateQuality)
         self.formatCombo.currentTextChanged.connect(self.updateFormat)
         self.maxDownloadsCombo.currentTextChanged.connect(self.updateMaxDownloads)
+        self.connectionsCombo.currentTextChanged.connect(self.updateConnections)
         self.historyLimitCombo.currentTextChanged.connect(self.updateHistoryLimit)
 
     def changeTheme(self, theme):
@@ -201,6 +208,11 @@ class SettingsInterface(ScrollArea):
     def updateMaxDownloads(self, max_downloads):
         """ Update max concurrent downloads """
         cfg.set(cfg.maxConcurrentDownloads, int(max_downloads))
+        downloadScheduler.setMaxConcurrent(int(max_downloads))
+
+    def updateConnections(self, connections):
+        """ Update connections per download, applies to the next download """
+        cfg.set(cfg.downloadConnections, int(connections))
 
     def updateHistoryLimit(self, history_limit):
         """ Update history limit """
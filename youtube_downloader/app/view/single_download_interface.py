@@ -14,8 +14,9 @@ from qfluentwidgets import (ScrollArea, PushButton, LineEdit, ComboBox, SwitchBu
 import os
 
 from app.common.config import cfg
+from app.common.history_store import historyStore
+from app.common.job_journal import jobJournal
 from app.common.utils import extract_video_id_from_url, is_playlist_only_url
-from app.components.download_worker import DownloadWorker
 
 
 class SingleDownloadInterface(ScrollArea):
@@ -69,6 +70,7 @@ class SingleDownloadInterface(ScrollArea):
         # Download worker and tracking
         self.current_worker = None
         self.worker_thread = None
+        self.current_job_id = None
 
         # Initialize format options
         self.updateFormatOptions()
@@ -279,7 +281,31 @@ class SingleDownloadInterface(ScrollArea):
         url = clean_url
 
         # Add to history immediately with "Downloading" status
-        self.current_history_index = self.addToHistory(url, "Downloading", "")
+        history_id = self.addToHistory(url, "Downloading", "")
+
+        # Journal the job so it can be resumed if the app closes mid-download
+        options = {
+            'download_path': download_path,
+            'quality': self.qualityCombo.currentText(),
+            'format_type': self.formatCombo.currentText().lower(),
+            'is_audio_only': self.audioOnlySwitch.isChecked(),
+        }
+        job_id = jobJournal.createJob('single', url, options, history_id)
+        self.runJob(job_id, url, options, history_id)
+
+    def resumeJob(self, job):
+        """ Resume a download interrupted in a previous session """
+        if self.current_worker and self.current_worker.isRunning():
+            return False
+
+        self.urlInput.setText(job['url'])
+        self.runJob(job['id'], job['url'], job['options'], job['history_id'])
+        return True
+
+    def runJob(self, job_id, url, options, history_id):
+        """ Start the worker of a journaled download job """
+        self.current_job_id = job_id
+        self.current_history_id = history_id
 
         # Show progress and start download
         self.statusLabel.setText("Starting download...")
@@ -288,14 +314,9 @@ class SingleDownloadInterface(ScrollArea):
         self.progressBar.setValue(0)
         self.downloadBtn.setEnabled(False)
 
-        # Create and start worker thread
-        self.current_worker = DownloadWorker(
-            url=url,
-            download_path=download_path,
-            quality=self.qualityCombo.currentText(),
-            format_type=self.formatCombo.currentText().lower(),
-            is_audio_only=self.audioOnlySwitch.isChecked()
-        )
+        # Create and start worker thread, the download engine is imported on first use
+        from app.components.download_worker import DownloadWorker
+        self.current_worker = DownloadWorker(url=url, job_id=job_id, **options)
 
         self.current_worker.progressUpdated.connect(self.updateProgress)
         self.current_worker.downloadCompleted.connect(self.downloadCompleted)
@@ -325,7 +346,8 @@ class SingleDownloadInterface(ScrollArea):
         self.videoInfoCard.hide()
 
         # Update history entry
-        self.updateHistoryEntry(self.current_history_index, title, "Success", file_path)
+        self.updateHistoryEntry(self.current_history_id, title, "Success", file_path)
+        self.finishJob()
 
         # Show success message
         InfoBar.success(
@@ -361,7 +383,8 @@ class SingleDownloadInterface(ScrollArea):
         self.videoInfoCard.hide()
 
         # Update history entry
-        self.updateHistoryEntry(self.current_history_index, error_message, "Failed", "")
+        self.updateHistoryEntry(self.current_history_id, error_message, "Failed", "")
+        self.finishJob()
 
         # Show error message
         InfoBar.error(
@@ -375,7 +398,7 @@ class SingleDownloadInterface(ScrollArea):
         )
 
     def addToHistory(self, title, status, file_path):
-        """ Add entry to download history and return its index """
+        """ Add entry to download history and return its id """
         from datetime import datetime
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
@@ -388,46 +411,21 @@ class SingleDownloadInterface(ScrollArea):
             'type': 'single'
         }
 
-        # Get existing history
-        download_history = cfg.get(cfg.downloadHistory) or []
+        # Add to history store and keep history limited
+        history_id = historyStore.append(entry)
+        historyStore.trim(cfg.get(cfg.historyLimit))
         
-        # Add to history list
-        download_history.append(entry)
-        history_index = len(download_history) - 1
-
-        # Keep history limited
-        if len(download_history) > cfg.get(cfg.historyLimit):
-            download_history.pop(0)
-            history_index -= 1
-
-        # Save to config
-        cfg.set(cfg.downloadHistory, download_history)
-        
-        # Notify history interface to refresh
-        self.notifyHistoryUpdate()
-        
-        return history_index
+        return history_id
     
-    def updateHistoryEntry(self, index, title, status, file_path):
+    def updateHistoryEntry(self, history_id, title, status, file_path):
         """ Update existing history entry """
-        download_history = cfg.get(cfg.downloadHistory) or []
-        
-        if 0 <= index < len(download_history):
-            download_history[index]['title'] = title
-            download_history[index]['status'] = status
-            download_history[index]['path'] = file_path
-            cfg.set(cfg.downloadHistory, download_history)
-            
-            # Notify history interface to refresh
-            self.notifyHistoryUpdate()
-    
-    def notifyHistoryUpdate(self):
-        """ Notify history interface to refresh """
-        # Find history interface and refresh it
-        main_window = self.window()
-        if hasattr(main_window, 'historyInterface'):
-            main_window.historyInterface.refreshHistory()
+        historyStore.update(history_id, title=title, status=status, path=file_path)
 
+    def finishJob(self):
+        """ Remove the current download from the job journal, it won't be resumed """
+        jobJournal.finishJob(self.current_job_id)
+        self.current_job_id = None
+    
     def showError(self, message):
         """ Show error message """
         InfoBar.error(
@@ -443,8 +441,9 @@ class SingleDownloadInterface(ScrollArea):
     def cancelDownload(self):
         """ Cancel current download """
         if self.current_worker and self.current_worker.isRunning():
+            # A late signal of the cancelled worker must not touch this or a newer download
+            self.disconnectWorker(self.current_worker)
             self.current_worker.cancel()
-            self.current_worker.wait()
             self.statusLabel.setText("Download cancelled")
             self.progressRing.hide()
             self.progressBar.setVisible(False)
@@ -455,8 +454,9 @@ class SingleDownloadInterface(ScrollArea):
             self.videoInfoCard.hide()
             
             # Update history entry to cancelled
-            if hasattr(self, 'current_history_index'):
-                self.updateHistoryEntry(self.current_history_index, "Cancelled", "Cancelled", "")
+            if hasattr(self, 'current_history_id'):
+                self.updateHistoryEntry(self.current_history_id, "Cancelled", "Cancelled", "")
+            self.finishJob()
             
             InfoBar.warning(
                 title='Cancelled',
@@ -468,6 +468,13 @@ class SingleDownloadInterface(ScrollArea):
                 parent=self
             )
     
+    def disconnectWorker(self, worker):
+        """ Stop receiving the signals of a worker """
+        worker.progressUpdated.disconnect(self.updateProgress)
+        worker.downloadCompleted.disconnect(self.downloadCompleted)
+        worker.downloadFailed.disconnect(self.downloadFailed)
+        worker.videoInfoFetched.disconnect(self.showVideoInfo)
+
     def showVideoInfo(self, title, duration, thumbnail_url):
         """ Show video information """
         self.videoTitleLabel.setText(title)
@@ -3,29 +3,39 @@
 
 """
 Ytp Downloader Application
-Main entry point for the application
+Main entry point for the application, `main.py download URL...` runs a headless batch
 """
 
 import os
 import sys
-from PySide6.QtCore import Qt, QTranslator
-from PySide6.QtGui import QIcon
-from PySide6.QtWidgets import QApplication
-
-from qfluentwidgets import FluentTranslator
-from app.common.config import cfg
-from app.common.logger import setup_logger, get_logger
-from app.view.main_window import MainWindow
-from app.resource.resource import getAppIcon
 
 # Add the app directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 def main():
+    # Batch downloads run headless, without loading any widget
+    if len(sys.argv) > 1 and sys.argv[1] == 'download':
+        from app.cli import main as run_cli
+        return run_cli(sys.argv[2:])
+
+    # Import and init phases are logged once the first frame is up
+    from app.common.startup_timer import startupTimer
+
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import QApplication
+    startupTimer.mark("import Qt")
+
+    from app.common.config import cfg
+    from app.common.logger import setup_logger
+    from app.view.main_window import MainWindow
+    from app.resource.resource import getAppIcon
+    startupTimer.mark("import interfaces")
+
     try:
         # Create application FIRST (required for QStandardPaths used by logger and config)
         app = QApplication(sys.argv)
         app.setAttribute(Qt.AA_DontCreateNativeWidgetSiblings)
+        startupTimer.mark("create QApplication")
         
         # Now set up logging (after QApplication exists)
         logger = setup_logger(level='DEBUG')  # Change to 'DEBUG' for more verbose logging
@@ -51,7 +61,7 @@ def main():
                 logger.debug("Windows AppUserModelID set for taskbar icon")
             except Exception as e:
                 logger.warning(f"Could not set AppUserModelID: {e}")
-
+        startupTimer.mark("set up logging and app icon")
 
         # Create main window
         logger.info("Creating main window...")